@@ -5,6 +5,11 @@ It exposes the ASGI callable as a module-level variable named ``application``.
 
 For more information on this file, see
 https://docs.djangoproject.com/en/6.0/howto/deployment/asgi/
+
+Para que /api/ia/async/ no ocupe un hilo mientras espera a Gemini, sirve el
+proyecto con un servidor ASGI, por ejemplo:
+
+    uvicorn Educacion.asgi:application --workers 2
 """
 
 import os
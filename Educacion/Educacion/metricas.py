@@ -0,0 +1,294 @@
+"""
+Métricas de rendimiento en memoria y su exportación en formato Prometheus.
+
+- MetricasMiddleware mide cada petición: latencia total, número de consultas
+  SQL y tiempo en la BD, por ruta (el patrón de la URL, no la URL concreta,
+  para que no crezca el número de series).
+- medir("gemini") mide llamadas externas; si ocurren dentro de una petición
+  su tiempo también se suma a esa petición.
+- /metrics devuelve todo en texto para Prometheus, junto con el ratio de
+  aciertos de la cache de recomendaciones.
+- Si METRICAS_UMBRAL_LENTO_MS > 0, las peticiones más lentas se registran en
+  el logger "Educacion.lentas" con sus consultas SQL.
+
+Los valores son por proceso (cada worker de gunicorn tiene los suyos);
+Prometheus los suma al agregar por instancia. El coste por petición es un par
+de perf_counter() y un lock corto por histograma.
+"""
+import bisect
+import contextvars
+import logging
+import threading
+import time
+from contextlib import contextmanager
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.http import HttpResponse
+
+logger = logging.getLogger("Educacion.lentas")
+
+BUCKETS_SEGUNDOS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+BUCKETS_CONSULTAS = (0, 1, 2, 5, 10, 20, 50, 100, 500)
+
+_MAX_SQL_GUARDADO = 200
+
+
+# ------------------------------
+# HISTOGRAMAS
+# ------------------------------
+
+class Histograma:
+    def __init__(self, nombre, ayuda, buckets, etiquetas):
+        self.nombre = nombre
+        self.ayuda = ayuda
+        self.buckets = tuple(buckets)
+        self.etiquetas = tuple(etiquetas)
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observar(self, valor, *valores_etiquetas):
+        i = bisect.bisect_left(self.buckets, valor)
+        with self._lock:
+            serie = self._series.get(valores_etiquetas)
+            if serie is None:
+                # conteos por bucket (no acumulados), suma, total
+                serie = self._series[valores_etiquetas] = [[0] * len(self.buckets), 0.0, 0]
+            if i < len(self.buckets):
+                serie[0][i] += 1
+            serie[1] += valor
+            serie[2] += 1
+
+    def reiniciar(self):
+        with self._lock:
+            self._series.clear()
+
+    def exportar(self):
+        with self._lock:
+            series = {k: ([*v[0]], v[1], v[2]) for k, v in self._series.items()}
+
+        lineas = [f"# HELP {self.nombre} {self.ayuda}", f"# TYPE {self.nombre} histogram"]
+        for valores, (conteos, suma, total) in sorted(series.items()):
+            base = list(zip(self.etiquetas, valores))
+            acumulado = 0
+            for limite, n in zip(self.buckets, conteos):
+                acumulado += n
+                lineas.append(f"{self.nombre}_bucket{_etiquetas(base + [('le', _numero(limite))])} {acumulado}")
+            lineas.append(f"{self.nombre}_bucket{_etiquetas(base + [('le', '+Inf')])} {total}")
+            lineas.append(f"{self.nombre}_sum{_etiquetas(base)} {_numero(suma)}")
+            lineas.append(f"{self.nombre}_count{_etiquetas(base)} {total}")
+        return lineas
+
+
+def _numero(valor):
+    return repr(float(valor)) if isinstance(valor, float) else str(valor)
+
+
+def _escapar(valor):
+    return str(valor).replace("\\", "\\\\").replace('"', '\\"').replace("\n", " ")
+
+
+def _etiquetas(pares):
+    if not pares:
+        return ""
+    return "{" + ",".join(f'{k}="{_escapar(v)}"' for k, v in pares) + "}"
+
+
+DURACION = Histograma(
+    "http_request_duration_seconds", "Latencia total de la petición.",
+    BUCKETS_SEGUNDOS, ("ruta", "metodo", "estado"),
+)
+CONSULTAS = Histograma(
+    "http_request_db_queries", "Consultas SQL por petición.",
+    BUCKETS_CONSULTAS, ("ruta", "metodo"),
+)
+TIEMPO_BD = Histograma(
+    "http_request_db_seconds", "Tiempo en la base de datos por petición.",
+    BUCKETS_SEGUNDOS, ("ruta", "metodo"),
+)
+TIEMPO_EXTERNO = Histograma(
+    "http_request_external_seconds", "Tiempo en servicios externos (Gemini) por petición.",
+    BUCKETS_SEGUNDOS, ("ruta", "metodo"),
+)
+LLAMADAS_EXTERNAS = Histograma(
+    "external_call_duration_seconds", "Latencia de cada llamada a un servicio externo.",
+    BUCKETS_SEGUNDOS, ("servicio", "resultado"),
+)
+
+HISTOGRAMAS = [DURACION, CONSULTAS, TIEMPO_BD, TIEMPO_EXTERNO, LLAMADAS_EXTERNAS]
+
+
+def reiniciar():
+    for h in HISTOGRAMAS:
+        h.reiniciar()
+
+
+# ------------------------------
+# MEDICIÓN DE LA PETICIÓN EN CURSO
+# ------------------------------
+
+class _Medicion:
+    __slots__ = ("consultas", "tiempo_bd", "tiempo_externo", "sql")
+
+    def __init__(self, guardar_sql):
+        self.consultas = 0
+        self.tiempo_bd = 0.0
+        self.tiempo_externo = 0.0
+        self.sql = [] if guardar_sql else None
+
+
+# contextvars: pasa a sync_to_async, así el ORM async también se cuenta
+_actual = contextvars.ContextVar("metricas_peticion", default=None)
+
+
+def _envolver_sql(execute, sql, params, many, context):
+    medicion = _actual.get()
+    if medicion is None:
+        return execute(sql, params, many, context)
+    inicio = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        duracion = time.perf_counter() - inicio
+        medicion.consultas += 1
+        medicion.tiempo_bd += duracion
+        if medicion.sql is not None and len(medicion.sql) < _MAX_SQL_GUARDADO:
+            medicion.sql.append((round(duracion * 1000, 2), sql))
+
+
+def _instalar(connection):
+    # al principio de la lista, no al final: connection.execute_wrapper()
+    # agrega y saca del final, así que si esto pasa dentro de uno de esos
+    # bloques, su pop() sigue sacando su propio wrapper y no el nuestro
+    if _envolver_sql not in connection.execute_wrappers:
+        connection.execute_wrappers.insert(0, _envolver_sql)
+
+
+def _instalar_en_conexion(sender, connection, **kwargs):
+    _instalar(connection)
+
+
+# las conexiones nuevas (de cualquier hilo) se envuelven al abrirse; las que
+# ya estaban abiertas en el hilo de la petición, en MetricasMiddleware
+connection_created.connect(_instalar_en_conexion, dispatch_uid="metricas_sql")
+
+
+@contextmanager
+def medir(servicio: str):
+    """Mide una llamada externa: with medir("gemini"): ..."""
+    inicio = time.perf_counter()
+    resultado = "ok"
+    try:
+        yield
+    except BaseException:
+        resultado = "error"
+        raise
+    finally:
+        duracion = time.perf_counter() - inicio
+        LLAMADAS_EXTERNAS.observar(duracion, servicio, resultado)
+        medicion = _actual.get()
+        if medicion is not None:
+            medicion.tiempo_externo += duracion
+
+
+# ------------------------------
+# MIDDLEWARE
+# ------------------------------
+
+def _umbral_lento():
+    return getattr(settings, "METRICAS_UMBRAL_LENTO_MS", 0) / 1000
+
+
+class MetricasMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.es_async = iscoroutinefunction(get_response)
+        if self.es_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.es_async:
+            return self.__acall__(request)
+        medicion, token, inicio = self._empezar()
+        try:
+            respuesta = self.get_response(request)
+        finally:
+            _actual.reset(token)
+        self._terminar(request, respuesta, medicion, inicio)
+        return respuesta
+
+    async def __acall__(self, request):
+        medicion, token, inicio = self._empezar()
+        try:
+            respuesta = await self.get_response(request)
+        finally:
+            _actual.reset(token)
+        self._terminar(request, respuesta, medicion, inicio)
+        return respuesta
+
+    def _empezar(self):
+        for conexion in connections.all(initialized_only=True):
+            _instalar(conexion)
+        medicion = _Medicion(guardar_sql=_umbral_lento() > 0)
+        return medicion, _actual.set(medicion), time.perf_counter()
+
+    def _terminar(self, request, respuesta, medicion, inicio):
+        # en respuestas en streaming solo se mide hasta el primer byte
+        duracion = time.perf_counter() - inicio
+        match = getattr(request, "resolver_match", None)
+        # patrón de la URL ("/api/secciones/<pk>/"), con los de regex del router sin ^ ni $
+        ruta = "/" + match.route.replace("^", "").replace("$", "") if match and match.route else "(sin ruta)"
+        metodo = request.method
+
+        DURACION.observar(duracion, ruta, metodo, str(respuesta.status_code))
+        CONSULTAS.observar(medicion.consultas, ruta, metodo)
+        TIEMPO_BD.observar(medicion.tiempo_bd, ruta, metodo)
+        TIEMPO_EXTERNO.observar(medicion.tiempo_externo, ruta, metodo)
+
+        umbral = _umbral_lento()
+        if umbral and duracion >= umbral:
+            logger.warning(
+                "Petición lenta %s %s: %.0f ms, %d consultas (%.0f ms BD, %.0f ms externo)\n%s",
+                metodo, request.get_full_path(), duracion * 1000, medicion.consultas,
+                medicion.tiempo_bd * 1000, medicion.tiempo_externo * 1000,
+                "\n".join(f"  [{ms} ms] {sql}" for ms, sql in medicion.sql or []),
+            )
+
+
+# ------------------------------
+# /metrics
+# ------------------------------
+
+def _cache_ia():
+    # import diferido: inteligencia depende de este módulo (medir)
+    from inteligencia.cache import estadisticas
+
+    datos = estadisticas()
+    return [
+        "# HELP ia_cache_hits_total Recomendaciones servidas desde la cache.",
+        "# TYPE ia_cache_hits_total counter",
+        f"ia_cache_hits_total {datos['hits']}",
+        "# HELP ia_cache_misses_total Recomendaciones que no estaban en la cache.",
+        "# TYPE ia_cache_misses_total counter",
+        f"ia_cache_misses_total {datos['misses']}",
+        "# HELP ia_cache_hit_ratio Aciertos / consultas de la cache de recomendaciones.",
+        "# TYPE ia_cache_hit_ratio gauge",
+        f"ia_cache_hit_ratio {datos['ratio']}",
+    ]
+
+
+def exportar() -> str:
+    lineas = []
+    for h in HISTOGRAMAS:
+        lineas.extend(h.exportar())
+    lineas.extend(_cache_ia())
+    return "\n".join(lineas) + "\n"
+
+
+def vista_metricas(request):
+    return HttpResponse(exportar(), content_type="text/plain; version=0.0.4; charset=utf-8")
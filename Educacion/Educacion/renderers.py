@@ -0,0 +1,60 @@
+"""
+JSONRenderer con orjson (si está instalado).
+
+Misma salida que el JSONRenderer de DRF (compacto, UTF-8, U+2028/U+2029
+escapados); lo que orjson no sabe serializar pasa por el encoder de DRF.
+Sin orjson, o si se pide ?indent / Accept: ...; indent=N, se usa el de DRF.
+
+Floats: entre 1e-4 y 1e16 orjson los escribe igual que json/DRF (el repr
+más corto). Fuera de ese rango no (0.00001 en vez de 1e-05, 1e16 en vez de
+1e+16): si la salida tiene alguno, la respuesta la renderiza DRF entera.
+La búsqueda es sobre los bytes, así que un texto como "2e5" o "0.0000" también
+manda la respuesta a DRF (más lenta, pero igual).
+
+La única diferencia que queda es NaN/Infinity: orjson los escribe como null y
+el de DRF (STRICT_JSON) da error. Los serializers de este proyecto no los
+producen.
+"""
+import re
+
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import orjson
+except ImportError:  # dependencia opcional
+    orjson = None
+
+
+_encoder = JSONEncoder()
+
+
+# formas en que orjson escribe un float distinto que json: exponente sin "+"
+# o negativo (1e16, 1.5e-7) y menores que 1e-4 sin exponente (0.00001)
+_FLOAT_DISTINTO = re.compile(rb"[0-9]e-?[0-9]|0\.0000")
+
+
+class JSONRapidoRenderer(JSONRenderer):
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if orjson is None or data is None or self.get_indent(accepted_media_type, renderer_context or {}):
+            return super().render(data, accepted_media_type, renderer_context)
+
+        try:
+            # fechas, Decimal, etc. con el mismo formato que DRF (p.ej. milisegundos)
+            ret = orjson.dumps(
+                data,
+                default=_encoder.default,
+                option=orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_PASSTHROUGH_DATACLASS,
+            )
+        except (orjson.JSONEncodeError, TypeError):
+            # enteros de más de 64 bits, ...
+            return super().render(data, accepted_media_type, renderer_context)
+        # floats fuera de [1e-4, 1e16): los escribe DRF
+        if _FLOAT_DISTINTO.search(ret):
+            return super().render(data, accepted_media_type, renderer_context)
+
+        # como DRF: estos dos son JSON válido pero rompen JavaScript embebido
+        if b"\xe2\x80\xa8" in ret or b"\xe2\x80\xa9" in ret:
+            ret = ret.replace(b"\xe2\x80\xa8", b"\\u2028").replace(b"\xe2\x80\xa9", b"\\u2029")
+        return ret
@@ -0,0 +1,133 @@
+"""
+Lecturas en réplicas con "lee lo que escribiste".
+
+- Solo se usan réplicas dentro de lecturas_en_replica(): las vistas GET de
+  administrador (LecturaEnReplicaMixin) y el contexto de la IA
+  (inteligencia/utils.py). Todo lo demás (admin, sesiones, escrituras,
+  transacciones) va a 'default'.
+- Si en la petición ya se escribió algo, o el cliente escribió hace menos de
+  DB_FIJAR_PRIMARIA_SEGUNDOS (cookie que pone ReplicaMiddleware), se lee de
+  la primaria para no ver datos anteriores a su propia escritura.
+- Todo un bloque lecturas_en_replica() lee de la misma réplica (los bloques
+  anidados usan la del de fuera). Las caches guardan los datos bajo versiones
+  que se leen antes que ellos (administrador/versiones.py): leyendo las dos
+  cosas de la misma réplica, los datos nunca son más viejos que la versión,
+  aunque otra réplica vaya más atrasada.
+- Sin DB_REPLICAS configuradas el router siempre devuelve 'default'.
+"""
+import contextlib
+import contextvars
+import random
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+from rest_framework.permissions import SAFE_METHODS
+
+COOKIE = "primaria_hasta"
+
+# alias de la réplica del bloque lecturas_en_replica() actual, o None
+_replica = contextvars.ContextVar("replica", default=None)
+# lista mutable por petición: el router marca que hubo escritura
+_peticion = contextvars.ContextVar("replicas_peticion", default=None)
+
+
+def replicas():
+    return [alias for alias in settings.DATABASES if alias.startswith("replica_")]
+
+
+def _fijada_a_primaria():
+    estado = _peticion.get()
+    return bool(estado and (estado["fijada"] or estado["escribio"]))
+
+
+@contextlib.contextmanager
+def lecturas_en_replica(activar=True):
+    if not activar:
+        alias = None
+    else:
+        disponibles = replicas()
+        alias = _replica.get() or (random.choice(disponibles) if disponibles else DEFAULT_DB_ALIAS)
+    token = _replica.set(alias)
+    try:
+        yield
+    finally:
+        _replica.reset(token)
+
+
+class ReplicaRouter:
+
+    def db_for_read(self, model, **hints):
+        alias = _replica.get()
+        if alias is None or _fijada_a_primaria():
+            return DEFAULT_DB_ALIAS
+        # dentro de una transacción se lee de donde se escribe
+        if connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return DEFAULT_DB_ALIAS
+        return alias
+
+    def db_for_write(self, model, **hints):
+        estado = _peticion.get()
+        if estado is not None:
+            estado["escribio"] = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # réplicas y primaria tienen los mismos datos
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == DEFAULT_DB_ALIAS
+
+
+class LecturaEnReplicaMixin:
+    """Para vistas DRF: GET/HEAD/OPTIONS leen de una réplica."""
+
+    def dispatch(self, request, *args, **kwargs):
+        with lecturas_en_replica(request.method in SAFE_METHODS):
+            return super().dispatch(request, *args, **kwargs)
+
+
+class ReplicaMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.es_async = iscoroutinefunction(get_response)
+        if self.es_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.es_async:
+            return self.__acall__(request)
+        estado, token = self._empezar(request)
+        try:
+            respuesta = self.get_response(request)
+        finally:
+            _peticion.reset(token)
+        return self._terminar(request, respuesta, estado)
+
+    async def __acall__(self, request):
+        estado, token = self._empezar(request)
+        try:
+            respuesta = await self.get_response(request)
+        finally:
+            _peticion.reset(token)
+        return self._terminar(request, respuesta, estado)
+
+    def _empezar(self, request):
+        try:
+            hasta = float(request.COOKIES.get(COOKIE, 0))
+        except ValueError:
+            hasta = 0
+        estado = {"fijada": hasta > time.time(), "escribio": False}
+        return estado, _peticion.set(estado)
+
+    def _terminar(self, request, respuesta, estado):
+        segundos = getattr(settings, "DB_FIJAR_PRIMARIA_SEGUNDOS", 5)
+        if estado["escribio"] and segundos and replicas():
+            respuesta.set_cookie(COOKIE, str(time.time() + segundos), max_age=segundos,
+                                 httponly=True, samesite="Lax")
+        return respuesta
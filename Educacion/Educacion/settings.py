@@ -11,6 +11,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/6.0/ref/settings/
 """
 
+import os
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -46,6 +47,9 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    # primero, para que la latencia incluya al resto de middlewares
+    'Educacion.metricas.MetricasMiddleware',
+    'Educacion.replicas.ReplicaMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -78,20 +82,158 @@ WSGI_APPLICATION = 'Educacion.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/6.0/ref/settings/#databases
 
+def _base_de_datos(**cambios):
+    base = {
+        'ENGINE': os.getenv('DB_ENGINE', 'django.db.backends.mysql'),
+        'NAME': os.getenv('DB_NAME', 'educacion'),
+        'USER': os.getenv('DB_USER', 'root'),
+        'PASSWORD': os.getenv('DB_PASSWORD', ''),
+        'HOST': os.getenv('DB_HOST', '127.0.0.1'),
+        'PORT': os.getenv('DB_PORT', '3306'),
+        # ✅ conexiones persistentes: se reutilizan entre peticiones y se
+        # comprueban antes de usarlas (evita errores si el servidor las cerró)
+        'CONN_MAX_AGE': int(os.getenv('DB_CONN_MAX_AGE', '60')),
+        'CONN_HEALTH_CHECKS': True,
+    }
+    base.update(cambios)
+    if 'mysql' in base['ENGINE']:
+        base['OPTIONS'] = {
+            'init_command': "SET sql_mode='STRICT_TRANS_TABLES'",
+        }
+    else:
+        for clave in ('USER', 'PASSWORD', 'HOST', 'PORT'):
+            base.pop(clave)
+    return base
+
+
 DATABASES = {
+    'default': _base_de_datos(),
+}
+
+# Réplicas de solo lectura, separadas por comas: "host[:puerto]" con MySQL o
+# la ruta del archivo con SQLite (p.ej. DB_ENGINE=django.db.backends.sqlite3
+# DB_NAME=primaria.sqlite3 DB_REPLICAS=replica.sqlite3 para probar en local).
+# Ver Educacion/replicas.py.
+for _i, _replica in enumerate(filter(None, os.getenv('DB_REPLICAS', '').split(',')), 1):
+    _replica = _replica.strip()
+    if 'sqlite' in DATABASES['default']['ENGINE']:
+        _cambios = {'NAME': _replica}
+    else:
+        _host, _, _puerto = _replica.partition(':')
+        _cambios = {
+            'HOST': _host,
+            'PORT': _puerto or DATABASES['default']['PORT'],
+            'USER': os.getenv('DB_REPLICA_USER', DATABASES['default']['USER']),
+            'PASSWORD': os.getenv('DB_REPLICA_PASSWORD', DATABASES['default']['PASSWORD']),
+        }
+    # en los tests las réplicas apuntan a la base de prueba de 'default'
+    DATABASES[f'replica_{_i}'] = _base_de_datos(TEST={'MIRROR': 'default'}, **_cambios)
+
+DATABASE_ROUTERS = ['Educacion.replicas.ReplicaRouter']
+
+# Tras escribir, un cliente lee de la primaria durante estos segundos
+# (lectura de lo que acaba de escribir mientras las réplicas se ponen al día)
+DB_FIJAR_PRIMARIA_SEGUNDOS = int(os.getenv('DB_FIJAR_PRIMARIA_SEGUNDOS', '5'))
+
+
+# Cache
+# https://docs.djangoproject.com/en/6.0/topics/cache/
+
+CACHES = {
     'default': {
-        'ENGINE': 'django.db.backends.mysql',
-        'NAME': 'educacion',
-        'USER': 'root',
-        'PASSWORD': '',
-        'HOST': '127.0.0.1',
-        'PORT': '3306',
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    # Respuestas de la IA. LocMemCache expulsa por LRU al llegar a MAX_ENTRIES;
+    # en producción se puede cambiar por Redis/Memcached sin tocar el código.
+    'ia': {
+        'BACKEND': os.getenv('IA_CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': os.getenv('IA_CACHE_LOCATION', 'ia-recomendaciones'),
+        'TIMEOUT': int(os.getenv('IA_CACHE_TTL', '3600')),
         'OPTIONS': {
-            'init_command': "SET sql_mode='STRICT_TRANS_TABLES'",
-        }
-    }
+            'MAX_ENTRIES': int(os.getenv('IA_CACHE_MAX_ENTRIES', '1000')),
+        },
+    },
+    # Listados de Materias/Planes, indexados por su versión en la BD
+    # (administrador/versiones.py); compartido solo ahorra recalcular.
+    'catalogo': {
+        'BACKEND': os.getenv('CATALOGO_CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': os.getenv('CATALOGO_CACHE_LOCATION', 'catalogo'),
+    },
 }
 
+IA_CACHE_ALIAS = 'ia'
+CATALOGO_CACHE_ALIAS = 'catalogo'
+# Cuánto vive un listado de /api/materias/ o /api/planes/ en la cache (s)
+CATALOGO_CACHE_TTL = int(os.getenv('CATALOGO_CACHE_TTL', '600'))
+# /api/usuarios/<id>/estadisticas/: misma cache compartida que el catálogo
+ESTADISTICAS_CACHE_ALIAS = 'catalogo'
+ESTADISTICAS_CACHE_TTL = int(os.getenv('ESTADISTICAS_CACHE_TTL', '3600'))
+
+# Peticiones iguales y simultáneas comparten una llamada a Gemini. Entre
+# procesos solo funciona si el backend de 'ia' es compartido (Redis, etc.).
+IA_COALESCENCIA_TIMEOUT = int(os.getenv('IA_COALESCENCIA_TIMEOUT', '60'))
+IA_COALESCENCIA_LOCK_TTL = int(os.getenv('IA_COALESCENCIA_LOCK_TTL', '90'))
+
+# Materias que entran al prompt: las IA_MATERIAS_TOP_K más relevantes para la
+# pregunta, sin pasar de IA_PRESUPUESTO_TOKENS_MATERIAS tokens (aprox.)
+IA_MATERIAS_TOP_K = int(os.getenv('IA_MATERIAS_TOP_K', '30'))
+IA_PRESUPUESTO_TOKENS_MATERIAS = int(os.getenv('IA_PRESUPUESTO_TOKENS_MATERIAS', '1500'))
+
+# Tiempo máximo que /recomendar espera a Gemini antes de responder con el
+# recomendador local (0 = sin límite). La llamada sigue en segundo plano en un
+# pool de IA_HILOS_FONDO hilos y deja su respuesta en la cache. Con
+# IA_COLA_FONDO llamadas ya pendientes no se encola otra: se responde local.
+IA_PRESUPUESTO_MS = int(os.getenv('IA_PRESUPUESTO_MS', '8000'))
+IA_HILOS_FONDO = int(os.getenv('IA_HILOS_FONDO', '16'))
+IA_COLA_FONDO = int(os.getenv('IA_COLA_FONDO', '64'))
+
+# Cola de /api/ia/trabajos/ (manage.py trabajador_ia). Un trabajo en curso
+# vuelve a la cola si su trabajador no termina en IA_TRABAJOS_VISIBILIDAD s;
+# los errores se reintentan con backoff exponencial (base, tope en s).
+IA_TRABAJOS_VISIBILIDAD = int(os.getenv('IA_TRABAJOS_VISIBILIDAD', '120'))
+IA_TRABAJOS_MAX_INTENTOS = int(os.getenv('IA_TRABAJOS_MAX_INTENTOS', '5'))
+IA_TRABAJOS_BACKOFF_BASE = int(os.getenv('IA_TRABAJOS_BACKOFF_BASE', '5'))
+IA_TRABAJOS_BACKOFF_MAX = int(os.getenv('IA_TRABAJOS_BACKOFF_MAX', '300'))
+
+
+# Métricas (/metrics, formato Prometheus)
+# Peticiones que tarden más que esto se registran en el logger
+# "Educacion.lentas" con su SQL (0 = desactivado)
+METRICAS_UMBRAL_LENTO_MS = int(os.getenv('METRICAS_UMBRAL_LENTO_MS', '0'))
+
+
+# API
+# Paginación por cursor de /api/secciones/ (?page_size=&cursor=)
+
+SECCIONES_PAGE_SIZE = int(os.getenv('SECCIONES_PAGE_SIZE', '100'))
+SECCIONES_MAX_PAGE_SIZE = int(os.getenv('SECCIONES_MAX_PAGE_SIZE', '500'))
+
+# /api/planes/<id>/programar/: minutos libres entre sesiones y máximo de
+# minutos planificados por día
+PLANIFICADOR_DESCANSO_MIN = int(os.getenv('PLANIFICADOR_DESCANSO_MIN', '10'))
+PLANIFICADOR_MAX_MINUTOS_DIA = int(os.getenv('PLANIFICADOR_MAX_MINUTOS_DIA', '240'))
+
+# Endpoints <recurso>/bulk/ (?batch_size=)
+BULK_BATCH_SIZE = int(os.getenv('BULK_BATCH_SIZE', '500'))
+BULK_MAX_ITEMS = int(os.getenv('BULK_MAX_ITEMS', '5000'))
+
+# /api/secciones/exportar/: filas por consulta y filas por trozo de la respuesta
+EXPORTAR_TAM_BLOQUE = int(os.getenv('EXPORTAR_TAM_BLOQUE', '2000'))
+EXPORTAR_FILAS_POR_TROZO = int(os.getenv('EXPORTAR_FILAS_POR_TROZO', '500'))
+
+# planes/<id>/contenido/: caracteres por consulta al enviar el texto de un plan
+PLANES_CONTENIDO_TROZO = int(os.getenv('PLANES_CONTENIDO_TROZO', str(64 * 1024)))
+# MySQL: tabla de planes comprimida (ROW_FORMAT=COMPRESSED) al aplicar la migración 0008
+PLANES_CONTENIDO_COMPRIMIDO = os.getenv('PLANES_CONTENIDO_COMPRIMIDO', '1') == '1'
+
+# JSON con orjson si está instalado (misma salida que el de DRF salvo NaN/Infinity,
+# ver Educacion/renderers.py)
+REST_FRAMEWORK = {
+    'DEFAULT_RENDERER_CLASSES': [
+        'Educacion.renderers.JSONRapidoRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+}
 
 
 # Password validation
@@ -17,8 +17,11 @@ Including another URLconf
 from django.contrib import admin
 from django.urls import include, path
 
+from .metricas import vista_metricas
+
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('api/', include('administrador.url')),
     path('api/ia/', include('inteligencia.urls')),
+    path('metrics', vista_metricas),
 ]
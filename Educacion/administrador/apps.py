@@ -3,3 +3,6 @@ from django.apps import AppConfig
 
 class AdministradorConfig(AppConfig):
     name = 'administrador'
+
+    def ready(self):
+        from . import signals  # noqa: F401
@@ -0,0 +1,262 @@
+import json
+import os
+import random
+import statistics
+import subprocess
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import connection
+from django.test import Client, override_settings
+from django.utils import timezone
+
+from .models import Usuarios, Materias, Planes, Sesiones_Estudios
+
+
+# ------------------------------
+# BENCHMARK DE ENDPOINTS
+# ------------------------------
+# Lanza peticiones dentro del proceso (django.test.Client: toda la pila de
+# middlewares y vistas, sin red) contra cada endpoint del router de
+# administrador/url.py y contra /api/ia/, y mide por endpoint: peticiones por
+# segundo, latencia p50/p95/p99 y consultas SQL por petición. /api/ia/ habla
+# con un Gemini falso (inteligencia/gemini_falso.py) con la latencia que se
+# pida. El resultado es un JSON que se puede comparar con el de otro commit.
+
+def _percentil(valores, p):
+    if not valores:
+        return None
+    valores = sorted(valores)
+    i = min(len(valores) - 1, max(0, round(p / 100 * len(valores)) - 1))
+    return valores[i]
+
+
+def _muestra(qs, n, rnd):
+    ids = list(qs.order_by("id").values_list("id", flat=True)[:5000])
+    return [rnd.choice(ids) for _ in range(n)] if ids else []
+
+
+def endpoints(n, semilla=42):
+    """[(nombre, metodo, [(ruta, cuerpo)])]: n peticiones por endpoint con ids reales."""
+    rnd = random.Random(semilla)
+    usuarios = _muestra(Usuarios.objects.all(), n, rnd)
+    materias = _muestra(Materias.objects.all(), n, rnd)
+    planes = _muestra(Planes.objects.all(), n, rnd)
+    sesiones = _muestra(Sesiones_Estudios.objects.all(), n, rnd)
+    preguntas = ["¿Qué estudio hoy?", "Tengo examen de cálculo", "Quiero repasar algo fácil"]
+
+    lista = [
+        ("usuarios-lista", "get", [("/api/usuarios/", None)] * n),
+        ("usuarios-detalle", "get", [(f"/api/usuarios/{i}/", None) for i in usuarios]),
+        ("materias-lista", "get", [("/api/materias/", None)] * n),
+        ("materias-detalle", "get", [(f"/api/materias/{i}/", None) for i in materias]),
+        ("planes-lista", "get", [(f"/api/planes/?usuario_id={i}", None) for i in usuarios]),
+        ("planes-detalle", "get", [(f"/api/planes/{i}/", None) for i in planes]),
+        ("secciones-lista", "get", [(f"/api/secciones/?usuario_id={i}&page_size=100", None) for i in usuarios]),
+        ("secciones-detalle", "get", [(f"/api/secciones/{i}/", None) for i in sesiones]),
+        ("ia-recomendar", "post", [
+            ("/api/ia/", {"usuario_id": i, "pregunta": rnd.choice(preguntas)}) for i in usuarios
+        ]),
+    ]
+    return [(nombre, metodo, peticiones) for nombre, metodo, peticiones in lista if peticiones]
+
+
+class _Contador:
+    def __init__(self):
+        self.consultas = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.consultas += 1
+        return execute(sql, params, many, context)
+
+
+_local = threading.local()
+
+
+def _peticion(metodo, ruta, cuerpo):
+    cliente = getattr(_local, "cliente", None)
+    if cliente is None:
+        cliente = _local.cliente = Client(raise_request_exception=False)
+
+    contador = _Contador()
+    inicio = time.perf_counter()
+    with connection.execute_wrapper(contador):
+        if metodo == "post":
+            respuesta = cliente.post(ruta, cuerpo, content_type="application/json")
+        else:
+            respuesta = cliente.get(ruta)
+    duracion = time.perf_counter() - inicio
+    fuente = None
+    if ruta.startswith("/api/ia/") and respuesta.status_code == 200:
+        fuente = "cache" if respuesta.json().get("cache") else respuesta.json().get("fuente")
+    return duracion, contador.consultas, respuesta.status_code, fuente
+
+
+def medir_endpoint(metodo, peticiones, hilos=8, calentamiento=5):
+    for ruta, cuerpo in peticiones[:calentamiento]:
+        _peticion(metodo, ruta, cuerpo)
+
+    inicio = time.perf_counter()
+    if hilos > 1:
+        with ThreadPoolExecutor(max_workers=hilos) as pool:
+            resultados = list(pool.map(lambda p: _peticion(metodo, *p), peticiones))
+    else:
+        resultados = [_peticion(metodo, *p) for p in peticiones]
+    total = time.perf_counter() - inicio
+
+    latencias = [r[0] * 1000 for r in resultados]
+    consultas = [r[1] for r in resultados]
+    fuentes = {}
+    for r in resultados:
+        if r[3]:
+            fuentes[r[3]] = fuentes.get(r[3], 0) + 1
+
+    resultado = {
+        "peticiones": len(resultados),
+        "errores": sum(1 for r in resultados if r[2] >= 400),
+        "rps": round(len(resultados) / total, 2) if total else None,
+        "p50_ms": round(_percentil(latencias, 50), 2),
+        "p95_ms": round(_percentil(latencias, 95), 2),
+        "p99_ms": round(_percentil(latencias, 99), 2),
+        "media_ms": round(statistics.fmean(latencias), 2),
+        "consultas_media": round(statistics.fmean(consultas), 2),
+        "consultas_max": max(consultas),
+    }
+    if fuentes:
+        resultado["fuentes"] = fuentes
+    return resultado
+
+
+def _commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, timeout=5
+        ).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def ejecutar(peticiones=200, hilos=8, calentamiento=5, latencia_llm_ms=300, solo=None,
+             semilla=42, progreso=None):
+    from inteligencia import gemini_falso
+    from inteligencia.cache import _cache
+    from inteligencia.services import reiniciar_cliente
+
+    url, servidor = gemini_falso.iniciar(latencia_llm_ms)
+    anteriores = {k: os.environ.get(k) for k in ("GEMINI_BASE_URL", "GEMINI_API_KEY", "GEMINI_REINTENTOS")}
+    os.environ.update(GEMINI_BASE_URL=url, GEMINI_API_KEY="falso", GEMINI_REINTENTOS="1")
+    reiniciar_cliente()
+    # sin respuestas de una corrida anterior: se mide la llamada al modelo
+    _cache().clear()
+
+    # el Client usa el host "testserver"; fuera de los tests no está en ALLOWED_HOSTS
+    hosts = override_settings(ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, "testserver"])
+    try:
+        resultados = {}
+        with hosts:
+            for nombre, metodo, lista in endpoints(peticiones, semilla):
+                if solo and nombre not in solo:
+                    continue
+                resultados[nombre] = medir_endpoint(metodo, lista, hilos, calentamiento)
+                if progreso:
+                    progreso(nombre, resultados[nombre])
+    finally:
+        servidor.shutdown()
+        for k, v in anteriores.items():
+            if v is None:
+                os.environ.pop(k, None)
+            else:
+                os.environ[k] = v
+        reiniciar_cliente()
+
+    return {
+        "commit": _commit(),
+        "fecha": timezone.now().isoformat(),
+        "motor": connection.vendor,
+        "datos": {
+            "usuarios": Usuarios.objects.count(),
+            "materias": Materias.objects.count(),
+            "planes": Planes.objects.count(),
+            "sesiones": Sesiones_Estudios.objects.count(),
+        },
+        "config": {
+            "peticiones": peticiones, "hilos": hilos, "calentamiento": calentamiento,
+            "latencia_llm_ms": latencia_llm_ms, "semilla": semilla,
+        },
+        "endpoints": resultados,
+    }
+
+
+def comparar(base, actual, umbral=20):
+    """
+    Filas (endpoint, métrica, antes, ahora, cambio %, regresión) de las
+    métricas que importan: p95, rps y consultas por petición. Es regresión si
+    la latencia o las consultas suben, o los rps bajan, más de `umbral` %.
+    """
+    filas = []
+    for nombre, ahora in actual["endpoints"].items():
+        antes = base.get("endpoints", {}).get(nombre)
+        if not antes:
+            continue
+        for metrica, peor_si_sube in (("p95_ms", True), ("rps", False), ("consultas_media", True)):
+            a, b = antes.get(metrica), ahora.get(metrica)
+            if a is None or b is None:
+                continue
+            cambio = (b - a) / a * 100 if a else (0.0 if b == a else 100.0)
+            empeora = cambio > umbral if peor_si_sube else cambio < -umbral
+            if metrica == "consultas_media":
+                # las consultas no tienen ruido: cualquier consulta de más cuenta
+                empeora = b > a
+            filas.append((nombre, metrica, a, b, round(cambio, 1), empeora))
+    return filas
+
+
+def medir_serializacion(filas=10000, repeticiones=5):
+    """
+    Tiempo (ms, mejor de `repeticiones`) de armar el JSON de `filas` sesiones
+    con el serializer de DRF + JSONRenderer y con administrador/rapido.py +
+    JSONRapidoRenderer. Incluye la lectura de la BD; comprueba que el JSON
+    sea idéntico.
+    """
+    from rest_framework.renderers import JSONRenderer
+
+    from Educacion.renderers import JSONRapidoRenderer
+    from .rapido import plan_de
+    from .serializers import SeccionEstudioSerializer
+
+    qs = Sesiones_Estudios.objects.order_by("fecha", "hora_inicio", "id")[:filas]
+    plan = plan_de(SeccionEstudioSerializer)
+    caminos = {
+        "drf": lambda: JSONRenderer().render(SeccionEstudioSerializer(qs, many=True).data),
+        "rapido": lambda: JSONRapidoRenderer().render(plan.filas(qs.values_list(*plan.columnas))),
+    }
+
+    tiempos, salidas = {}, {}
+    for nombre, camino in caminos.items():
+        mejor = None
+        for _ in range(repeticiones):
+            inicio = time.perf_counter()
+            salidas[nombre] = camino()
+            transcurrido = time.perf_counter() - inicio
+            mejor = transcurrido if mejor is None else min(mejor, transcurrido)
+        tiempos[nombre] = round(mejor * 1000, 1)
+
+    return {
+        "filas": qs.count(),
+        "drf_ms": tiempos["drf"],
+        "rapido_ms": tiempos["rapido"],
+        "aceleracion": round(tiempos["drf"] / tiempos["rapido"], 1) if tiempos["rapido"] else None,
+        "identico": salidas["drf"] == salidas["rapido"],
+    }
+
+
+def guardar(resultado, ruta):
+    with open(ruta, "w", encoding="utf-8") as f:
+        json.dump(resultado, f, ensure_ascii=False, indent=2)
+
+
+def cargar(ruta):
+    with open(ruta, encoding="utf-8") as f:
+        return json.load(f)
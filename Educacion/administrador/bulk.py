@@ -0,0 +1,201 @@
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.decorators import action
+from rest_framework.response import Response
+
+from .serializers import precargar_relacionados
+from .signals import operacion_en_lote
+
+
+# ------------------------------
+# ENDPOINTS EN LOTE  (<recurso>/bulk/)
+# ------------------------------
+#   POST   [{...}, {...}]                 crea
+#   PATCH  [{"id": 1, ...}, ...]          actualiza parcialmente
+#   DELETE {"ids": [1, 2, ...]}           borra
+#
+# Todo va en una sola transacción: si algún elemento es inválido no se
+# escribe nada y se responde 400 con los errores por índice. Los ids de
+# las relaciones se validan con una consulta IN por modelo y las escrituras
+# usan bulk_create/bulk_update en lotes de ?batch_size= (BULK_BATCH_SIZE).
+# Las subclases reciben los cambios en los hooks despues_de_* para mantener
+# resúmenes y caches al día (las señales por fila se silencian).
+
+def _como_id(valor):
+    """El id como int (también "5"), o None si no es un entero."""
+    if isinstance(valor, bool):
+        return None
+    if isinstance(valor, int):
+        return valor
+    if isinstance(valor, str) and valor.isascii() and valor.isdigit():
+        return int(valor)
+    return None
+
+
+class OperacionesEnLoteMixin:
+
+    def validar_lote(self, objetos):
+        """
+        Reglas entre los elementos de un PATCH (ya validados uno a uno):
+        errores por objeto, {} si está bien.
+        """
+        return [{} for _ in objetos]
+
+    def despues_de_crear(self, objetos):
+        pass
+
+    def despues_de_actualizar(self, anteriores, objetos):
+        pass
+
+    def despues_de_borrar(self, objetos):
+        pass
+
+    def _tamano_lote(self):
+        defecto = getattr(settings, "BULK_BATCH_SIZE", 500)
+        try:
+            return max(1, int(self.request.query_params.get("batch_size", defecto)))
+        except ValueError:
+            return defecto
+
+    def _error_limite(self, items):
+        maximo = getattr(settings, "BULK_MAX_ITEMS", 5000)
+        if not isinstance(items, list) or not items:
+            return Response({"error": "Se esperaba una lista no vacía."}, status=status.HTTP_400_BAD_REQUEST)
+        if len(items) > maximo:
+            return Response({"error": f"Máximo {maximo} elementos por petición."},
+                            status=status.HTTP_400_BAD_REQUEST)
+        return None
+
+    @staticmethod
+    def _errores(errores):
+        # según la versión, DRF da los errores de many=True como lista o como {índice: errores}
+        pares = errores.items() if isinstance(errores, dict) else enumerate(errores)
+        return Response(
+            {"errores": [{"indice": i, "errores": e} for i, e in pares if e]},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+
+    @action(detail=False, methods=["post", "patch", "delete"], url_path="bulk")
+    def bulk(self, request):
+        if request.method == "POST":
+            return self._crear_en_lote(request.data)
+        if request.method == "PATCH":
+            return self._actualizar_en_lote(request.data)
+        return self._borrar_en_lote(request.data)
+
+    def _crear_en_lote(self, items):
+        error = self._error_limite(items)
+        if error:
+            return error
+
+        serializer = self.get_serializer(data=items, many=True)
+        if not serializer.is_valid():
+            return self._errores(serializer.errors)
+
+        modelo = self.get_queryset().model
+        objetos = [modelo(**datos) for datos in serializer.validated_data]
+
+        with transaction.atomic(), operacion_en_lote():
+            modelo.objects.bulk_create(objetos, batch_size=self._tamano_lote())
+            self.despues_de_crear(objetos)
+
+        respuesta = {"creados": len(objetos)}
+        # MySQL no devuelve los ids de un bulk_create
+        if all(o.pk for o in objetos):
+            respuesta["ids"] = [o.pk for o in objetos]
+        return Response(respuesta, status=status.HTTP_201_CREATED)
+
+    def _actualizar_en_lote(self, items):
+        error = self._error_limite(items)
+        if error:
+            return error
+
+        ids, errores = [], []
+        for item in items:
+            pk = _como_id(item.get("id")) if isinstance(item, dict) else None
+            ids.append(pk)
+            if not isinstance(item, dict):
+                errores.append({"non_field_errors": ["Se esperaba un objeto."]})
+            elif pk is None:
+                errores.append({"id": ["Debe ser un número entero."]})
+            else:
+                errores.append(None)
+        if any(errores):
+            return self._errores(errores)
+
+        modelo = self.get_queryset().model
+        contexto = self.get_serializer_context()
+        contexto["relacionados"] = precargar_relacionados(self.get_serializer(), items)
+        # lo que depende de otras filas se revisa para todo el lote en validar_lote()
+        contexto["en_lote"] = True
+
+        with transaction.atomic():
+            # filas bloqueadas hasta el commit: `anteriores` (lo que se descuenta
+            # de los resúmenes) no puede cambiar por debajo de nosotros
+            existentes = {
+                o.pk: o for o in modelo.objects.select_for_update().filter(pk__in=ids).order_by("pk")
+            }
+
+            errores, anteriores, objetos, campos, vistos = [], [], [], set(), set()
+            for pk, item in zip(ids, items):
+                obj = existentes.get(pk)
+                if obj is None:
+                    errores.append({"id": ["No existe."]})
+                    continue
+                # dos cambios al mismo objeto: el segundo pisaría al primero y los
+                # resúmenes contarían dos veces la diferencia
+                if pk in vistos:
+                    errores.append({"id": ["Repetido en el lote."]})
+                    continue
+                vistos.add(pk)
+                serializer = self.get_serializer_class()(obj, data=item, partial=True, context=contexto)
+                if not serializer.is_valid():
+                    errores.append(serializer.errors)
+                    continue
+                errores.append(None)
+                anteriores.append(modelo(**{f.attname: getattr(obj, f.attname) for f in modelo._meta.concrete_fields}))
+                for campo, valor in serializer.validated_data.items():
+                    setattr(obj, campo, valor)
+                    campos.add(campo)
+                objetos.append(obj)
+
+            if any(errores):
+                return self._errores(errores)
+            # sin errores, objetos[i] es items[i]
+            errores = self.validar_lote(objetos)
+            if any(errores):
+                return self._errores(errores)
+
+            if "updated_at" in {f.name for f in modelo._meta.fields}:
+                ahora = timezone.now()
+                for obj in objetos:
+                    obj.updated_at = ahora
+                campos.add("updated_at")
+
+            with operacion_en_lote():
+                if campos:
+                    modelo.objects.bulk_update(objetos, sorted(campos), batch_size=self._tamano_lote())
+                self.despues_de_actualizar(anteriores, objetos)
+
+        return Response({"actualizados": len(objetos)})
+
+    def _borrar_en_lote(self, data):
+        ids = data.get("ids") if isinstance(data, dict) else None
+        error = self._error_limite(ids)
+        if error:
+            return error
+
+        pks = [_como_id(i) for i in ids]
+        if None in pks:
+            return self._errores([None if pk is not None else {"ids": ["Debe ser un número entero."]} for pk in pks])
+
+        modelo = self.get_queryset().model
+        with transaction.atomic(), operacion_en_lote():
+            # bloqueadas: lo que se descuenta de los resúmenes es lo que se borra
+            objetos = list(modelo.objects.select_for_update().filter(pk__in=pks).order_by("pk"))
+            modelo.objects.filter(pk__in=[o.pk for o in objetos]).delete()
+            self.despues_de_borrar(objetos)
+
+        return Response({"borrados": len(objetos)})
@@ -0,0 +1,209 @@
+import re
+import unicodedata
+
+from django.db import connections, router
+from django.db.models import Q
+from django.utils.html import escape
+
+from .models import Materias, Planes
+
+
+# ------------------------------
+# BÚSQUEDA DE TEXTO COMPLETO  (/api/buscar/)
+# ------------------------------
+# Materias (Nombre + Notas) y Planes (Nombre + contenido) con un índice de
+# texto completo de la BD; la migración 0007 lo crea según el motor:
+#   - MySQL: índices FULLTEXT (InnoDB los mantiene en cada escritura).
+#   - SQLite: tablas FTS5 de contenido externo (materias_fts, planes_fts)
+#     que se mantienen con triggers, también para bulk_create y SQL directo.
+# Solo se leen las listas de coincidencias de los términos buscados, así
+# que el tiempo depende de cuántos documentos coinciden, no del tamaño de la
+# tabla. Todos los términos tienen que aparecer (como prefijo) y el Nombre
+# pesa más que el texto. Otros motores caen a icontains (sin índice).
+
+TIPOS = {
+    "materias": (Materias, "Notas"),
+    "planes": (Planes, "contenido"),
+}
+
+MAX_TERMINOS = 8
+PESO_NOMBRE = 10.0
+LARGO_FRAGMENTO = 200
+
+
+def _base(c):
+    # un carácter => su letra base en minúscula, sin acento (mismo largo)
+    base = unicodedata.normalize("NFKD", c.lower())
+    return base[0] if base else c
+
+
+def normalizar(texto):
+    return "".join(_base(c) for c in str(texto or ""))
+
+
+def terminos(consulta):
+    vistos = []
+    for t in re.findall(r"\w+", normalizar(consulta)):
+        if t not in vistos:
+            vistos.append(t)
+    return vistos[:MAX_TERMINOS]
+
+
+# -- motores ---------------------------------------------------------------------
+
+def _sqlite(modelo, lista, usuario_id, limite, cursor):
+    tabla_fts = f"{modelo._meta.model_name}_fts"
+    tabla = modelo._meta.db_table
+    consulta = " ".join(f'"{t}"*' for t in lista)
+    sql = (
+        f"SELECT t.id, -bm25({tabla_fts}, {PESO_NOMBRE}, 1.0) FROM {tabla_fts} "
+        f"JOIN {tabla} t ON t.id = {tabla_fts}.rowid WHERE {tabla_fts} MATCH %s"
+    )
+    params = [consulta]
+    if usuario_id is not None:
+        sql += " AND t.usuario_id = %s"
+        params.append(usuario_id)
+    sql += f" ORDER BY bm25({tabla_fts}, {PESO_NOMBRE}, 1.0) LIMIT %s"
+    cursor.execute(sql, params + [limite])
+    return cursor.fetchall()
+
+
+def _mysql(modelo, lista, usuario_id, limite, cursor):
+    _, campo_texto = TIPOS[modelo._meta.model_name]
+    q = cursor.db.ops.quote_name
+    tabla = q(modelo._meta.db_table)
+    nombre, texto = q("Nombre"), q(modelo._meta.get_field(campo_texto).column)
+    # InnoDB ignora términos más cortos que innodb_ft_min_token_size (3)
+    consulta = " ".join(f"+{t}*" for t in lista if len(t) >= 3)
+    if not consulta:
+        return []
+    sql = (
+        f"SELECT id, MATCH({nombre}) AGAINST (%s IN BOOLEAN MODE) * {PESO_NOMBRE} "
+        f"+ MATCH({nombre}, {texto}) AGAINST (%s IN BOOLEAN MODE) AS puntaje "
+        f"FROM {tabla} WHERE MATCH({nombre}, {texto}) AGAINST (%s IN BOOLEAN MODE)"
+    )
+    params = [consulta] * 3
+    if usuario_id is not None:
+        sql += " AND usuario_id = %s"
+        params.append(usuario_id)
+    sql += " ORDER BY puntaje DESC LIMIT %s"
+    cursor.execute(sql, params + [limite])
+    return cursor.fetchall()
+
+
+def _generico(modelo, lista, usuario_id, limite, alias):
+    _, campo_texto = TIPOS[modelo._meta.model_name]
+    qs = modelo.objects.using(alias)
+    for t in lista:
+        qs = qs.filter(Q(Nombre__icontains=t) | Q(**{f"{campo_texto}__icontains": t}))
+    if usuario_id is not None:
+        qs = qs.filter(Usuarios_id_id=usuario_id)
+    return [(pk, 1.0) for pk in qs.order_by("id").values_list("id", flat=True)[:limite]]
+
+
+MOTORES = {"sqlite": _sqlite, "mysql": _mysql}
+
+
+def _coincidencias(modelo, lista, usuario_id, limite):
+    alias = router.db_for_read(modelo)
+    conexion = connections[alias]
+    motor = MOTORES.get(conexion.vendor)
+    if motor is None:
+        return _generico(modelo, lista, usuario_id, limite, alias), alias
+    with conexion.cursor() as cursor:
+        return motor(modelo, lista, usuario_id, limite, cursor), alias
+
+
+# -- resaltado -------------------------------------------------------------------
+
+def _patron(lista):
+    return re.compile(r"\b(?:" + "|".join(re.escape(t) for t in sorted(lista, key=len, reverse=True)) + r")\w*")
+
+
+def resaltar(texto, lista, largo=None):
+    """
+    HTML escapado con <mark> en las palabras que empiezan por algún término
+    (sin distinguir mayúsculas ni acentos). Con `largo`, solo un fragmento
+    alrededor de la primera coincidencia.
+    """
+    texto = str(texto or "")
+    normal = normalizar(texto)
+    patron = _patron(lista)
+
+    inicio, fin = 0, len(texto)
+    if largo and len(texto) > largo:
+        primera = patron.search(normal)
+        centro = primera.start() if primera else 0
+        inicio = max(0, centro - largo // 4)
+        # empezar y terminar en un borde de palabra
+        if inicio:
+            espacio = texto.find(" ", inicio)
+            inicio = espacio + 1 if 0 <= espacio < centro else inicio
+        fin = min(len(texto), inicio + largo)
+        if fin < len(texto):
+            espacio = texto.rfind(" ", inicio, fin)
+            fin = espacio if espacio > inicio else fin
+
+    partes, cursor = [], inicio
+    for m in patron.finditer(normal, inicio, fin):
+        partes.append(escape(texto[cursor:m.start()]))
+        partes.append(f"<mark>{escape(texto[m.start():m.end()])}</mark>")
+        cursor = m.end()
+    partes.append(escape(texto[cursor:fin]))
+    return ("…" if inicio else "") + "".join(partes) + ("…" if fin < len(texto) else "")
+
+
+# -- búsqueda --------------------------------------------------------------------
+
+def buscar(consulta, tipos=None, usuario_id=None, desde=0, limite=20):
+    """
+    (resultados, hay_más). Cada tipo da sus mejores desde+limite+1
+    coincidencias y se mezclan por puntaje; solo se leen las filas de la
+    página para armar los fragmentos.
+    """
+    lista = terminos(consulta)
+    if not lista:
+        return [], False
+
+    candidatos = []
+    for tipo in tipos or TIPOS:
+        modelo, _ = TIPOS[tipo]
+        # los usuario_id solo filtran planes; las materias son de todos
+        filtro = usuario_id if modelo is Planes else None
+        filas, alias = _coincidencias(modelo, lista, filtro, desde + limite + 1)
+        candidatos += [(float(puntaje), tipo, pk, alias) for pk, puntaje in filas]
+
+    candidatos.sort(key=lambda c: (-c[0], c[1], c[2]))
+    pagina = candidatos[desde:desde + limite]
+
+    por_tipo = {}
+    for _, tipo, pk, alias in pagina:
+        por_tipo.setdefault((tipo, alias), []).append(pk)
+    objetos = {}
+    for (tipo, alias), ids in por_tipo.items():
+        modelo, campo_texto = TIPOS[tipo]
+        campos = ["id", "Nombre", campo_texto] + (["Usuarios_id"] if modelo is Planes else [])
+        for obj in modelo.objects.using(alias).only(*campos).filter(id__in=ids):
+            objetos[(tipo, obj.id)] = obj
+
+    resultados = []
+    for puntaje, tipo, pk, _ in pagina:
+        obj = objetos.get((tipo, pk))
+        if obj is None:  # se borró entre las dos consultas
+            continue
+        _, campo_texto = TIPOS[tipo]
+        resultado = {
+            "tipo": tipo,
+            "id": pk,
+            "nombre": obj.Nombre,
+            "puntaje": round(puntaje, 4),
+            "resaltado": {
+                "nombre": resaltar(obj.Nombre, lista),
+                "texto": resaltar(getattr(obj, campo_texto), lista, LARGO_FRAGMENTO),
+            },
+        }
+        if tipo == "planes":
+            resultado["usuario_id"] = obj.Usuarios_id_id
+        resultados.append(resultado)
+
+    return resultados, len(candidatos) > desde + limite
@@ -0,0 +1,108 @@
+import hashlib
+from functools import partial
+
+from django.conf import settings
+from django.core.cache import caches
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+from rest_framework.response import Response
+
+from . import versiones
+
+
+# ------------------------------
+# GET CONDICIONAL Y CACHE DE LISTADOS
+# ------------------------------
+# Cada tabla de catálogo (Materias, Planes) tiene una versión en la BD
+# (administrador/versiones.py) que sube en la misma transacción que la
+# modifica. Con la versión se arma el ETag de cada respuesta con una sola
+# consulta por clave primaria:
+#   - If-None-Match / If-Modified-Since que coinciden => 304, sin leer la
+#     tabla ni serializar.
+#   - Los listados completos se guardan en la cache bajo esa versión; al
+#     cambiar la tabla la versión cambia y las entradas viejas dejan de
+#     usarse (expiran por TTL). La cache puede ser la de cada proceso: la
+#     versión es la misma para todos.
+
+_PREFIJO = "api:catalogo"
+
+
+def _cache():
+    return caches[getattr(settings, "CATALOGO_CACHE_ALIAS", "default")]
+
+
+def versiones_tablas(modelos, using=None):
+    """[(clave, versión, última modificación en epoch o None)] en el orden de `modelos`."""
+    claves = [versiones.clave_tabla(m) for m in modelos]
+    leidas = versiones.leer(claves, using)
+    return [(clave, *leidas[clave]) for clave in claves]
+
+
+def version_tabla(modelo, using=None):
+    """(versión, última modificación en epoch o None)."""
+    _, version, modificado = versiones_tablas([modelo], using)[0]
+    return version, modificado
+
+
+def tabla_modificada(modelo):
+    """
+    Sube la versión de la tabla. Va en la transacción que escribe: la
+    versión nueva se ve recién cuando se confirma, junto con los datos.
+    """
+    versiones.incrementar([versiones.clave_tabla(modelo)])
+
+
+class RespuestaCondicionalMixin:
+    """
+    Para ModelViewSet: list() y retrieve() con ETag/Last-Modified y 304, y
+    list() servido desde la cache. `tablas_version` son los modelos cuyos
+    cambios afectan a la respuesta.
+    """
+    tablas_version = ()
+
+    def _validadores(self, request):
+        leidas = versiones_tablas(self.tablas_version)
+        huella = hashlib.sha1(
+            "|".join([
+                *(f"{clave}={v}" for clave, v, _ in leidas),
+                request.get_full_path(),
+                request.accepted_media_type or "",
+            ]).encode("utf-8")
+        ).hexdigest()[:20]
+        modificado = max((m for _, _, m in leidas if m), default=None)
+        return huella, modificado
+
+    def _condicional(self, request, generar, cachear):
+        huella, modificado = self._validadores(request)
+        etag = quote_etag(huella)
+
+        no_modificado = get_conditional_response(request, etag=etag, last_modified=modificado)
+        if no_modificado is not None:
+            return self._validadores_en(no_modificado, etag, modificado)
+
+        clave = f"{_PREFIJO}:respuesta:{huella}"
+        datos = _cache().get(clave) if cachear else None
+        if datos is None:
+            respuesta = generar()
+            if respuesta.status_code != 200:
+                return respuesta
+            datos = respuesta.data
+            if cachear:
+                _cache().set(clave, datos, getattr(settings, "CATALOGO_CACHE_TTL", 600))
+
+        return self._validadores_en(Response(datos), etag, modificado)
+
+    @staticmethod
+    def _validadores_en(respuesta, etag, modificado):
+        respuesta["ETag"] = etag
+        if modificado is not None:
+            respuesta["Last-Modified"] = http_date(modificado)
+        # el navegador guarda la respuesta pero pregunta siempre con If-None-Match
+        respuesta["Cache-Control"] = "no-cache"
+        return respuesta
+
+    def list(self, request, *args, **kwargs):
+        return self._condicional(request, partial(super().list, request, *args, **kwargs), cachear=True)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self._condicional(request, partial(super().retrieve, request, *args, **kwargs), cachear=False)
@@ -0,0 +1,64 @@
+from django.conf import settings
+from django.db.models.functions import Length, Substr
+from django.http import StreamingHttpResponse
+from django.utils.http import http_date
+from rest_framework.generics import get_object_or_404
+
+from .exportar import _TextoRenderer
+
+
+# ------------------------------
+# CONTENIDO DE UN PLAN EN STREAMING  (planes/<id>/contenido/)
+# ------------------------------
+# El texto sale tal cual (text/plain), sin JSON, leído de la BD en trozos de
+# PLANES_CONTENIDO_TROZO caracteres con SUBSTR: ni la vista ni el driver
+# tienen el texto completo en memoria. La primera consulta trae el largo,
+# updated_at y el primer trozo, así que un plan corto es una sola consulta.
+#
+# Cada trozo se pide con el updated_at leído al principio: si el plan se
+# guarda a mitad de la respuesta no se mezclan las dos versiones, se corta
+# la conexión (ContenidoCambiado) y el cliente ve una respuesta incompleta.
+#
+# En disco, `contenido` va comprimido en MySQL (migración 0008).
+
+class TextoRenderer(_TextoRenderer):
+    media_type = "text/plain"
+    format = "txt"
+
+
+class ContenidoCambiado(Exception):
+    pass
+
+
+def _trozo(inicio, tam):
+    return Substr("contenido", inicio, tam)
+
+
+def _trozos(queryset, primero, largo, tam):
+    yield primero
+    for inicio in range(tam + 1, largo + 1, tam):
+        trozo = queryset.annotate(trozo=_trozo(inicio, tam)).values_list("trozo", flat=True).first()
+        if trozo is None:
+            raise ContenidoCambiado(f"el plan cambió durante la descarga (desde el carácter {inicio})")
+        yield trozo
+
+
+def respuesta_contenido(queryset, pk):
+    """StreamingHttpResponse con el contenido del plan `pk` de `queryset`; 404 si no está."""
+    tam = getattr(settings, "PLANES_CONTENIDO_TROZO", 64 * 1024)
+    # la BD (réplica o primaria) se fija ahora: los trozos se leen ya fuera de la vista
+    queryset = queryset.using(queryset.db)
+    version, largo, primero = get_object_or_404(
+        queryset.annotate(largo=Length("contenido"), primero=_trozo(1, tam)).values_list(
+            "updated_at", "largo", "primero"
+        ),
+        pk=pk,
+    )
+
+    respuesta = StreamingHttpResponse(
+        _trozos(queryset.filter(pk=pk, updated_at=version), primero or "", largo or 0, tam),
+        content_type="text/plain; charset=utf-8",
+    )
+    respuesta["Last-Modified"] = http_date(version.timestamp())
+    respuesta["X-Accel-Buffering"] = "no"
+    return respuesta
@@ -0,0 +1,104 @@
+import re
+import unicodedata
+
+from .models import Disponibilidad_Usuarios
+
+
+# ------------------------------
+# DISPONIBILIDAD (día x periodo)
+# ------------------------------
+# Dias_Libres y periodo_prefencia siguen siendo texto libre en la API; al
+# guardar un usuario se traducen a filas de Disponibilidad_Usuarios, una por
+# franja libre. "¿Quién está libre el martes en la noche?" es entonces una
+# búsqueda en el índice (dia, periodo) en vez de leer y parsear a todos.
+#
+# Si el texto no nombra ningún día (o periodo) se toman todos: es lo mismo
+# que asume el planificador.
+
+DIAS = {"lunes": 0, "martes": 1, "miercoles": 2, "jueves": 3, "viernes": 4, "sabado": 5, "domingo": 6}
+PERIODOS = {"manana": 0, "tarde": 1, "noche": 2}
+
+# para mostrar, con acentos
+NOMBRES_DIAS = ["lunes", "martes", "miércoles", "jueves", "viernes", "sábado", "domingo"]
+NOMBRES_PERIODOS = ["mañana", "tarde", "noche"]
+
+
+def normalizar(texto):
+    texto = unicodedata.normalize("NFKD", str(texto or "").lower())
+    return "".join(c for c in texto if not unicodedata.combining(c))
+
+
+# "lunes a viernes", "de martes hasta jueves": rango inclusivo (puede cruzar
+# el domingo: "sábado a lunes" son sábado, domingo y lunes)
+_RANGO = re.compile(r"\b(%s)\s+(?:a|al|hasta)\s+(?:el\s+)?(%s)\b" % ("|".join(DIAS), "|".join(DIAS)))
+
+
+def dias_de_texto(texto):
+    """Días de la semana (0 = lunes) nombrados en el texto; todos si no hay ninguno."""
+    normal = normalizar(texto)
+    dias = {DIAS[p] for p in re.findall(r"[a-z]+", normal) if p in DIAS}
+    for desde, hasta in _RANGO.findall(normal):
+        inicio, fin = DIAS[desde], DIAS[hasta]
+        dias.update(d % 7 for d in range(inicio, inicio + (fin - inicio) % 7 + 1))
+    if re.search(r"\bentre\s+semana\b", normal):
+        dias.update(range(5))
+    if not dias and "fin" in normal and "semana" in normal:
+        dias = {5, 6}
+    return sorted(dias) or list(range(7))
+
+
+def periodos_de_texto(texto):
+    normal = normalizar(texto)
+    periodos = {p for nombre, p in PERIODOS.items() if nombre in normal}
+    return sorted(periodos) or list(PERIODOS.values())
+
+
+def franjas_de_texto(dias_libres, periodo_prefencia):
+    """[(dia, periodo)] libres según los dos campos de texto del usuario."""
+    return [(d, p) for d in dias_de_texto(dias_libres) for p in periodos_de_texto(periodo_prefencia)]
+
+
+def nombre_franja(franja):
+    dia, periodo = franja
+    return f"{NOMBRES_DIAS[dia]}-{NOMBRES_PERIODOS[periodo]}"
+
+
+def parsear_franja(texto):
+    """"martes-noche" (con o sin acentos) => (1, 2); ValueError si no se entiende."""
+    dia, _, periodo = normalizar(texto).strip().partition("-")
+    if dia not in DIAS or periodo not in PERIODOS:
+        raise ValueError(texto)
+    return DIAS[dia], PERIODOS[periodo]
+
+
+def filas_disponibilidad(usuario):
+    return [
+        Disponibilidad_Usuarios(Usuarios_id_id=usuario.id, dia=d, periodo=p)
+        for d, p in franjas_de_texto(usuario.Dias_Libres, usuario.periodo_prefencia)
+    ]
+
+
+def sincronizar(usuario):
+    """Deja las filas del usuario iguales a lo que dice su texto."""
+    deseadas = set(franjas_de_texto(usuario.Dias_Libres, usuario.periodo_prefencia))
+    actuales = {
+        (d, p): pk
+        for pk, d, p in Disponibilidad_Usuarios.objects.filter(Usuarios_id_id=usuario.id).values_list("id", "dia", "periodo")
+    }
+    sobran = [pk for franja, pk in actuales.items() if franja not in deseadas]
+    if sobran:
+        Disponibilidad_Usuarios.objects.filter(pk__in=sobran).delete()
+    faltan = deseadas - set(actuales)
+    if faltan:
+        Disponibilidad_Usuarios.objects.bulk_create([
+            Disponibilidad_Usuarios(Usuarios_id_id=usuario.id, dia=d, periodo=p) for d, p in sorted(faltan)
+        ])
+
+
+def filtrar_libres(queryset, franjas):
+    """Usuarios libres en todas las franjas: un semi-join por franja sobre el índice."""
+    for dia, periodo in franjas:
+        queryset = queryset.filter(
+            id__in=Disponibilidad_Usuarios.objects.filter(dia=dia, periodo=periodo).values("Usuarios_id")
+        )
+    return queryset
@@ -0,0 +1,184 @@
+import datetime
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db.models import Count, F, Q, Sum, Window
+from django.db.models.functions import RowNumber, TruncMonth, TruncWeek
+from django.utils import timezone
+
+from . import versiones
+from .models import Materias, Resumen_Estudios, Sesiones_Estudios
+
+
+# ------------------------------
+# ESTADÍSTICAS DE ESTUDIO POR USUARIO
+# ------------------------------
+# Todo se agrega en la BD (GROUP BY semana/mes/día, ventana ROW_NUMBER para
+# las rachas) y la respuesta se guarda en la cache bajo la versión de las
+# sesiones del usuario y la del catálogo de materias (administrador/
+# versiones.py). Las dos están en la BD y suben en la transacción que cambia
+# los datos (ver signals.py): valen para todos los workers y sobreviven a
+# que la cache expulse algo.
+#
+# Qué es incremental y qué no: lo que es por materia y por dificultad sale
+# de Resumen_Estudios, que se mantiene con deltas en cada escritura. Las
+# series semanal/mensual, las rachas y los totales no se actualizan con
+# deltas: se recalculan, con pocas consultas agregadas, solo para el
+# usuario cuya versión cambió y solo cuando alguien las pide.
+
+_PREFIJO = "api:estadisticas"
+
+
+def _cache():
+    return caches[getattr(settings, "ESTADISTICAS_CACHE_ALIAS", "default")]
+
+
+def estadisticas_usuario(usuario_id, semanas=12, meses=12, hoy=None):
+    hoy = hoy or timezone.localdate()
+    # la de Materias entra porque nombres y dificultades salen de ahí
+    clave_usuario, clave_materias = versiones.clave_usuario(usuario_id), versiones.clave_tabla(Materias)
+    leidas = versiones.leer([clave_usuario, clave_materias])
+    clave = (
+        f"{_PREFIJO}:{usuario_id}:{leidas[clave_usuario][0]}:{leidas[clave_materias][0]}"
+        f":{semanas}:{meses}:{hoy.isoformat()}"
+    )
+    datos = _cache().get(clave)
+    if datos is None:
+        datos = calcular_estadisticas(usuario_id, semanas, meses, hoy)
+        _cache().set(clave, datos, getattr(settings, "ESTADISTICAS_CACHE_TTL", 3600))
+    return datos
+
+
+def calcular_estadisticas(usuario_id, semanas=12, meses=12, hoy=None):
+    hoy = hoy or timezone.localdate()
+    sesiones = Sesiones_Estudios.objects.filter(Usuarios_id_id=usuario_id)
+
+    total = sesiones.aggregate(
+        minutos=Sum("duracion"),
+        sesiones=Count("id"),
+        completadas=Count("id", filter=Q(estado=True)),
+    )
+    total["minutos"] = total["minutos"] or 0
+    total["tasa_completado"] = round(total["completadas"] / total["sesiones"], 4) if total["sesiones"] else 0.0
+
+    return {
+        "usuario_id": usuario_id,
+        "total": total,
+        "semanal": _por_periodo(sesiones, TruncWeek, _inicio_semanas(hoy, semanas), _semanas(hoy, semanas)),
+        "mensual": _por_periodo(sesiones, TruncMonth, _inicio_meses(hoy, meses), _meses(hoy, meses)),
+        "racha": _rachas(sesiones, hoy),
+        "por_materia": _por_materia(usuario_id),
+        "por_dificultad": _por_dificultad(usuario_id),
+        "por_estado": {
+            "completadas": total["completadas"],
+            "pendientes": total["sesiones"] - total["completadas"],
+        },
+        "generado": timezone.now().isoformat(),
+    }
+
+
+# -- periodos --------------------------------------------------------------------
+
+def _inicio_semanas(hoy, n):
+    return hoy - datetime.timedelta(days=hoy.weekday()) - datetime.timedelta(weeks=n - 1)
+
+
+def _semanas(hoy, n):
+    inicio = _inicio_semanas(hoy, n)
+    return [inicio + datetime.timedelta(weeks=i) for i in range(n)]
+
+
+def _inicio_meses(hoy, n):
+    total = hoy.year * 12 + hoy.month - 1 - (n - 1)
+    return datetime.date(total // 12, total % 12 + 1, 1)
+
+
+def _meses(hoy, n):
+    inicio = _inicio_meses(hoy, n)
+    total = inicio.year * 12 + inicio.month - 1
+    return [datetime.date((total + i) // 12, (total + i) % 12 + 1, 1) for i in range(n)]
+
+
+def _por_periodo(sesiones, truncar, desde, periodos):
+    filas = (
+        sesiones.filter(fecha__gte=desde)
+        .annotate(periodo=truncar("fecha"))
+        .values("periodo")
+        .annotate(minutos=Sum("duracion"), sesiones=Count("id"))
+        .order_by("periodo")
+    )
+    por_periodo = {_fecha(f["periodo"]): f for f in filas}
+    # los periodos sin sesiones también salen, con 0
+    return [
+        {
+            "inicio": p.isoformat(),
+            "minutos": (por_periodo.get(p) or {}).get("minutos") or 0,
+            "sesiones": (por_periodo.get(p) or {}).get("sesiones") or 0,
+        }
+        for p in periodos
+    ]
+
+
+def _fecha(valor):
+    return valor.date() if isinstance(valor, datetime.datetime) else valor
+
+
+# -- rachas ----------------------------------------------------------------------
+
+def _rachas(sesiones, hoy):
+    """
+    Días seguidos con al menos una sesión. En la BD: un día por fila con su
+    ROW_NUMBER(); en una racha, fecha - número de fila es constante.
+    """
+    dias = (
+        sesiones.filter(fecha__isnull=False, fecha__lte=hoy)
+        .values("fecha")
+        .annotate(sesiones=Count("id"))  # GROUP BY fecha
+        .annotate(n=Window(RowNumber(), order_by=F("fecha").asc()))
+        .values_list("fecha", "n")
+        .order_by("fecha")
+    )
+
+    mas_larga = actual = 0
+    grupo_anterior = ultimo = None
+    for fecha, n in dias:
+        grupo = fecha.toordinal() - n
+        actual = actual + 1 if grupo == grupo_anterior else 1
+        mas_larga = max(mas_larga, actual)
+        grupo_anterior, ultimo = grupo, fecha
+
+    # la racha sigue viva si se estudió hoy o ayer
+    if ultimo is None or (hoy - ultimo).days > 1:
+        actual = 0
+    return {
+        "actual": actual,
+        "mas_larga": mas_larga,
+        "ultimo_dia": ultimo.isoformat() if ultimo else None,
+    }
+
+
+# -- distribución (desde Resumen_Estudios) -------------------------------------
+
+def _por_materia(usuario_id):
+    return [
+        {
+            "materia_id": r["Materias_id_id"],
+            "nombre": r["Materias_id__Nombre"],
+            "dificultad": r["Materias_id__Dificultad"],
+            "minutos": r["minutos"],
+            "sesiones": r["sesiones"],
+        }
+        for r in Resumen_Estudios.objects.filter(Usuarios_id_id=usuario_id)
+        .values("Materias_id_id", "Materias_id__Nombre", "Materias_id__Dificultad", "minutos", "sesiones")
+        .order_by("-minutos", "Materias_id_id")
+    ]
+
+
+def _por_dificultad(usuario_id):
+    return [
+        {"dificultad": r["Materias_id__Dificultad"], "minutos": r["minutos"], "sesiones": r["sesiones"]}
+        for r in Resumen_Estudios.objects.filter(Usuarios_id_id=usuario_id)
+        .values("Materias_id__Dificultad")
+        .annotate(minutos=Sum("minutos"), sesiones=Sum("sesiones"))
+        .order_by("-minutos", "Materias_id__Dificultad")
+    ]
@@ -0,0 +1,153 @@
+import csv
+import io
+import json
+
+from django.conf import settings
+from django.db.models import Q
+from django.http import StreamingHttpResponse
+from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
+from rest_framework.renderers import BaseRenderer, JSONRenderer
+
+
+# ------------------------------
+# EXPORTACIÓN EN STREAMING  (<recurso>/exportar/)
+# ------------------------------
+#   GET ?formato=csv|ndjson [&relacionados=0] + los filtros del listado
+#
+# Las filas se leen en bloques por keyset (WHERE (orden) > último ORDER BY
+# orden LIMIT n) y se van escribiendo en la respuesta: la memoria no depende
+# del número de filas. El orden es el id salvo que el recurso defina otro
+# (`orden_exportar` + `despues_de_exportar`), p. ej. el de su índice. No se usa un solo .iterator(): con MySQL el
+# driver carga el resultado completo en memoria aunque se pida por bloques.
+
+FORMATOS = {
+    "csv": "text/csv",
+    "ndjson": "application/x-ndjson",
+}
+
+
+class _TextoRenderer(BaseRenderer):
+    """Deja que DRF acepte el Accept del formato; los errores salen como JSON."""
+    charset = "utf-8"
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        return JSONRenderer().render(data)
+
+
+class CSVRenderer(_TextoRenderer):
+    media_type = FORMATOS["csv"]
+    format = "csv"
+
+
+class NDJSONRenderer(_TextoRenderer):
+    media_type = FORMATOS["ndjson"]
+    format = "ndjson"
+
+
+def _despues_del_pk(pk):
+    return Q(pk__gt=pk)
+
+
+def filas_por_bloques(queryset, campos, tam_bloque, orden=("pk",), despues_de=_despues_del_pk):
+    """`despues_de(*valores de orden de la última fila)` => Q de las filas siguientes."""
+    ultimo = None
+    while True:
+        bloque = queryset
+        if ultimo is not None:
+            bloque = bloque.filter(despues_de(*ultimo))
+        filas = list(bloque.order_by(*orden).values_list(*orden, *campos)[:tam_bloque])
+        if not filas:
+            return
+        ultimo = filas[-1][:len(orden)]
+        for fila in filas:
+            yield fila[len(orden):]
+        if len(filas) < tam_bloque:
+            return
+
+
+def _texto(valor):
+    if valor is None:
+        return ""
+    if hasattr(valor, "isoformat"):
+        return valor.isoformat()
+    return valor
+
+
+def _csv(columnas, filas, filas_por_trozo):
+    buffer = io.StringIO()
+    escritor = csv.writer(buffer)
+    escritor.writerow(columnas)
+    for i, fila in enumerate(filas, 1):
+        escritor.writerow([_texto(v) for v in fila])
+        # se agrupan filas para no mandar un trozo HTTP por fila
+        if i % filas_por_trozo == 0:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue()
+
+
+def _ndjson(columnas, filas, filas_por_trozo):
+    trozo = []
+    for fila in filas:
+        trozo.append(json.dumps(dict(zip(columnas, (_texto(v) for v in fila))), ensure_ascii=False))
+        if len(trozo) == filas_por_trozo:
+            yield "\n".join(trozo) + "\n"
+            trozo = []
+    if trozo:
+        yield "\n".join(trozo) + "\n"
+
+
+class ExportarMixin:
+    """
+    `columnas_exportar`: [(nombre de columna, campo para values_list)].
+    `columnas_relacionadas`: igual, pero con joins; se omiten con ?relacionados=0.
+    `orden_exportar` / `despues_de_exportar`: orden de las filas y su keyset.
+    """
+    columnas_exportar = ()
+    columnas_relacionadas = ()
+    nombre_exportar = "exportacion"
+    orden_exportar = ("pk",)
+    despues_de_exportar = staticmethod(_despues_del_pk)
+
+    def _formato(self, request):
+        formato = request.query_params.get("formato")
+        if formato is None:
+            formato = getattr(request.accepted_renderer, "format", None)
+            formato = formato if formato in FORMATOS else "csv"
+        if formato not in FORMATOS:
+            raise ValidationError({"formato": f"Usa uno de: {', '.join(FORMATOS)}."})
+        return formato
+
+    @action(detail=False, methods=["get"], url_path="exportar",
+            renderer_classes=[JSONRenderer, CSVRenderer, NDJSONRenderer])
+    def exportar(self, request):
+        formato = self._formato(request)
+        columnas = list(self.columnas_exportar)
+        if request.query_params.get("relacionados", "1").lower() not in ("0", "false"):
+            columnas += list(self.columnas_relacionadas)
+
+        queryset = self.filter_queryset(self.get_queryset())
+        # la BD (réplica o primaria) se fija ahora: las consultas se hacen
+        # mientras se envía la respuesta, ya fuera de la vista
+        queryset = queryset.using(queryset.db)
+
+        filas = filas_por_bloques(
+            queryset, [campo for _, campo in columnas], getattr(settings, "EXPORTAR_TAM_BLOQUE", 2000),
+            orden=self.orden_exportar, despues_de=self.despues_de_exportar,
+        )
+        generador = _csv if formato == "csv" else _ndjson
+        respuesta = StreamingHttpResponse(
+            generador([nombre for nombre, _ in columnas], filas, getattr(settings, "EXPORTAR_FILAS_POR_TROZO", 500)),
+            content_type=f"{FORMATOS[formato]}; charset=utf-8",
+        )
+        respuesta["Content-Disposition"] = f'attachment; filename="{self._nombre_archivo(request)}.{formato}"'
+        respuesta["X-Accel-Buffering"] = "no"
+        return respuesta
+
+    def _nombre_archivo(self, request):
+        usuario_id = request.query_params.get("usuario_id")
+        if usuario_id and usuario_id.isdigit():
+            return f"{self.nombre_exportar}_usuario_{usuario_id}"
+        return self.nombre_exportar
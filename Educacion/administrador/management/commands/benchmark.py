@@ -0,0 +1,71 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from administrador import benchmark
+
+
+class Command(BaseCommand):
+    help = (
+        "Mide throughput, latencia p50/p95/p99 y consultas por petición de cada endpoint "
+        "(con un Gemini falso). Usa antes generar_datos para tener volumen realista."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--peticiones", type=int, default=200, help="Peticiones por endpoint.")
+        parser.add_argument("--hilos", type=int, default=8)
+        parser.add_argument("--calentamiento", type=int, default=5)
+        parser.add_argument("--latencia-llm", type=int, default=300, help="Latencia del Gemini falso (ms).")
+        parser.add_argument("--endpoint", action="append", dest="endpoints",
+                            help="Solo este endpoint (se puede repetir), p.ej. secciones-lista.")
+        parser.add_argument("--semilla", type=int, default=42)
+        parser.add_argument("--salida", help="Guarda el resultado en este JSON.")
+        parser.add_argument("--comparar", help="JSON de una corrida anterior para comparar.")
+        parser.add_argument("--umbral", type=float, default=20,
+                            help="%% de empeoramiento de p95/rps que cuenta como regresión.")
+        parser.add_argument("--serializacion", type=int, metavar="FILAS",
+                            help="Solo compara serializer de DRF contra el camino rápido con FILAS sesiones.")
+
+    def handle(self, *args, **o):
+        if o["serializacion"]:
+            r = benchmark.medir_serializacion(o["serializacion"])
+            self.stdout.write(
+                f"{r['filas']} sesiones: DRF {r['drf_ms']} ms, rápido {r['rapido_ms']} ms "
+                f"(x{r['aceleracion']}), salida idéntica: {'sí' if r['identico'] else 'NO'}"
+            )
+            if not r["identico"]:
+                raise CommandError("El camino rápido no produce el mismo JSON.")
+            return
+
+        self.stdout.write(f"{'endpoint':<20} {'rps':>8} {'p50':>8} {'p95':>8} {'p99':>8} {'sql':>6} {'err':>5}")
+
+        def progreso(nombre, r):
+            self.stdout.write(
+                f"{nombre:<20} {r['rps']:>8} {r['p50_ms']:>8} {r['p95_ms']:>8} {r['p99_ms']:>8} "
+                f"{r['consultas_media']:>6} {r['errores']:>5}"
+            )
+
+        resultado = benchmark.ejecutar(
+            peticiones=o["peticiones"], hilos=o["hilos"], calentamiento=o["calentamiento"],
+            latencia_llm_ms=o["latencia_llm"], solo=o["endpoints"], semilla=o["semilla"],
+            progreso=progreso,
+        )
+
+        if o["salida"]:
+            benchmark.guardar(resultado, o["salida"])
+            self.stdout.write(f"Resultado guardado en {o['salida']}")
+
+        if not o["comparar"]:
+            return
+
+        base = benchmark.cargar(o["comparar"])
+        self.stdout.write(f"\nComparación con {base.get('commit') or o['comparar']}:")
+        if base.get("config") != resultado["config"] or base.get("datos") != resultado["datos"]:
+            self.stdout.write(self.style.WARNING("Aviso: la configuración o los datos no son los mismos."))
+        regresiones = 0
+        for nombre, metrica, antes, ahora, cambio, empeora in benchmark.comparar(base, resultado, o["umbral"]):
+            marca = "  <-- regresión" if empeora else ""
+            regresiones += empeora
+            self.stdout.write(f"{nombre:<20} {metrica:<16} {antes:>10} -> {ahora:<10} ({cambio:+}%){marca}")
+
+        if regresiones:
+            raise CommandError(f"{regresiones} métricas empeoraron más de lo permitido.")
+        self.stdout.write(self.style.SUCCESS("Sin regresiones."))
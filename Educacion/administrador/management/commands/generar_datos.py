@@ -0,0 +1,214 @@
+import datetime
+import random
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.utils import timezone
+
+from administrador import versiones
+from administrador.condicional import tabla_modificada
+from administrador.disponibilidad import filas_disponibilidad
+from administrador.models import (
+    Usuarios, Materias, Planes, Sesiones_Estudios, Resumen_Estudios, Disponibilidad_Usuarios
+)
+from administrador.resumen import recalcular_resumen
+from administrador.signals import operacion_en_lote
+
+PREFIJO = "bench-"
+
+NIVELES = ["secundaria", "bachillerato", "universidad", "maestría"]
+PERIODOS = ["mañana", "tarde", "noche"]
+DIAS = ["lunes", "martes", "miércoles", "jueves", "viernes", "sábado", "domingo"]
+DIFICULTADES = ["baja", "media", "alta"]
+TEMAS = [
+    "Cálculo", "Álgebra", "Física", "Química", "Biología", "Historia", "Geografía",
+    "Literatura", "Inglés", "Programación", "Estadística", "Economía", "Filosofía",
+    "Arte", "Música", "Derecho", "Contabilidad", "Redes", "Bases de datos", "Electrónica",
+]
+
+
+class Command(BaseCommand):
+    help = (
+        "Genera datos sintéticos reproducibles (misma --semilla => mismos datos) para "
+        "pruebas de carga. Todo lo generado empieza por 'bench-' y se borra con --borrar."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--usuarios", type=int, default=1000)
+        parser.add_argument("--materias", type=int, default=500)
+        parser.add_argument("--sesiones", type=int, default=100000)
+        parser.add_argument("--planes-por-usuario", type=int, default=2)
+        parser.add_argument("--materias-por-usuario", type=int, default=15,
+                            help="Cuántas materias distintas estudia cada usuario.")
+        parser.add_argument("--semilla", type=int, default=42)
+        parser.add_argument("--lote", type=int, default=5000, help="Tamaño de lote para bulk_create.")
+        parser.add_argument("--borrar", action="store_true", help="Borra los datos generados antes.")
+
+    def handle(self, *args, **o):
+        if o["borrar"]:
+            self.borrar()
+        elif Usuarios.objects.filter(Nombre__startswith=PREFIJO).exists():
+            raise CommandError("Ya hay datos generados; usa --borrar para regenerarlos.")
+
+        rnd = random.Random(o["semilla"])
+        lote = o["lote"]
+        inicio = time.monotonic()
+
+        materias = self.crear(Materias, (
+            Materias(
+                Nombre=f"{PREFIJO}{TEMAS[i % len(TEMAS)]} {i // len(TEMAS) + 1}",
+                Dificultad=rnd.choice(DIFICULTADES),
+                Notas=f"Temario de {TEMAS[i % len(TEMAS)].lower()} nivel {i // len(TEMAS) + 1}",
+            )
+            for i in range(o["materias"])
+        ), lote)
+
+        usuarios = self.crear(Usuarios, (
+            Usuarios(
+                Nombre=f"{PREFIJO}{i}",
+                Correo=f"{PREFIJO}{i}@ejemplo.com",
+                nivel_estudios=rnd.choice(NIVELES),
+                disponibilidad=rnd.random() < 0.8,
+                Dias_Libres=", ".join(rnd.sample(DIAS, 2)),
+                periodo_prefencia=rnd.choice(PERIODOS),
+            )
+            for i in range(o["usuarios"])
+        ), lote)
+
+        # bulk_create no pasa por la señal que llena las franjas libres
+        franjas = [
+            fila
+            for u in Usuarios.objects.filter(Nombre__startswith=PREFIJO).only("id", "Dias_Libres", "periodo_prefencia")
+            for fila in filas_disponibilidad(u)
+        ]
+        with transaction.atomic():
+            Disponibilidad_Usuarios.objects.bulk_create(franjas, batch_size=lote)
+
+        planes = self.crear(Planes, (
+            Planes(
+                Usuarios_id_id=u, Nombre=f"{PREFIJO}plan {j}",
+                contenido="Semana 1: repaso. Semana 2: ejercicios. " * 5,
+                fuente="generado", estado=j == 0,
+            )
+            for u in usuarios for j in range(o["planes_por_usuario"])
+        ), lote)
+
+        if not materias or not usuarios:
+            raise CommandError("Hacen falta al menos una materia y un usuario.")
+
+        por_usuario = min(o["materias_por_usuario"], len(materias))
+        elegidas = {u: rnd.sample(materias, por_usuario) for u in usuarios}
+        planes_de = {}
+        for i, p in enumerate(planes):
+            planes_de.setdefault(usuarios[i // o["planes_por_usuario"]], []).append(p)
+        hoy = datetime.date.today()
+
+        ahora = connection.ops.adapt_datetimefield_value(timezone.now())
+
+        def sesiones():
+            for i in range(o["sesiones"]):
+                u = rnd.choice(usuarios)
+                minutos_inicio = rnd.randrange(7 * 60, 22 * 60, 30)
+                yield (
+                    u,
+                    rnd.choice(elegidas[u]),
+                    rnd.choice(planes_de[u]) if u in planes_de and rnd.random() < 0.5 else None,
+                    f"{PREFIJO}sesión {i}",
+                    "Sesión generada",
+                    rnd.randrange(15, 181, 5),
+                    rnd.random() < 0.7,
+                    (hoy - datetime.timedelta(days=rnd.randrange(365))).isoformat(),
+                    f"{minutos_inicio // 60:02d}:{minutos_inicio % 60:02d}:00",
+                    ahora,
+                    ahora,
+                )
+
+        total = self.insertar(Sesiones_Estudios, [
+            "Usuarios_id", "Materias_id", "Planes_id", "Nombre", "descripcion", "duracion",
+            "estado", "fecha", "hora_inicio", "created_at", "updated_at",
+        ], sesiones(), lote)
+
+        # bulk_create no dispara señales: se reconstruye el resumen de una vez
+        filas = recalcular_resumen(usuarios)
+        versiones.incrementar(versiones.clave_usuario(u) for u in usuarios)
+        tabla_modificada(Materias)
+        tabla_modificada(Planes)
+
+        self.stdout.write(self.style.SUCCESS(
+            f"{len(usuarios)} usuarios ({len(franjas)} franjas libres), {len(materias)} materias, {len(planes)} planes, "
+            f"{total} sesiones, {filas} filas de resumen en {time.monotonic() - inicio:.1f}s"
+        ))
+
+    def crear(self, modelo, objetos, lote):
+        ids, total, bloque = [], 0, []
+
+        def guardar():
+            nonlocal total
+            with transaction.atomic():
+                creados = modelo.objects.bulk_create(bloque, batch_size=lote)
+            total += len(creados)
+            ids.extend(c.id for c in creados)
+            bloque.clear()
+
+        for obj in objetos:
+            bloque.append(obj)
+            if len(bloque) >= lote:
+                guardar()
+        if bloque:
+            guardar()
+        self.stdout.write(f"  {modelo.__name__}: {total}")
+
+        if total and not ids[0]:
+            # el motor no devuelve las pk en bulk_create (MySQL): se leen por nombre
+            ids = list(modelo.objects.filter(Nombre__startswith=PREFIJO).order_by("id").values_list("id", flat=True))
+        return ids
+
+    def insertar(self, modelo, campos, filas, lote):
+        """
+        INSERT con executemany para tablas de millones de filas: construir un
+        objeto del ORM por fila es más de la mitad del tiempo de bulk_create.
+        """
+        q = connection.ops.quote_name
+        columnas = ", ".join(q(modelo._meta.get_field(c).column) for c in campos)
+        sql = (f"INSERT INTO {q(modelo._meta.db_table)} ({columnas}) "
+               f"VALUES ({', '.join(['%s'] * len(campos))})")
+
+        total, bloque = 0, []
+        with connection.cursor() as cursor:
+            for fila in filas:
+                bloque.append(fila)
+                if len(bloque) >= lote:
+                    with transaction.atomic():
+                        cursor.executemany(sql, bloque)
+                    total += len(bloque)
+                    bloque.clear()
+            if bloque:
+                with transaction.atomic():
+                    cursor.executemany(sql, bloque)
+                total += len(bloque)
+        self.stdout.write(f"  {modelo.__name__}: {total}")
+        return total
+
+    def borrar(self):
+        # las sesiones se borran con SQL directo: con millones de filas el
+        # delete() del ORM las cargaría todas para mandar las señales por fila
+        q = connection.ops.quote_name
+        usuarios = f"SELECT id FROM {q(Usuarios._meta.db_table)} WHERE {q('Nombre')} LIKE %s"
+        materias = f"SELECT id FROM {q(Materias._meta.db_table)} WHERE {q('Nombre')} LIKE %s"
+        patron = PREFIJO + "%"
+
+        with transaction.atomic(), operacion_en_lote(), connection.cursor() as cursor:
+            borrados = 0
+            for modelo in (Sesiones_Estudios, Resumen_Estudios):
+                tabla = q(modelo._meta.db_table)
+                cursor.execute(
+                    f"DELETE FROM {tabla} WHERE {q(modelo._meta.get_field('Usuarios_id').column)} IN ({usuarios}) "
+                    f"OR {q(modelo._meta.get_field('Materias_id').column)} IN ({materias})",
+                    [patron, patron],
+                )
+                borrados += cursor.rowcount
+            # el resto (planes, recomendaciones) cae en cascada
+            borrados += Usuarios.objects.filter(Nombre__startswith=PREFIJO).delete()[0]
+            borrados += Materias.objects.filter(Nombre__startswith=PREFIJO).delete()[0]
+        self.stdout.write(f"Borradas {borrados} filas generadas.")
@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from administrador.resumen import recalcular_resumen, verificar_resumen
+
+
+class Command(BaseCommand):
+    help = "Reconstruye o verifica la tabla Resumen_Estudios a partir de Sesiones_Estudios."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--verificar", action="store_true", help="Solo compara, no escribe.")
+        parser.add_argument("--usuario", type=int, action="append", dest="usuarios",
+                            help="Limita a este usuario (se puede repetir).")
+        parser.add_argument("--lote", type=int, default=1000, help="Tamaño de lote para bulk_create.")
+
+    def handle(self, *args, **opciones):
+        usuarios = opciones["usuarios"]
+
+        if opciones["verificar"]:
+            diferencias = verificar_resumen(usuarios)
+            for d in diferencias[:50]:
+                self.stdout.write(
+                    f"usuario={d['usuario_id']} materia={d['materia_id']} "
+                    f"esperado={d['esperado']} guardado={d['guardado']}"
+                )
+            if diferencias:
+                raise CommandError(f"{len(diferencias)} filas del resumen no coinciden.")
+            self.stdout.write(self.style.SUCCESS("El resumen coincide con las sesiones."))
+            return
+
+        filas = recalcular_resumen(usuarios, tam_lote=opciones["lote"])
+        self.stdout.write(self.style.SUCCESS(f"Resumen reconstruido: {filas} filas."))
@@ -0,0 +1,55 @@
+# Generated by Django 5.2.18 on 2026-10-18 13:53
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count, Max, Sum
+
+
+def llenar_resumen(apps, schema_editor):
+    Sesiones_Estudios = apps.get_model('administrador', 'Sesiones_Estudios')
+    Resumen_Estudios = apps.get_model('administrador', 'Resumen_Estudios')
+
+    filas = (
+        Sesiones_Estudios.objects.values('Usuarios_id_id', 'Materias_id_id')
+        .annotate(minutos=Sum('duracion'), sesiones=Count('id'), ultima_fecha=Max('fecha'))
+        .order_by()
+    )
+    Resumen_Estudios.objects.bulk_create(
+        [
+            Resumen_Estudios(
+                Usuarios_id_id=f['Usuarios_id_id'],
+                Materias_id_id=f['Materias_id_id'],
+                minutos=f['minutos'] or 0,
+                sesiones=f['sesiones'],
+                ultima_fecha=f['ultima_fecha'],
+            )
+            for f in filas.iterator()
+        ],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('administrador', '0003_alter_sesiones_estudios_fecha_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Resumen_Estudios',
+            fields=[
+                ('id', models.AutoField(primary_key=True, serialize=False)),
+                ('minutos', models.IntegerField(default=0)),
+                ('sesiones', models.IntegerField(default=0)),
+                ('ultima_fecha', models.DateField(blank=True, null=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('Materias_id', models.ForeignKey(db_column='materia_id', on_delete=django.db.models.deletion.CASCADE, to='administrador.materias')),
+                ('Usuarios_id', models.ForeignKey(db_column='usuario_id', on_delete=django.db.models.deletion.CASCADE, to='administrador.usuarios')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('Usuarios_id', 'Materias_id'), name='resumen_usuario_materia_unico')],
+            },
+        ),
+        migrations.RunPython(llenar_resumen, migrations.RunPython.noop),
+    ]
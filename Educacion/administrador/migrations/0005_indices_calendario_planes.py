@@ -0,0 +1,25 @@
+# Generated by Django 5.2.18 on 2026-10-18 13:53
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('administrador', '0004_resumen_estudios'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='planes',
+            index=models.Index(fields=['Usuarios_id', 'estado'], name='plan_usuario_estado_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='sesiones_estudios',
+            index=models.Index(fields=['Usuarios_id', 'fecha', 'hora_inicio'], name='sesion_usuario_fecha_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='sesiones_estudios',
+            index=models.Index(fields=['fecha', 'hora_inicio'], name='sesion_fecha_hora_idx'),
+        ),
+    ]
@@ -0,0 +1,72 @@
+# Generated by Django 5.2.18 on 2026-10-18 14:28
+
+import re
+import unicodedata
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+# Copia congelada del parser de administrador/disponibilidad.py al momento de
+# esta migración; el módulo puede cambiar sin alterar lo que hace este paso.
+
+DIAS = {'lunes': 0, 'martes': 1, 'miercoles': 2, 'jueves': 3, 'viernes': 4, 'sabado': 5, 'domingo': 6}
+PERIODOS = {'manana': 0, 'tarde': 1, 'noche': 2}
+
+
+def normalizar(texto):
+    texto = unicodedata.normalize('NFKD', str(texto or '').lower())
+    return ''.join(c for c in texto if not unicodedata.combining(c))
+
+
+def franjas_de_texto(dias_libres, periodo_prefencia):
+    dias_normal = normalizar(dias_libres)
+    dias = {DIAS[p] for p in re.findall(r'[a-z]+', dias_normal) if p in DIAS}
+    if not dias and 'fin' in dias_normal and 'semana' in dias_normal:
+        dias = {5, 6}
+    periodos_normal = normalizar(periodo_prefencia)
+    periodos = {p for nombre, p in PERIODOS.items() if nombre in periodos_normal}
+    return [(d, p) for d in sorted(dias) or range(7) for p in sorted(periodos) or PERIODOS.values()]
+
+
+def llenar_disponibilidad(apps, schema_editor):
+    Usuarios = apps.get_model('administrador', 'Usuarios')
+    Disponibilidad_Usuarios = apps.get_model('administrador', 'Disponibilidad_Usuarios')
+
+    filas = (
+        Disponibilidad_Usuarios(Usuarios_id_id=u['id'], dia=d, periodo=p)
+        for u in Usuarios.objects.values('id', 'Dias_Libres', 'periodo_prefencia').iterator(chunk_size=2000)
+        for d, p in franjas_de_texto(u['Dias_Libres'], u['periodo_prefencia'])
+    )
+    bloque = []
+    for fila in filas:
+        bloque.append(fila)
+        if len(bloque) >= 5000:
+            Disponibilidad_Usuarios.objects.bulk_create(bloque)
+            bloque.clear()
+    if bloque:
+        Disponibilidad_Usuarios.objects.bulk_create(bloque)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('administrador', '0005_indices_calendario_planes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Disponibilidad_Usuarios',
+            fields=[
+                ('id', models.AutoField(primary_key=True, serialize=False)),
+                ('dia', models.PositiveSmallIntegerField()),
+                ('periodo', models.PositiveSmallIntegerField()),
+                ('Usuarios_id', models.ForeignKey(db_column='usuario_id', on_delete=django.db.models.deletion.CASCADE, related_name='franjas', to='administrador.usuarios')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['dia', 'periodo', 'Usuarios_id'], name='disponibilidad_franja_idx')],
+                'constraints': [models.UniqueConstraint(fields=('Usuarios_id', 'dia', 'periodo'), name='disponibilidad_usuario_franja_unico')],
+            },
+        ),
+        migrations.RunPython(llenar_disponibilidad, migrations.RunPython.noop),
+    ]
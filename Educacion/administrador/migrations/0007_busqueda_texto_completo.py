@@ -0,0 +1,73 @@
+from django.db import migrations
+
+
+# Índices de texto completo para /api/buscar/ (administrador/busqueda.py).
+# Dependen del motor: FULLTEXT en MySQL, FTS5 + triggers en SQLite.
+
+TABLAS = [
+    # (tabla, tabla fts, columna de texto)
+    ('administrador_materias', 'materias_fts', 'Notas'),
+    ('administrador_planes', 'planes_fts', 'contenido'),
+]
+
+
+def _sqlite(tabla, fts, texto):
+    columnas = f'"Nombre", "{texto}"'
+    nuevos = f'new."Nombre", new."{texto}"'
+    viejos = f'old."Nombre", old."{texto}"'
+    return [
+        # contenido externo: el índice no guarda otra copia del texto
+        f"CREATE VIRTUAL TABLE {fts} USING fts5({columnas}, content='{tabla}', content_rowid='id', "
+        f"tokenize='unicode61 remove_diacritics 2')",
+        f"INSERT INTO {fts}({fts}) VALUES ('rebuild')",
+        f"CREATE TRIGGER {fts}_ai AFTER INSERT ON {tabla} BEGIN "
+        f"INSERT INTO {fts}(rowid, {columnas}) VALUES (new.id, {nuevos}); END",
+        f"CREATE TRIGGER {fts}_ad AFTER DELETE ON {tabla} BEGIN "
+        f"INSERT INTO {fts}({fts}, rowid, {columnas}) VALUES ('delete', old.id, {viejos}); END",
+        # solo si cambia el texto, no en cada updated_at
+        f'CREATE TRIGGER {fts}_au AFTER UPDATE OF "Nombre", "{texto}" ON {tabla} BEGIN '
+        f"INSERT INTO {fts}({fts}, rowid, {columnas}) VALUES ('delete', old.id, {viejos}); "
+        f"INSERT INTO {fts}(rowid, {columnas}) VALUES (new.id, {nuevos}); END",
+    ]
+
+
+def _mysql(tabla, fts, texto):
+    return [
+        f"ALTER TABLE `{tabla}` ADD FULLTEXT INDEX `{fts}_nombre` (`Nombre`)",
+        f"ALTER TABLE `{tabla}` ADD FULLTEXT INDEX `{fts}_texto` (`Nombre`, `{texto}`)",
+    ]
+
+
+def crear_indices(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    for tabla, fts, texto in TABLAS:
+        if vendor == 'sqlite':
+            sentencias = _sqlite(tabla, fts, texto)
+        elif vendor == 'mysql':
+            sentencias = _mysql(tabla, fts, texto)
+        else:
+            return
+        for sql in sentencias:
+            schema_editor.execute(sql)
+
+
+def borrar_indices(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    for tabla, fts, texto in TABLAS:
+        if vendor == 'sqlite':
+            for sufijo in ('ai', 'ad', 'au'):
+                schema_editor.execute(f"DROP TRIGGER IF EXISTS {fts}_{sufijo}")
+            schema_editor.execute(f"DROP TABLE IF EXISTS {fts}")
+        elif vendor == 'mysql':
+            schema_editor.execute(f"ALTER TABLE `{tabla}` DROP INDEX `{fts}_nombre`, DROP INDEX `{fts}_texto`")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('administrador', '0006_disponibilidad_usuarios'),
+    ]
+
+    operations = [
+        migrations.RunPython(crear_indices, borrar_indices),
+    ]
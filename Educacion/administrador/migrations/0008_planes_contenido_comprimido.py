@@ -0,0 +1,37 @@
+from django.conf import settings
+from django.db import migrations
+
+
+# Planes.contenido comprimido en disco. En MySQL, ROW_FORMAT=COMPRESSED
+# comprime con zlib las páginas de la tabla, también las de los TEXT largos
+# que InnoDB guarda fuera de la fila, y el ALTER reescribe las filas que ya
+# existen. Las consultas no cambian y los índices FULLTEXT de /api/buscar/
+# (0007) siguen viendo el texto, cosa que no pasaría comprimiéndolo en Python.
+# SQLite no comprime tablas: ahí no se hace nada.
+# Con PLANES_CONTENIDO_COMPRIMIDO=0 la migración tampoco hace nada.
+
+TABLA = 'administrador_planes'
+KEY_BLOCK_SIZE = 8
+
+
+def comprimir(apps, schema_editor):
+    if schema_editor.connection.vendor != 'mysql' or not getattr(settings, 'PLANES_CONTENIDO_COMPRIMIDO', True):
+        return
+    schema_editor.execute(f"ALTER TABLE `{TABLA}` ROW_FORMAT=COMPRESSED KEY_BLOCK_SIZE={KEY_BLOCK_SIZE}")
+
+
+def descomprimir(apps, schema_editor):
+    if schema_editor.connection.vendor != 'mysql' or not getattr(settings, 'PLANES_CONTENIDO_COMPRIMIDO', True):
+        return
+    schema_editor.execute(f"ALTER TABLE `{TABLA}` ROW_FORMAT=DYNAMIC KEY_BLOCK_SIZE=0")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('administrador', '0007_busqueda_texto_completo'),
+    ]
+
+    operations = [
+        migrations.RunPython(comprimir, descomprimir),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 5.2.18 on 2026-10-18 14:54
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('administrador', '0008_planes_contenido_comprimido'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Versiones_Datos',
+            fields=[
+                ('clave', models.CharField(max_length=100, primary_key=True, serialize=False)),
+                ('version', models.BigIntegerField(default=0)),
+                ('modificado', models.BigIntegerField(default=0)),
+            ],
+        ),
+    ]
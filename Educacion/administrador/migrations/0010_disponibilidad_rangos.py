@@ -0,0 +1,74 @@
+# Generated by Django 5.2.18 on 2026-10-18 16:02
+
+import re
+import unicodedata
+
+from django.db import migrations
+
+
+# Copia congelada del parser de administrador/disponibilidad.py al momento de
+# esta migración: "lunes a viernes" y "entre semana" pasan a ser rangos. Solo
+# se reescriben los usuarios cuyo texto usa alguna de esas formas.
+
+DIAS = {'lunes': 0, 'martes': 1, 'miercoles': 2, 'jueves': 3, 'viernes': 4, 'sabado': 5, 'domingo': 6}
+PERIODOS = {'manana': 0, 'tarde': 1, 'noche': 2}
+RANGO = re.compile(r'\b(%s)\s+(?:a|al|hasta)\s+(?:el\s+)?(%s)\b' % ('|'.join(DIAS), '|'.join(DIAS)))
+ENTRE_SEMANA = re.compile(r'\bentre\s+semana\b')
+
+
+def normalizar(texto):
+    texto = unicodedata.normalize('NFKD', str(texto or '').lower())
+    return ''.join(c for c in texto if not unicodedata.combining(c))
+
+
+def dias_de_texto(normal):
+    dias = {DIAS[p] for p in re.findall(r'[a-z]+', normal) if p in DIAS}
+    for desde, hasta in RANGO.findall(normal):
+        inicio, fin = DIAS[desde], DIAS[hasta]
+        dias.update(d % 7 for d in range(inicio, inicio + (fin - inicio) % 7 + 1))
+    if ENTRE_SEMANA.search(normal):
+        dias.update(range(5))
+    if not dias and 'fin' in normal and 'semana' in normal:
+        dias = {5, 6}
+    return sorted(dias) or list(range(7))
+
+
+def periodos_de_texto(texto):
+    normal = normalizar(texto)
+    periodos = {p for nombre, p in PERIODOS.items() if nombre in normal}
+    return sorted(periodos) or list(PERIODOS.values())
+
+
+def corregir_rangos(apps, schema_editor):
+    Usuarios = apps.get_model('administrador', 'Usuarios')
+    Disponibilidad_Usuarios = apps.get_model('administrador', 'Disponibilidad_Usuarios')
+
+    def reescribir(bloque):
+        Disponibilidad_Usuarios.objects.filter(Usuarios_id_id__in=[u for u, _ in bloque]).delete()
+        Disponibilidad_Usuarios.objects.bulk_create([
+            Disponibilidad_Usuarios(Usuarios_id_id=u, dia=d, periodo=p) for u, franjas in bloque for d, p in franjas
+        ])
+
+    bloque = []
+    for u in Usuarios.objects.values('id', 'Dias_Libres', 'periodo_prefencia').iterator(chunk_size=2000):
+        normal = normalizar(u['Dias_Libres'])
+        if not (RANGO.search(normal) or ENTRE_SEMANA.search(normal)):
+            continue
+        franjas = [(d, p) for d in dias_de_texto(normal) for p in periodos_de_texto(u['periodo_prefencia'])]
+        bloque.append((u['id'], franjas))
+        if len(bloque) >= 500:
+            reescribir(bloque)
+            bloque.clear()
+    if bloque:
+        reescribir(bloque)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('administrador', '0009_versiones_datos'),
+    ]
+
+    operations = [
+        migrations.RunPython(corregir_rangos, migrations.RunPython.noop),
+    ]
@@ -43,6 +43,12 @@ class Planes(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        indexes = [
+            # ✅ planes de un usuario filtrados por estado
+            models.Index(fields=['Usuarios_id', 'estado'], name='plan_usuario_estado_idx'),
+        ]
+
     def __str__(self):
         return str(self.id)
 
@@ -82,6 +88,90 @@ class Sesiones_Estudios(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        indexes = [
+            # ✅ calendario: WHERE usuario_id = ? [AND fecha ...] ORDER BY fecha, hora_inicio
+            models.Index(fields=['Usuarios_id', 'fecha', 'hora_inicio'], name='sesion_usuario_fecha_idx'),
+            # ✅ mismo orden cuando se filtra solo por fecha
+            models.Index(fields=['fecha', 'hora_inicio'], name='sesion_fecha_hora_idx'),
+        ]
 
     def __str__(self):
         return str(self.id)
+
+
+class Resumen_Estudios(models.Model):
+    # ✅ total acumulado por usuario y materia; lo mantiene administrador/resumen.py
+    id = models.AutoField(primary_key=True)
+
+    Usuarios_id = models.ForeignKey(
+        Usuarios,
+        on_delete=models.CASCADE,
+        db_column='usuario_id'
+    )
+
+    Materias_id = models.ForeignKey(
+        Materias,
+        on_delete=models.CASCADE,
+        db_column='materia_id'
+    )
+
+    minutos = models.IntegerField(default=0)
+    sesiones = models.IntegerField(default=0)
+    ultima_fecha = models.DateField(null=True, blank=True)
+
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['Usuarios_id', 'Materias_id'],
+                name='resumen_usuario_materia_unico'
+            )
+        ]
+
+    def __str__(self):
+        return str(self.id)
+
+
+class Disponibilidad_Usuarios(models.Model):
+    # ✅ una fila por franja libre del usuario; la mantiene administrador/disponibilidad.py
+    # a partir de Dias_Libres y periodo_prefencia
+    id = models.AutoField(primary_key=True)
+
+    Usuarios_id = models.ForeignKey(
+        Usuarios,
+        on_delete=models.CASCADE,
+        db_column='usuario_id',
+        related_name='franjas'
+    )
+
+    dia = models.PositiveSmallIntegerField()  # 0 = lunes ... 6 = domingo
+    periodo = models.PositiveSmallIntegerField()  # 0 = mañana, 1 = tarde, 2 = noche
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['Usuarios_id', 'dia', 'periodo'],
+                name='disponibilidad_usuario_franja_unico'
+            )
+        ]
+        indexes = [
+            # ✅ ?libre=martes-noche => WHERE dia = ? AND periodo = ?
+            models.Index(fields=['dia', 'periodo', 'Usuarios_id'], name='disponibilidad_franja_idx'),
+        ]
+
+    def __str__(self):
+        return str(self.id)
+
+
+class Versiones_Datos(models.Model):
+    # ✅ contador de cambios por clave ("tabla:<db_table>", "usuario:<id>"); lo
+    # incrementa la misma transacción que escribe (administrador/versiones.py),
+    # así que todos los procesos ven la versión nueva justo al confirmarse
+    clave = models.CharField(max_length=100, primary_key=True)
+    version = models.BigIntegerField(default=0)
+    modificado = models.BigIntegerField(default=0)  # epoch en segundos (Last-Modified)
+
+    def __str__(self):
+        return f"{self.clave}={self.version}"
@@ -0,0 +1,115 @@
+import base64
+import datetime
+import json
+
+from django.conf import settings
+from django.db.models import Q
+from rest_framework.exceptions import ValidationError
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+# ------------------------------
+# PAGINACIÓN POR CURSOR (keyset)
+# ------------------------------
+# Ordena por (fecha, hora_inicio, id) y el cursor guarda los valores de la
+# última fila enviada; la página siguiente es un WHERE sobre esos valores,
+# así que cuesta lo mismo la página 1 que la 1000 (no hay OFFSET).
+# Solo se activa si el cliente manda ?page_size= o ?cursor=; sin ellos la
+# respuesta sigue siendo la lista completa de siempre.
+
+class SesionesCursorPagination(BasePagination):
+    cursor_query_param = "cursor"
+    page_size_query_param = "page_size"
+    ordering = ("fecha", "hora_inicio", "id")
+
+    def get_page_size(self, request):
+        defecto = getattr(settings, "SECCIONES_PAGE_SIZE", 100)
+        maximo = getattr(settings, "SECCIONES_MAX_PAGE_SIZE", 500)
+        try:
+            tamano = int(request.query_params.get(self.page_size_query_param, defecto))
+        except ValueError:
+            raise ValidationError({"page_size": "Debe ser un número entero."})
+        return max(1, min(tamano, maximo))
+
+    def paginate_queryset(self, queryset, request, view=None):
+        params = request.query_params
+        if self.cursor_query_param not in params and self.page_size_query_param not in params:
+            return None
+
+        self.request = request
+        self.page_size = self.get_page_size(request)
+
+        queryset = queryset.order_by(*self.ordering)
+        cursor = params.get(self.cursor_query_param)
+        if cursor:
+            queryset = queryset.filter(self.despues_de(*self.decodificar(cursor)))
+
+        filas = list(queryset[:self.page_size + 1])
+        self.hay_siguiente = len(filas) > self.page_size
+        filas = filas[:self.page_size]
+        self.siguiente = self.codificar(filas[-1]) if self.hay_siguiente else None
+        return filas
+
+    def get_paginated_response(self, data):
+        return Response({
+            "next": self.get_next_link(),
+            "next_cursor": self.siguiente,
+            "page_size": self.page_size,
+            "results": data,
+        })
+
+    def get_next_link(self):
+        if not self.siguiente:
+            return None
+        url = self.request.build_absolute_uri()
+        url = replace_query_param(url, self.page_size_query_param, self.page_size)
+        return replace_query_param(url, self.cursor_query_param, self.siguiente)
+
+    def get_previous_link(self):
+        return None
+
+    # -- cursor -----------------------------------------------------------
+
+    @staticmethod
+    def codificar(sesion) -> str:
+        # la fila puede ser un modelo o un dict de .values() (administrador/rapido.py)
+        if isinstance(sesion, dict):
+            fecha, hora, pk = sesion["fecha"], sesion["hora_inicio"], sesion["id"]
+        else:
+            fecha, hora, pk = sesion.fecha, sesion.hora_inicio, sesion.id
+        valores = [
+            fecha.isoformat() if fecha else None,
+            hora.isoformat() if hora else None,
+            pk,
+        ]
+        return base64.urlsafe_b64encode(json.dumps(valores).encode()).decode().rstrip("=")
+
+    @staticmethod
+    def decodificar(cursor: str):
+        try:
+            relleno = "=" * (-len(cursor) % 4)
+            fecha, hora, pk = json.loads(base64.urlsafe_b64decode(cursor + relleno))
+            return (
+                datetime.date.fromisoformat(fecha) if fecha else None,
+                datetime.time.fromisoformat(hora) if hora else None,
+                int(pk),
+            )
+        except (ValueError, TypeError):
+            raise ValidationError({"cursor": "Cursor inválido."})
+
+    @staticmethod
+    def despues_de(fecha, hora, pk) -> Q:
+        # MySQL y SQLite ordenan los NULL primero en ASC: una fila con NULL
+        # va antes que cualquier valor.
+        if hora is None:
+            misma_fecha = Q(hora_inicio__isnull=True, id__gt=pk) | Q(hora_inicio__isnull=False)
+        else:
+            misma_fecha = Q(hora_inicio__gt=hora) | Q(hora_inicio=hora, id__gt=pk)
+
+        if fecha is None:
+            return Q(fecha__isnull=True) & misma_fecha | Q(fecha__isnull=False)
+
+        # el fecha__gte extra deja al optimizador usar el índice como rango
+        return Q(fecha__gte=fecha) & (Q(fecha__gt=fecha) | Q(fecha=fecha) & misma_fecha)
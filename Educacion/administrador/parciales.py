@@ -0,0 +1,81 @@
+from rest_framework.exceptions import ValidationError
+
+from .rapido import plan_de
+
+
+# ------------------------------
+# CAMPOS PARCIALES  (?fields= / ?omit=)
+# ------------------------------
+#   GET /api/planes/?fields=id,Nombre,estado
+#   GET /api/planes/?omit=contenido
+#
+# En list y retrieve la respuesta lleva solo los campos pedidos y la
+# consulta solo lee sus columnas (.only()), así que un listado de planes
+# sin `contenido` no trae ese texto de la BD. Si algún campo pedido no se
+# sabe ligar a una columna (SerializerMethodField, source anidado) se leen
+# todas, como siempre. Los campos write_only no cambian: no salen en la
+# respuesta de todos modos.
+
+_legibles = {}
+
+
+def _lista(valor):
+    return [c.strip() for c in (valor or "").split(",") if c.strip()]
+
+
+def campos_legibles(serializer_class):
+    """Nombres de salida del serializer, en su orden."""
+    if serializer_class not in _legibles:
+        _legibles[serializer_class] = tuple(
+            nombre for nombre, campo in serializer_class().fields.items() if not campo.write_only
+        )
+    return _legibles[serializer_class]
+
+
+def columnas_de(serializer_class, campos, extra=()):
+    """Campos del modelo para .only(), o None si hay que leerlos todos."""
+    plan = plan_de(serializer_class, campos)
+    if plan is None or plan.metodos:
+        return None
+    meta = serializer_class.Meta.model._meta
+    columnas = [meta.get_field(c).name for c in plan.columnas]
+    return columnas + [c for c in extra if c not in columnas]
+
+
+class CamposParcialesMixin:
+    acciones_parciales = ("list", "retrieve")
+
+    def campos_pedidos(self):
+        """Tupla de campos de salida pedidos (en el orden del serializer), o None."""
+        if getattr(self, "action", None) not in self.acciones_parciales:
+            return None
+        params = self.request.query_params
+        incluir, omitir = _lista(params.get("fields")), _lista(params.get("omit"))
+        if not incluir and not omitir:
+            return None
+
+        legibles = campos_legibles(self.get_serializer_class())
+        for parametro, nombres in (("fields", incluir), ("omit", omitir)):
+            faltan = [n for n in nombres if n not in legibles]
+            if faltan:
+                raise ValidationError({parametro: f"No existen: {', '.join(faltan)}."})
+
+        return tuple(n for n in legibles if (not incluir or n in incluir) and n not in omitir)
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        campos = self.campos_pedidos()
+        if campos is None:
+            return queryset
+        # la paginación por cursor lee sus columnas de orden de cada fila
+        columnas = columnas_de(self.get_serializer_class(), campos, getattr(self.paginator, "ordering", ()))
+        return queryset if columnas is None else queryset.only(*columnas)
+
+    def get_serializer(self, *args, **kwargs):
+        serializer = super().get_serializer(*args, **kwargs)
+        campos = self.campos_pedidos()
+        if campos is not None:
+            destino = getattr(serializer, "child", serializer)
+            for nombre in [n for n, c in destino.fields.items() if not c.write_only and n not in campos]:
+                destino.fields.pop(nombre)
+        return serializer
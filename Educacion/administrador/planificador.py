@@ -0,0 +1,247 @@
+import bisect
+import datetime
+
+from django.conf import settings
+from django.db import transaction
+
+from .disponibilidad import dias_de_texto, normalizar
+from .models import Sesiones_Estudios, Usuarios
+from .resumen import aplicar_sesiones
+from .signals import operacion_en_lote, sesiones_cambiadas_en_lote
+
+
+# ------------------------------
+# ÍNDICE DE INTERVALOS (choques de horario)
+# ------------------------------
+# Por (usuario, fecha) se guardan las sesiones ordenadas por inicio, en
+# minutos desde medianoche, junto con el máximo acumulado de sus finales.
+# Para saber si [inicio, fin) choca basta un bisect: las sesiones que
+# empiezan antes de `fin` son un prefijo, y chocan si el mayor final de ese
+# prefijo pasa de `inicio`. Sirve aunque los datos viejos ya se solapen.
+
+class _Dia:
+    __slots__ = ("inicios", "fines", "ids", "fines_max")
+
+    def __init__(self, intervalos=()):
+        intervalos = sorted(intervalos)
+        self.inicios = [i for i, _, _ in intervalos]
+        self.fines = [f for _, f, _ in intervalos]
+        self.ids = [s for _, _, s in intervalos]
+        self.fines_max = []
+        self._recalcular(0)
+
+    def _recalcular(self, desde):
+        del self.fines_max[desde:]
+        maximo = self.fines_max[-1] if self.fines_max else 0
+        for fin in self.fines[desde:]:
+            maximo = max(maximo, fin)
+            self.fines_max.append(maximo)
+
+    def choque(self, inicio, fin):
+        """Id (o True si no tiene) de una sesión que se solapa con [inicio, fin), o None."""
+        i = bisect.bisect_left(self.inicios, fin)
+        if i == 0 or self.fines_max[i - 1] <= inicio:
+            return None
+        for j in range(i - 1, -1, -1):
+            if self.fines[j] > inicio:
+                return self.ids[j] if self.ids[j] is not None else True
+        return True
+
+    def fin_de_choques(self, fin):
+        """Mayor final entre las sesiones que empiezan antes de `fin`."""
+        i = bisect.bisect_left(self.inicios, fin)
+        return self.fines_max[i - 1] if i else 0
+
+    def agregar(self, inicio, fin, id_=None):
+        i = bisect.bisect_right(self.inicios, inicio)
+        self.inicios.insert(i, inicio)
+        self.fines.insert(i, fin)
+        self.ids.insert(i, id_)
+        self._recalcular(i)
+
+
+def _minutos(hora):
+    return hora.hour * 60 + hora.minute
+
+
+def _intervalo(hora_inicio, duracion):
+    inicio = _minutos(hora_inicio)
+    # las sesiones no pasan de medianoche
+    return inicio, min(inicio + max(duracion or 0, 0), 24 * 60)
+
+
+class IndiceHorario:
+
+    def __init__(self):
+        self._dias = {}
+
+    @classmethod
+    def cargar(cls, usuario_ids, desde=None, hasta=None, fechas=None, excluir=()):
+        """Una consulta para todas las sesiones con hora de esos usuarios (y fechas)."""
+        qs = Sesiones_Estudios.objects.filter(
+            Usuarios_id_id__in=list(usuario_ids), fecha__isnull=False, hora_inicio__isnull=False
+        )
+        if desde:
+            qs = qs.filter(fecha__gte=desde)
+        if hasta:
+            qs = qs.filter(fecha__lte=hasta)
+        if fechas is not None:
+            qs = qs.filter(fecha__in=list(fechas))
+        excluir = [pk for pk in excluir if pk]
+        if excluir:
+            qs = qs.exclude(pk__in=excluir)
+
+        por_dia = {}
+        for pk, usuario_id, fecha, hora, duracion in qs.values_list(
+            "id", "Usuarios_id_id", "fecha", "hora_inicio", "duracion"
+        ).order_by():
+            por_dia.setdefault((usuario_id, fecha), []).append((*_intervalo(hora, duracion), pk))
+
+        indice = cls()
+        indice._dias = {clave: _Dia(intervalos) for clave, intervalos in por_dia.items()}
+        return indice
+
+    def _dia(self, usuario_id, fecha):
+        return self._dias.get((usuario_id, fecha))
+
+    def choque(self, usuario_id, fecha, hora_inicio, duracion):
+        dia = self._dia(usuario_id, fecha)
+        return dia.choque(*_intervalo(hora_inicio, duracion)) if dia else None
+
+    def agregar(self, usuario_id, fecha, hora_inicio, duracion, id_=None):
+        inicio, fin = _intervalo(hora_inicio, duracion)
+        self._dias.setdefault((usuario_id, fecha), _Dia()).agregar(inicio, fin, id_)
+
+    def hueco(self, usuario_id, fecha, desde, hasta, duracion, margen=0, paso=5):
+        """
+        Primer minuto >= `desde` en el que cabe `duracion` (con `margen` libre
+        antes y después) sin pasar de `hasta`; None si no hay.
+        """
+        dia = self._dia(usuario_id, fecha)
+        inicio = desde
+        while inicio + duracion <= hasta:
+            if dia is None or dia.choque(inicio - margen, inicio + duracion + margen) is None:
+                return inicio
+            # saltar al final de lo que estorba, redondeado a `paso`
+            siguiente = dia.fin_de_choques(inicio + duracion + margen) + margen
+            inicio = max(inicio + paso, -(-siguiente // paso) * paso)
+        return None
+
+
+# ------------------------------
+# PLANIFICADOR DE SESIONES
+# ------------------------------
+# Reparte las materias de un plan en las semanas pedidas: cada materia
+# tiene sesiones por semana y duración según su Dificultad; van en los
+# Dias_Libres del usuario, dentro de la franja de su periodo_prefencia, en
+# el primer hueco libre según el índice. Primero las materias más
+# difíciles (eligen antes) y, dentro de la semana, en los días con menos
+# carga, sin repetir materia el mismo día.
+
+# (inicio, fin) en minutos desde medianoche
+FRANJAS = {
+    "manana": (8 * 60, 12 * 60),
+    "tarde": (14 * 60, 19 * 60),
+    "noche": (19 * 60, 23 * 60),
+}
+FRANJA_POR_DEFECTO = (8 * 60, 22 * 60)
+
+# (sesiones por semana, minutos por sesión)
+CARGA = {
+    "alta": (3, 90),
+    "media": (2, 60),
+    "baja": (1, 45),
+}
+CARGA_POR_DEFECTO = CARGA["media"]
+
+
+def franja(periodo):
+    normal = normalizar(periodo)
+    for nombre, rango in FRANJAS.items():
+        if nombre in normal:
+            return rango
+    return FRANJA_POR_DEFECTO
+
+
+def carga(dificultad):
+    normal = normalizar(dificultad)
+    for nombre, valor in CARGA.items():
+        if nombre in normal:
+            return valor
+    return CARGA_POR_DEFECTO
+
+
+def _hora(minutos):
+    return datetime.time(minutos // 60, minutos % 60)
+
+
+def planificar(plan, materias, desde, semanas, indice=None):
+    """
+    (sesiones sin guardar, pendientes). `pendientes` son las sesiones que
+    no cupieron: [{"materia_id", "semana"}].
+    """
+    usuario = plan.Usuarios_id
+    dias = dias_de_texto(usuario.Dias_Libres)
+    inicio_franja, fin_franja = franja(usuario.periodo_prefencia)
+    margen = getattr(settings, "PLANIFICADOR_DESCANSO_MIN", 10)
+    maximo_dia = getattr(settings, "PLANIFICADOR_MAX_MINUTOS_DIA", 240)
+    hasta = desde + datetime.timedelta(weeks=semanas, days=-1)
+
+    if indice is None:
+        indice = IndiceHorario.cargar([usuario.id], desde=desde, hasta=hasta)
+
+    # más difíciles primero; a igual carga, por id para que sea reproducible
+    materias = sorted(materias, key=lambda m: (-carga(m.Dificultad)[0] * carga(m.Dificultad)[1], m.id))
+    sesiones, pendientes, minutos_dia = [], [], {}
+
+    for semana in range(semanas):
+        lunes = desde + datetime.timedelta(weeks=semana)
+        fechas = [
+            f for f in (lunes + datetime.timedelta(days=d) for d in range(7))
+            if f.weekday() in dias and f <= hasta
+        ]
+        for materia in materias:
+            por_semana, duracion = carga(materia.Dificultad)
+            usadas = set()
+            for _ in range(por_semana):
+                colocada = False
+                for fecha in sorted(fechas, key=lambda f: (minutos_dia.get(f, 0), f)):
+                    if fecha in usadas or minutos_dia.get(fecha, 0) + duracion > maximo_dia:
+                        continue
+                    minuto = indice.hueco(usuario.id, fecha, inicio_franja, fin_franja, duracion, margen)
+                    if minuto is None:
+                        continue
+                    hora = _hora(minuto)
+                    indice.agregar(usuario.id, fecha, hora, duracion)
+                    minutos_dia[fecha] = minutos_dia.get(fecha, 0) + duracion
+                    usadas.add(fecha)
+                    sesiones.append(Sesiones_Estudios(
+                        Usuarios_id_id=usuario.id,
+                        Materias_id_id=materia.id,
+                        Planes_id_id=plan.id,
+                        Nombre=materia.Nombre,
+                        descripcion=f"Plan: {plan.Nombre}",
+                        duracion=duracion,
+                        estado=False,
+                        fecha=fecha,
+                        hora_inicio=hora,
+                    ))
+                    colocada = True
+                    break
+                if not colocada:
+                    pendientes.append({"materia_id": materia.id, "semana": semana + 1})
+
+    return sesiones, pendientes
+
+
+def programar(plan, materias, desde, semanas):
+    """planificar() y guardar todo en una transacción con un bulk_create."""
+    with transaction.atomic(), operacion_en_lote():
+        # el lock del usuario evita que dos planificaciones simultáneas se pisen
+        list(Usuarios.objects.select_for_update().filter(pk=plan.Usuarios_id_id).values_list("pk"))
+        sesiones, pendientes = planificar(plan, materias, desde, semanas)
+        Sesiones_Estudios.objects.bulk_create(sesiones, batch_size=getattr(settings, "BULK_BATCH_SIZE", 500))
+        aplicar_sesiones(sesiones, 1)
+
+        sesiones_cambiadas_en_lote.send(sender=Sesiones_Estudios, usuario_ids={plan.Usuarios_id_id})
+    return sesiones, pendientes
@@ -0,0 +1,185 @@
+import operator
+from types import SimpleNamespace
+
+from django.conf import settings
+from django.core.exceptions import FieldDoesNotExist
+from django.db import models
+from django.utils import timezone
+from rest_framework import ISO_8601, serializers
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+
+
+# ------------------------------
+# LISTADOS SIN SERIALIZER POR FILA
+# ------------------------------
+# En un GET de lista, DRF crea una instancia del modelo por fila y llama al
+# to_representation de cada campo. Aquí, una vez por clase de serializer, se
+# "compila" la lista de campos a leer (columnas de .values_list()) y cómo
+# convertir cada valor, y las filas se arman directamente desde las tuplas.
+# La salida es la misma que la del serializer: mismos campos, mismo orden,
+# mismos formatos. Si un serializer tiene un campo que no se sabe compilar
+# (source anidado, relaciones anidadas, ...), se usa el camino normal.
+#
+# Una columna que sale en varios campos (Usuarios_id y usuario_id de las
+# sesiones) se lee una sola vez.
+
+class _Plan:
+    def __init__(self, columnas, campos, metodos, orden):
+        self.columnas = columnas  # attnames para values_list()
+        self.campos = campos      # [(nombre, índice de columna, conversión o None)]
+        self.metodos = metodos    # [(nombre, función(obj))]
+        self.orden = orden        # nombres de salida en el orden del serializer
+
+    def filas(self, tuplas):
+        # la zona horaria se resuelve una vez por respuesta, no por valor
+        campos = [
+            (nombre, i, conv.preparar() if isinstance(conv, _FechaHora) else conv)
+            for nombre, i, conv in self.campos
+        ]
+        metodos, columnas, orden = self.metodos, self.columnas, self.orden
+
+        def fila(valores):
+            salida = {
+                nombre: valores[i] if conv is None or valores[i] is None else conv(valores[i])
+                for nombre, i, conv in campos
+            }
+            if metodos:
+                obj = SimpleNamespace(**dict(zip(columnas, valores)))
+                for nombre, metodo in metodos:
+                    salida[nombre] = metodo(obj)
+                salida = {nombre: salida[nombre] for nombre in orden}
+            return salida
+
+        return [fila(v) for v in tuplas]
+
+
+class _FechaHora:
+    """DateTimeField.to_representation con ISO 8601, sin buscar la zona horaria en cada valor."""
+
+    def __init__(self, campo):
+        self.campo = campo
+
+    def preparar(self):
+        campo = self.campo
+        zona = getattr(campo, "timezone", None) or (timezone.get_current_timezone() if settings.USE_TZ else None)
+
+        def convertir(valor):
+            if zona is None or timezone.is_naive(valor):
+                return campo.to_representation(valor)
+            texto = valor.astimezone(zona).isoformat()
+            return texto[:-6] + "Z" if texto.endswith("+00:00") else texto
+
+        return convertir
+
+
+def _formato(campo, defecto):
+    formato = getattr(campo, "format", defecto)
+    return formato.lower() if isinstance(formato, str) else formato
+
+
+_TEXTO = (models.CharField, models.TextField)
+_ENTERO = (models.IntegerField, models.AutoField, models.BigAutoField, models.SmallIntegerField)
+
+
+def _conversion(campo, campo_modelo):
+    """None = el valor de la BD ya es la salida; False = no se sabe compilar."""
+    if isinstance(campo, serializers.PrimaryKeyRelatedField):
+        # sin pk_field la salida es el pk tal cual (lo que hay en la columna FK)
+        return None if campo.pk_field is None and campo_modelo.is_relation else False
+    if campo_modelo.is_relation:
+        return False
+    if isinstance(campo, serializers.BooleanField):
+        return None if isinstance(campo_modelo, models.BooleanField) else False
+    if isinstance(campo, serializers.DateTimeField):
+        if _formato(campo, api_settings.DATETIME_FORMAT) == ISO_8601:
+            return _FechaHora(campo)
+        return campo.to_representation
+    if isinstance(campo, (serializers.DateField, serializers.TimeField)):
+        defecto = api_settings.DATE_FORMAT if isinstance(campo, serializers.DateField) else api_settings.TIME_FORMAT
+        if _formato(campo, defecto) == ISO_8601:
+            return operator.methodcaller("isoformat")
+        return campo.to_representation
+    if isinstance(campo, serializers.IntegerField):
+        return None if isinstance(campo_modelo, _ENTERO) else int
+    if isinstance(campo, serializers.CharField):
+        return None if isinstance(campo_modelo, _TEXTO) else str
+    if type(campo) is serializers.ReadOnlyField:
+        return None
+    return False
+
+
+def compilar(serializer_class, solo=None):
+    """
+    _Plan para la clase de serializer, o None si algún campo no se puede
+    compilar. Con `solo` (nombres de salida), únicamente esos campos.
+    """
+    serializer = serializer_class()
+    modelo = serializer.Meta.model
+    columnas, campos, metodos, orden = [], [], [], []
+
+    def columna(attname):
+        if attname not in columnas:
+            columnas.append(attname)
+        return columnas.index(attname)
+
+    for nombre, campo in serializer.fields.items():
+        if campo.write_only or (solo is not None and nombre not in solo):
+            continue
+        orden.append(nombre)
+
+        if isinstance(campo, serializers.SerializerMethodField):
+            metodos.append((nombre, getattr(serializer, campo.method_name)))
+            continue
+        if len(campo.source_attrs) != 1:
+            return None
+        try:
+            campo_modelo = modelo._meta.get_field(campo.source_attrs[0])
+        except FieldDoesNotExist:
+            return None
+        attname = campo_modelo.attname
+        if campo_modelo.is_relation and campo.source_attrs[0] == attname:
+            # source="Usuarios_id_id": el valor es la columna, no el objeto
+            campo_modelo = campo_modelo.target_field
+        conv = _conversion(campo, campo_modelo)
+        if conv is False:
+            return None
+        campos.append((nombre, columna(attname), conv))
+
+    if metodos:
+        # los métodos reciben un objeto con todas las columnas del modelo
+        for f in modelo._meta.concrete_fields:
+            columna(f.attname)
+
+    return _Plan(columnas, campos, metodos, orden)
+
+
+_planes = {}
+
+
+def plan_de(serializer_class, campos=None):
+    clave = (serializer_class, campos)
+    if clave not in _planes:
+        _planes[clave] = compilar(serializer_class, campos)
+    return _planes[clave]
+
+
+class ListadoRapidoMixin:
+    """list() con plan_de(serializer); misma respuesta que ModelViewSet.list()."""
+
+    def list(self, request, *args, **kwargs):
+        # ?fields= / ?omit= (administrador/parciales.py)
+        campos = self.campos_pedidos() if hasattr(self, "campos_pedidos") else None
+        plan = plan_de(self.get_serializer_class(), campos)
+        if plan is None:
+            return super().list(request, *args, **kwargs)
+
+        queryset = self.filter_queryset(self.get_queryset())
+        # la paginación por cursor necesita dicts (con sus columnas de orden) para leer la posición
+        orden = [c for c in getattr(self.paginator, "ordering", ()) if c not in plan.columnas]
+        pagina = self.paginate_queryset(queryset.values(*plan.columnas, *orden))
+        if pagina is not None:
+            datos = plan.filas([tuple(f[c] for c in plan.columnas) for f in pagina])
+            return self.get_paginated_response(datos)
+
+        return Response(plan.filas(queryset.values_list(*plan.columnas)))
@@ -0,0 +1,129 @@
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Max, Q, Sum
+
+from .models import Resumen_Estudios, Sesiones_Estudios
+
+
+# ------------------------------
+# RESUMEN DE ESTUDIO (usuario x materia)
+# ------------------------------
+# Se actualiza con deltas cada vez que cambia una sesión (ver signals.py).
+# Los caminos que no disparan señales (bulk_create, queryset.update) deben
+# llamar a aplicar_sesiones() o recalcular_resumen() después de escribir.
+
+def aplicar_delta(usuario_id, materia_id, minutos, sesiones, fecha=None):
+    if not usuario_id or not materia_id:
+        return
+
+    filtro = Resumen_Estudios.objects.filter(Usuarios_id_id=usuario_id, Materias_id_id=materia_id)
+    cambios = {"minutos": F("minutos") + minutos, "sesiones": F("sesiones") + sesiones}
+
+    if filtro.update(**cambios) == 0:
+        if sesiones <= 0:
+            return
+        try:
+            with transaction.atomic():
+                Resumen_Estudios.objects.create(
+                    Usuarios_id_id=usuario_id,
+                    Materias_id_id=materia_id,
+                    minutos=minutos,
+                    sesiones=sesiones,
+                    ultima_fecha=fecha,
+                )
+            return
+        except IntegrityError:
+            # otro proceso creó la fila primero
+            filtro.update(**cambios)
+
+    if sesiones > 0 and fecha:
+        filtro.filter(Q(ultima_fecha__lt=fecha) | Q(ultima_fecha__isnull=True)).update(ultima_fecha=fecha)
+    elif sesiones < 0:
+        filtro.filter(sesiones__lte=0).delete()
+        if fecha:
+            # solo hace falta recalcular si se quitó la sesión más reciente
+            for resumen in filtro.filter(ultima_fecha=fecha):
+                resumen.ultima_fecha = Sesiones_Estudios.objects.filter(
+                    Usuarios_id_id=usuario_id, Materias_id_id=materia_id
+                ).aggregate(ultima=Max("fecha"))["ultima"]
+                resumen.save(update_fields=["ultima_fecha", "updated_at"])
+
+
+def aplicar_sesiones(sesiones, signo=1):
+    """Suma (signo=1) o resta (signo=-1) un lote de sesiones al resumen."""
+    grupos = {}
+    for s in sesiones:
+        clave = (s.Usuarios_id_id, s.Materias_id_id)
+        minutos, cantidad, fecha = grupos.get(clave, (0, 0, None))
+        if s.fecha and (fecha is None or s.fecha > fecha):
+            fecha = s.fecha
+        grupos[clave] = (minutos + (s.duracion or 0), cantidad + 1, fecha)
+
+    for (usuario_id, materia_id), (minutos, cantidad, fecha) in grupos.items():
+        aplicar_delta(usuario_id, materia_id, signo * minutos, signo * cantidad, fecha)
+
+
+def calcular_resumen(usuario_ids=None):
+    """Agrega desde cero sobre Sesiones_Estudios: {(usuario, materia): (minutos, sesiones, fecha)}"""
+    qs = Sesiones_Estudios.objects.all()
+    if usuario_ids is not None:
+        qs = qs.filter(Usuarios_id_id__in=usuario_ids)
+
+    filas = (
+        qs.values("Usuarios_id_id", "Materias_id_id")
+        .annotate(minutos=Sum("duracion"), sesiones=Count("id"), ultima_fecha=Max("fecha"))
+        .order_by()
+    )
+    return {
+        (f["Usuarios_id_id"], f["Materias_id_id"]): (f["minutos"] or 0, f["sesiones"], f["ultima_fecha"])
+        for f in filas
+    }
+
+
+@transaction.atomic
+def recalcular_resumen(usuario_ids=None, tam_lote=1000):
+    """Reconstruye el resumen (de todos o de algunos usuarios)."""
+    calculado = calcular_resumen(usuario_ids)
+
+    existentes = Resumen_Estudios.objects.all()
+    if usuario_ids is not None:
+        existentes = existentes.filter(Usuarios_id_id__in=usuario_ids)
+    existentes.delete()
+
+    Resumen_Estudios.objects.bulk_create(
+        [
+            Resumen_Estudios(
+                Usuarios_id_id=usuario_id,
+                Materias_id_id=materia_id,
+                minutos=minutos,
+                sesiones=sesiones,
+                ultima_fecha=fecha,
+            )
+            for (usuario_id, materia_id), (minutos, sesiones, fecha) in calculado.items()
+        ],
+        batch_size=tam_lote,
+    )
+    return len(calculado)
+
+
+def verificar_resumen(usuario_ids=None):
+    """Devuelve la lista de diferencias entre el resumen guardado y el real."""
+    calculado = calcular_resumen(usuario_ids)
+
+    guardado_qs = Resumen_Estudios.objects.all()
+    if usuario_ids is not None:
+        guardado_qs = guardado_qs.filter(Usuarios_id_id__in=usuario_ids)
+    guardado = {
+        (r["Usuarios_id_id"], r["Materias_id_id"]): (r["minutos"], r["sesiones"], r["ultima_fecha"])
+        for r in guardado_qs.values("Usuarios_id_id", "Materias_id_id", "minutos", "sesiones", "ultima_fecha")
+    }
+
+    diferencias = []
+    for clave in sorted(set(calculado) | set(guardado)):
+        if calculado.get(clave) != guardado.get(clave):
+            diferencias.append({
+                "usuario_id": clave[0],
+                "materia_id": clave[1],
+                "esperado": calculado.get(clave),
+                "guardado": guardado.get(clave),
+            })
+    return diferencias
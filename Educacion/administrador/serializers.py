@@ -1,15 +1,81 @@
 from rest_framework import serializers
 from .models import Usuarios, Materias, Planes, Sesiones_Estudios
+from .disponibilidad import franjas_de_texto, nombre_franja
+from .planificador import IndiceHorario
+
+
+# ------------------------------
+# RELACIONES SIN CONSULTA POR FILA
+# ------------------------------
+class IdRelacionadoField(serializers.PrimaryKeyRelatedField):
+    """
+    Igual que PrimaryKeyRelatedField, pero si RelacionadosListSerializer ya
+    precargó los ids del lote (context["relacionados"]) no hace un SELECT
+    por cada fila.
+    """
+
+    def to_internal_value(self, data):
+        precargados = self.context.get("relacionados", {}).get(self.get_queryset().model)
+        if precargados is None:
+            return super().to_internal_value(data)
+
+        try:
+            if isinstance(data, bool):
+                raise TypeError
+            pk = int(data)
+        except (TypeError, ValueError):
+            self.fail("incorrect_type", data_type=type(data).__name__)
+
+        obj = precargados.get(pk)
+        if obj is None:
+            self.fail("does_not_exist", pk_value=data)
+        return obj
+
+
+def precargar_relacionados(serializer, items):
+    """Una consulta IN por modelo relacionado para todo el lote."""
+    relacionados = {}
+    for nombre, campo in serializer.fields.items():
+        if not isinstance(campo, IdRelacionadoField) or campo.read_only:
+            continue
+        ids = set()
+        for item in items:
+            valor = item.get(nombre) if isinstance(item, dict) else None
+            if valor is None or isinstance(valor, bool):
+                continue
+            try:
+                ids.add(int(valor))
+            except (TypeError, ValueError):
+                pass
+        queryset = campo.get_queryset()
+        precargados = relacionados.setdefault(queryset.model, {})
+        if ids:
+            precargados.update(queryset.only("pk").in_bulk(ids))
+    return relacionados
+
+
+class RelacionadosListSerializer(serializers.ListSerializer):
+    def to_internal_value(self, data):
+        if isinstance(data, list):
+            self._context["relacionados"] = precargar_relacionados(self.child, data)
+        return super().to_internal_value(data)
 
 
 # ------------------------------
 # USUARIOS
 # ------------------------------
 class UsuariosSerializer(serializers.ModelSerializer):
+    # ✅ Dias_Libres/periodo_prefencia siguen igual; esto es lo que se entendió de ellos
+    # (lo mismo que hay en Disponibilidad_Usuarios), calculado sin consultar
+    franjas = serializers.SerializerMethodField()
+
     class Meta:
         model = Usuarios
         fields = "__all__"
 
+    def get_franjas(self, obj):
+        return [nombre_franja(f) for f in franjas_de_texto(obj.Dias_Libres, obj.periodo_prefencia)]
+
 
 # ------------------------------
 # MATERIAS
@@ -25,15 +91,16 @@ class MateriasSerializer(serializers.ModelSerializer):
 # ------------------------------
 class PlanesSerializer(serializers.ModelSerializer):
     # ✅ NO uses source="Usuarios_id" porque es redundante y truena
-    Usuarios_id = serializers.PrimaryKeyRelatedField(
+    Usuarios_id = IdRelacionadoField(
         queryset=Usuarios.objects.all(),
         write_only=True
     )
 
     # para mostrar algo legible al hacer GET
-    usuario = serializers.StringRelatedField(
+    # ✅ str(Usuarios) es su id: se lee directo de la FK, sin cargar el usuario
+    usuario = serializers.CharField(
         read_only=True,
-        source="Usuarios_id"
+        source="Usuarios_id_id"
     )
 
     class Meta:
@@ -45,16 +112,62 @@ class PlanesSerializer(serializers.ModelSerializer):
             "estado",
             "created_at", "updated_at"
         ]
+        list_serializer_class = RelacionadosListSerializer
 
 
 # ------------------------------
 # SESIONES DE ESTUDIO
 # ------------------------------
+def _mensaje_choque(choque):
+    if choque is True:
+        return "Se solapa con otra sesión del mismo lote."
+    return f"Se solapa con la sesión {choque} del usuario."
+
+
+def choques_del_lote(filas, excluir=()):
+    """
+    Errores por fila ({} si no choca) para [(usuario_id, fecha, hora_inicio,
+    duracion)], contra la BD y contra las filas anteriores del mismo lote,
+    con un solo índice. `excluir`: ids de sesiones que el lote reemplaza.
+    """
+    con_hora = [f for f in filas if f[1] and f[2]]
+    if not con_hora:
+        return [{} for _ in filas]
+
+    indice = IndiceHorario.cargar(
+        {f[0] for f in con_hora}, fechas={f[1] for f in con_hora}, excluir=excluir
+    )
+    errores = []
+    for fila in filas:
+        error = {}
+        if fila[1] and fila[2]:
+            choque = indice.choque(*fila)
+            if choque is None:
+                indice.agregar(*fila)
+            else:
+                error = {"hora_inicio": [_mensaje_choque(choque)]}
+        errores.append(error)
+    return errores
+
+
+class SesionesListSerializer(RelacionadosListSerializer):
+    """Revisa los choques de horario de todo el lote con un solo índice (una consulta)."""
+
+    def to_internal_value(self, data):
+        validados = super().to_internal_value(data)
+        errores = choques_del_lote([
+            (v["Usuarios_id"].pk, v.get("fecha"), v.get("hora_inicio"), v["duracion"]) for v in validados
+        ])
+        if any(errores):
+            raise serializers.ValidationError(errores)
+        return validados
+
+
 class SeccionEstudioSerializer(serializers.ModelSerializer):
     # ✅ que se pueda escribir y también leer (NO write_only)
-    Usuarios_id = serializers.PrimaryKeyRelatedField(queryset=Usuarios.objects.all())
-    Materias_id = serializers.PrimaryKeyRelatedField(queryset=Materias.objects.all())
-    Planes_id = serializers.PrimaryKeyRelatedField(
+    Usuarios_id = IdRelacionadoField(queryset=Usuarios.objects.all())
+    Materias_id = IdRelacionadoField(queryset=Materias.objects.all())
+    Planes_id = IdRelacionadoField(
         queryset=Planes.objects.all(),
         required=False,
         allow_null=True
@@ -68,6 +181,27 @@ class SeccionEstudioSerializer(serializers.ModelSerializer):
     class Meta:
         model = Sesiones_Estudios
         fields = "__all__"
+        list_serializer_class = SesionesListSerializer
+
+    def validate(self, attrs):
+        # ✅ con many=True los choques los revisa SesionesListSerializer de una vez,
+        # y en el PATCH en lote, validar_lote() de la vista
+        if isinstance(self.parent, serializers.ListSerializer) or self.context.get("en_lote"):
+            return attrs
+
+        def valor(campo):
+            if campo in attrs:
+                return attrs[campo]
+            return getattr(self.instance, campo, None)
+
+        fecha, hora_inicio, usuario = valor("fecha"), valor("hora_inicio"), valor("Usuarios_id")
+        if fecha and hora_inicio and usuario:
+            pk = getattr(self.instance, "pk", None)
+            indice = IndiceHorario.cargar([usuario.pk], fechas=[fecha], excluir=[pk])
+            choque = indice.choque(usuario.pk, fecha, hora_inicio, valor("duracion"))
+            if choque is not None:
+                raise serializers.ValidationError({"hora_inicio": _mensaje_choque(choque)})
+        return attrs
 
 
 # ✅ Alias por si en views.py lo importaron con otro nombre
@@ -0,0 +1,127 @@
+import contextlib
+import contextvars
+
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import Signal, receiver
+
+from . import versiones
+from .condicional import tabla_modificada
+from .disponibilidad import sincronizar
+from .models import Materias, Planes, Sesiones_Estudios, Usuarios
+from .resumen import aplicar_delta
+
+
+# ------------------------------
+# OPERACIONES EN LOTE
+# ------------------------------
+# Dentro de operacion_en_lote() las señales por fila no hacen nada: quien
+# hace el bulk actualiza el resumen de una vez y manda una de estas señales
+# para que el resto (p.ej. la cache de inteligencia) se entere. Se mandan
+# dentro de la transacción del bulk: las versiones suben junto con los datos.
+sesiones_cambiadas_en_lote = Signal()  # kwargs: usuario_ids
+materias_cambiadas_en_lote = Signal()  # kwargs: materia_ids
+
+_en_lote = contextvars.ContextVar("en_lote", default=False)
+
+
+@contextlib.contextmanager
+def operacion_en_lote():
+    token = _en_lote.set(True)
+    try:
+        yield
+    finally:
+        _en_lote.reset(token)
+
+
+def en_lote() -> bool:
+    return _en_lote.get()
+
+
+def _valores(sesion):
+    return (sesion.Usuarios_id_id, sesion.Materias_id_id, sesion.duracion or 0, sesion.fecha)
+
+
+@receiver(pre_save, sender=Sesiones_Estudios)
+def guardar_valores_anteriores(sender, instance, raw=False, **kwargs):
+    instance._resumen_anterior = None
+    if raw or en_lote() or instance.pk is None:
+        return
+    anterior = (
+        Sesiones_Estudios.objects.filter(pk=instance.pk)
+        .values_list("Usuarios_id_id", "Materias_id_id", "duracion", "fecha")
+        .first()
+    )
+    if anterior:
+        instance._resumen_anterior = (anterior[0], anterior[1], anterior[2] or 0, anterior[3])
+
+
+@receiver(post_save, sender=Sesiones_Estudios)
+def actualizar_resumen(sender, instance, created, raw=False, **kwargs):
+    if raw or en_lote():
+        return
+    anterior = getattr(instance, "_resumen_anterior", None)
+    actual = _valores(instance)
+
+    if anterior == actual:
+        return
+    if anterior:
+        usuario_id, materia_id, minutos, fecha = anterior
+        aplicar_delta(usuario_id, materia_id, -minutos, -1, fecha)
+
+    usuario_id, materia_id, minutos, fecha = actual
+    aplicar_delta(usuario_id, materia_id, minutos, 1, fecha)
+
+
+@receiver(post_delete, sender=Sesiones_Estudios)
+def descontar_resumen(sender, instance, **kwargs):
+    if en_lote():
+        return
+    usuario_id, materia_id, minutos, fecha = _valores(instance)
+    aplicar_delta(usuario_id, materia_id, -minutos, -1, fecha)
+
+
+# ------------------------------
+# VERSIÓN DE LAS TABLAS DE CATÁLOGO (ETag / cache de listados)
+# ------------------------------
+@receiver([post_save, post_delete], sender=Materias)
+@receiver([post_save, post_delete], sender=Planes)
+def marcar_catalogo_modificado(sender, **kwargs):
+    # también dentro de operacion_en_lote(): es un UPDATE de una fila en la misma transacción
+    tabla_modificada(sender)
+
+
+@receiver(materias_cambiadas_en_lote)
+def marcar_materias_modificadas(sender, **kwargs):
+    tabla_modificada(Materias)
+
+
+# ------------------------------
+# VERSIÓN DE LAS SESIONES DE CADA USUARIO (recomendaciones y estadísticas)
+# ------------------------------
+def _usuarios_de(instance):
+    anterior = getattr(instance, "_resumen_anterior", None)
+    return {u for u in (instance.Usuarios_id_id, anterior[0] if anterior else None) if u}
+
+
+@receiver([post_save, post_delete], sender=Sesiones_Estudios)
+def versionar_sesiones(sender, instance, **kwargs):
+    # en la transacción que guarda: la versión nueva se ve al confirmarse
+    if not en_lote():
+        versiones.incrementar(versiones.clave_usuario(u) for u in _usuarios_de(instance))
+
+
+@receiver(sesiones_cambiadas_en_lote)
+def versionar_sesiones_lote(sender, usuario_ids, **kwargs):
+    versiones.incrementar(versiones.clave_usuario(u) for u in usuario_ids if u)
+
+
+# ------------------------------
+# DISPONIBILIDAD (franjas día x periodo)
+# ------------------------------
+@receiver(post_save, sender=Usuarios)
+def actualizar_disponibilidad(sender, instance, raw=False, update_fields=None, **kwargs):
+    if raw or en_lote():
+        return
+    if update_fields is not None and not {"Dias_Libres", "periodo_prefencia"} & set(update_fields):
+        return
+    sincronizar(instance)
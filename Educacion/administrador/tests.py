@@ -1,3 +1,1236 @@
-from django.test import TestCase
+import csv
+import datetime
+import io
+import json
+import time
+import unittest
+from unittest import mock
 
-# Create your tests here.
+from django.core.cache import caches
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.db.models import QuerySet
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, TestCase
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from Educacion import metricas, replicas
+
+from . import benchmark, versiones
+from .disponibilidad import dias_de_texto
+from .models import Usuarios, Materias, Planes, Sesiones_Estudios, Disponibilidad_Usuarios, Resumen_Estudios
+from .planificador import IndiceHorario, planificar
+from .resumen import verificar_resumen
+from .serializers import SeccionEstudioSerializer
+from .views import (
+    UsuariosViewSet,
+    MateriasViewSet,
+    PlanesViewSet,
+    Sesiones_EstudiosViewSet
+)
+
+
+# ------------------------------
+# RESUMEN DE ESTUDIO (usuario x materia)
+# ------------------------------
+class ResumenEstudiosTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.ana, cls.beto = Usuarios.objects.bulk_create([
+            Usuarios(Nombre=n, Correo=f"{n}@x.com", nivel_estudios="uni", Dias_Libres="lunes",
+                     periodo_prefencia="tarde")
+            for n in ("ana", "beto")
+        ])
+        cls.fisica, cls.arte = Materias.objects.bulk_create([
+            Materias(Nombre="Física", Dificultad="alta", Notas="n"),
+            Materias(Nombre="Arte", Dificultad="baja", Notas="n"),
+        ])
+
+    def sesion(self, usuario, materia, duracion, dia):
+        return Sesiones_Estudios.objects.create(
+            Usuarios_id=usuario, Materias_id=materia, Nombre="s", descripcion="d",
+            duracion=duracion, fecha=datetime.date(2026, 3, dia),
+        )
+
+    def resumen(self):
+        return {
+            (r.Usuarios_id_id, r.Materias_id_id): (r.minutos, r.sesiones, r.ultima_fecha.day)
+            for r in Resumen_Estudios.objects.all()
+        }
+
+    def test_deltas_al_crear_editar_y_borrar(self):
+        primera = self.sesion(self.ana, self.fisica, 30, 1)
+        segunda = self.sesion(self.ana, self.fisica, 20, 5)
+        self.assertEqual(self.resumen(), {(self.ana.id, self.fisica.id): (50, 2, 5)})
+
+        # cambiar de materia mueve los minutos de una fila a otra
+        segunda.Materias_id = self.arte
+        segunda.duracion = 45
+        segunda.save()
+        self.assertEqual(self.resumen(), {
+            (self.ana.id, self.fisica.id): (30, 1, 1),
+            (self.ana.id, self.arte.id): (45, 1, 5),
+        })
+
+        # y de usuario también
+        primera.Usuarios_id = self.beto
+        primera.save()
+        self.assertEqual(self.resumen(), {
+            (self.ana.id, self.arte.id): (45, 1, 5),
+            (self.beto.id, self.fisica.id): (30, 1, 1),
+        })
+
+        # borrar la sesión más reciente recalcula la última fecha; la fila vacía se borra
+        self.sesion(self.ana, self.arte, 10, 2)
+        segunda.delete()
+        self.assertEqual(self.resumen()[(self.ana.id, self.arte.id)], (10, 1, 2))
+        primera.delete()
+        self.assertNotIn((self.beto.id, self.fisica.id), self.resumen())
+        self.assertEqual(verificar_resumen(), [])
+
+    def test_verificar_y_reconstruir(self):
+        self.sesion(self.ana, self.fisica, 30, 1)
+        self.sesion(self.beto, self.arte, 15, 2)
+        # caminos sin señales: el resumen queda desfasado hasta reconstruirlo
+        Sesiones_Estudios.objects.filter(Usuarios_id=self.ana).update(duracion=60)
+        Resumen_Estudios.objects.filter(Usuarios_id=self.beto).delete()
+
+        diferencias = verificar_resumen()
+        self.assertEqual(
+            [(d["usuario_id"], d["esperado"][:2], d["guardado"] and d["guardado"][:2]) for d in diferencias],
+            [(self.ana.id, (60, 1), (30, 1)), (self.beto.id, (15, 1), None)],
+        )
+        self.assertEqual(verificar_resumen([self.beto.id]), diferencias[1:])
+
+        salida = io.StringIO()
+        with self.assertRaisesMessage(CommandError, "2 filas del resumen no coinciden"):
+            call_command("resumen_estudios", "--verificar", stdout=salida)
+
+        call_command("resumen_estudios", "--usuario", str(self.ana.id), stdout=salida)
+        self.assertEqual(len(verificar_resumen()), 1)
+        call_command("resumen_estudios", stdout=salida)
+        self.assertEqual(verificar_resumen(), [])
+        call_command("resumen_estudios", "--verificar", stdout=salida)
+        self.assertIn("El resumen coincide", salida.getvalue())
+
+
+# ------------------------------
+# PLANES DE CONSULTA (EXPLAIN)
+# ------------------------------
+def explicar(qs):
+    """Devuelve los problemas del plan: full scan o filesort."""
+    sql, params = qs.query.sql_with_params()
+    problemas = []
+
+    with connection.cursor() as cursor:
+        if connection.vendor == "sqlite":
+            cursor.execute("EXPLAIN QUERY PLAN " + sql, params)
+            for fila in cursor.fetchall():
+                detalle = fila[-1]
+                if detalle.startswith("SCAN ") and "USING" not in detalle:
+                    problemas.append(detalle)
+                if "TEMP B-TREE" in detalle:
+                    problemas.append(detalle)
+        elif connection.vendor == "mysql":
+            cursor.execute("EXPLAIN " + sql, params)
+            columnas = [c[0] for c in cursor.description]
+            for fila in cursor.fetchall():
+                fila = dict(zip(columnas, fila))
+                if fila.get("type") == "ALL":
+                    problemas.append(f"full scan en {fila.get('table')}")
+                if "filesort" in (fila.get("Extra") or ""):
+                    problemas.append(f"filesort en {fila.get('table')}")
+        else:
+            raise unittest.SkipTest(f"EXPLAIN no soportado para {connection.vendor}")
+
+    return problemas
+
+
+class PlanesDeConsultaTests(TestCase):
+    factory = APIRequestFactory()
+
+    @classmethod
+    def setUpTestData(cls):
+        usuarios = Usuarios.objects.bulk_create([
+            Usuarios(Nombre=f"u{i}", Correo=f"u{i}@x.com", nivel_estudios="uni",
+                     Dias_Libres="lunes", periodo_prefencia="tarde")
+            for i in range(20)
+        ])
+        materias = Materias.objects.bulk_create([
+            Materias(Nombre=f"m{i}", Dificultad="media", Notas="")
+            for i in range(10)
+        ])
+        Planes.objects.bulk_create([
+            Planes(Usuarios_id=u, Nombre="plan", contenido="", fuente="ia", estado=i % 2 == 0)
+            for i, u in enumerate(usuarios)
+        ])
+        inicio = datetime.date(2026, 1, 1)
+        Sesiones_Estudios.objects.bulk_create([
+            Sesiones_Estudios(
+                Usuarios_id=usuarios[i % 20], Materias_id=materias[i % 10],
+                Nombre="s", descripcion="", duracion=30,
+                fecha=inicio + datetime.timedelta(days=i % 60),
+                hora_inicio=datetime.time(8 + i % 10),
+            )
+            for i in range(1000)
+        ])
+        cls.usuario_id = usuarios[0].id
+
+        if connection.vendor == "mysql":
+            with connection.cursor() as cursor:
+                for modelo in (Usuarios, Materias, Planes, Sesiones_Estudios):
+                    cursor.execute(f"ANALYZE TABLE {modelo._meta.db_table}")
+
+    def queryset(self, viewset, params=None):
+        vista = viewset()
+        vista.request = Request(self.factory.get("/", params or {}))
+        vista.format_kwarg = None
+        return vista.get_queryset()
+
+    def assertPlanSinProblemas(self, qs):
+        problemas = explicar(qs)
+        self.assertEqual(problemas, [], f"{qs.query}\n{problemas}")
+
+    def test_detalle_por_pk(self):
+        for viewset in (UsuariosViewSet, MateriasViewSet, PlanesViewSet, Sesiones_EstudiosViewSet):
+            with self.subTest(viewset=viewset.__name__):
+                self.assertPlanSinProblemas(self.queryset(viewset).filter(pk=1))
+
+    def test_secciones_por_usuario(self):
+        self.assertPlanSinProblemas(
+            self.queryset(Sesiones_EstudiosViewSet, {"usuario_id": self.usuario_id})
+        )
+
+    def test_secciones_por_usuario_y_fecha(self):
+        self.assertPlanSinProblemas(
+            self.queryset(Sesiones_EstudiosViewSet, {"usuario_id": self.usuario_id, "fecha": "2026-01-05"})
+        )
+
+    def test_secciones_por_fecha(self):
+        self.assertPlanSinProblemas(
+            self.queryset(Sesiones_EstudiosViewSet, {"fecha": "2026-01-05"})
+        )
+
+    def test_planes_por_usuario_y_estado(self):
+        self.assertPlanSinProblemas(
+            self.queryset(PlanesViewSet, {"usuario_id": self.usuario_id, "estado": "true"})
+        )
+
+    def test_secciones_por_usuario_y_rango(self):
+        self.assertPlanSinProblemas(
+            self.queryset(Sesiones_EstudiosViewSet, {
+                "usuario_id": self.usuario_id, "desde": "2026-01-01", "hasta": "2026-01-31"
+            })
+        )
+
+
+# ------------------------------
+# CALENDARIO: RANGO + CURSOR
+# ------------------------------
+class CalendarioPaginadoTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.usuario = Usuarios.objects.create(
+            Nombre="u", Correo="u@x.com", nivel_estudios="uni",
+            Dias_Libres="lunes", periodo_prefencia="tarde"
+        )
+        cls.materia = Materias.objects.create(Nombre="m", Dificultad="media", Notas="")
+        inicio = datetime.date(2026, 3, 1)
+        Sesiones_Estudios.objects.bulk_create([
+            Sesiones_Estudios(
+                Usuarios_id=cls.usuario, Materias_id=cls.materia,
+                Nombre="s", descripcion="", duracion=30,
+                # incluye fechas/horas nulas y empates para probar el cursor
+                fecha=None if i % 7 == 0 else inicio + datetime.timedelta(days=i % 40),
+                hora_inicio=None if i % 5 == 0 else datetime.time(8 + i % 3),
+            )
+            for i in range(120)
+        ])
+
+    def test_sin_page_size_devuelve_lista(self):
+        r = self.client.get("/api/secciones/", {"usuario_id": self.usuario.id})
+        self.assertEqual(len(r.json()), 120)
+
+    def test_recorrer_cursor_da_el_mismo_orden(self):
+        completo = [s["id"] for s in self.client.get("/api/secciones/", {"usuario_id": self.usuario.id}).json()]
+
+        vistos = []
+        params = {"usuario_id": self.usuario.id, "page_size": 25}
+        while True:
+            pagina = self.client.get("/api/secciones/", params).json()
+            self.assertLessEqual(len(pagina["results"]), 25)
+            vistos += [s["id"] for s in pagina["results"]]
+            if not pagina["next_cursor"]:
+                break
+            params["cursor"] = pagina["next_cursor"]
+
+        self.assertEqual(vistos, completo)
+
+    def test_rango_de_fechas(self):
+        r = self.client.get("/api/secciones/", {
+            "usuario_id": self.usuario.id, "desde": "2026-03-05", "hasta": "2026-03-10"
+        })
+        fechas = {s["fecha"] for s in r.json()}
+        self.assertTrue(fechas)
+        self.assertTrue(all("2026-03-05" <= f <= "2026-03-10" for f in fechas))
+
+    def test_page_size_maximo(self):
+        with self.settings(SECCIONES_MAX_PAGE_SIZE=10):
+            r = self.client.get("/api/secciones/", {"usuario_id": self.usuario.id, "page_size": 1000})
+        self.assertEqual(len(r.json()["results"]), 10)
+
+    def test_parametros_invalidos(self):
+        self.assertEqual(self.client.get("/api/secciones/", {"desde": "ayer"}).status_code, 400)
+        self.assertEqual(self.client.get("/api/secciones/", {"cursor": "xyz"}).status_code, 400)
+
+
+# ------------------------------
+# NÚMERO DE CONSULTAS POR ENDPOINT
+# ------------------------------
+# Cada endpoint debe hacer las mismas consultas con 1, 100 o 10.000 filas.
+# (listado o detalle); materias y planes leen antes la versión de su tabla (ETag)
+CONSULTAS_ESPERADAS = {
+    "/api/usuarios/": 1,
+    "/api/materias/": 2,
+    "/api/planes/": 2,
+    "/api/secciones/": 1,
+}
+
+
+class ConsultasPorEndpointTests(TestCase):
+
+    def completar_hasta(self, n):
+        faltan = n - Usuarios.objects.count()
+        inicio = Usuarios.objects.count()
+        usuarios = Usuarios.objects.bulk_create([
+            Usuarios(Nombre=f"u{inicio + i}", Correo=f"u{inicio + i}@x.com", nivel_estudios="uni",
+                     Dias_Libres="lunes", periodo_prefencia="tarde")
+            for i in range(faltan)
+        ])
+        materias = Materias.objects.bulk_create([
+            Materias(Nombre=f"m{i}", Dificultad="media", Notas="") for i in range(faltan)
+        ])
+        planes = Planes.objects.bulk_create([
+            Planes(Usuarios_id=u, Nombre="plan", contenido="", fuente="ia") for u in usuarios
+        ])
+        Sesiones_Estudios.objects.bulk_create([
+            Sesiones_Estudios(
+                Usuarios_id=u, Materias_id=m, Planes_id=p, Nombre="s", descripcion="", duracion=30,
+                fecha=datetime.date(2026, 1, 1), hora_inicio=datetime.time(9)
+            )
+            for u, m, p in zip(usuarios, materias, planes)
+        ])
+        return usuarios, materias, planes
+
+    def test_listados_y_detalles(self):
+        for n in (1, 100, 10000):
+            self.completar_hasta(n)
+            for url, esperadas in CONSULTAS_ESPERADAS.items():
+                with self.subTest(filas=n, url=url):
+                    # bulk_create no cambia la versión del catálogo: se mide sin cache
+                    caches["catalogo"].clear()
+                    with self.assertNumQueries(esperadas):
+                        r = self.client.get(url)
+                    self.assertEqual(len(r.json()), n)
+
+                    pk = r.json()[0]["id"]
+                    with self.assertNumQueries(esperadas):
+                        self.assertEqual(self.client.get(f"{url}{pk}/").status_code, 200)
+
+    def test_validar_lote_de_sesiones(self):
+        usuarios, materias, planes = self.completar_hasta(100)
+        datos = [
+            {"Usuarios_id": u.id, "Materias_id": m.id, "Planes_id": p.id,
+             "Nombre": "s", "descripcion": "d", "duracion": 30}
+            for u, m, p in zip(usuarios, materias, planes)
+        ]
+        # una consulta IN por modelo relacionado, no tres por fila
+        with self.assertNumQueries(3):
+            serializer = SeccionEstudioSerializer(data=datos, many=True)
+            self.assertTrue(serializer.is_valid(), serializer.errors)
+
+        datos[0]["Materias_id"] = 999999
+        serializer = SeccionEstudioSerializer(data=datos, many=True)
+        self.assertFalse(serializer.is_valid())
+        self.assertIn("Materias_id", serializer.errors[0])
+
+
+# ------------------------------
+# ENDPOINTS EN LOTE
+# ------------------------------
+class OperacionesEnLoteTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.usuarios = Usuarios.objects.bulk_create([
+            Usuarios(Nombre=f"u{i}", Correo=f"u{i}@x.com", nivel_estudios="uni",
+                     Dias_Libres="lunes", periodo_prefencia="tarde")
+            for i in range(5)
+        ])
+        cls.materias = Materias.objects.bulk_create([
+            Materias(Nombre=f"m{i}", Dificultad="media", Notas="n") for i in range(3)
+        ])
+
+    def sesion(self, i):
+        return {
+            "Usuarios_id": self.usuarios[i % 5].id, "Materias_id": self.materias[i % 3].id,
+            "Nombre": "s", "descripcion": "d", "duracion": 10 + i % 7,
+            "fecha": f"2026-02-{1 + i % 28:02d}",
+        }
+
+    def test_crear_actualizar_y_borrar_mantiene_resumen(self):
+        r = self.client.post("/api/secciones/bulk/?batch_size=100",
+                             [self.sesion(i) for i in range(500)], content_type="application/json")
+        self.assertEqual(r.status_code, 201)
+        self.assertEqual(Sesiones_Estudios.objects.count(), 500)
+        self.assertEqual(verificar_resumen(), [])
+
+        ids = list(Sesiones_Estudios.objects.values_list("id", flat=True)[:50])
+        r = self.client.patch("/api/secciones/bulk/",
+                              [{"id": i, "duracion": 99, "Materias_id": self.materias[0].id} for i in ids],
+                              content_type="application/json")
+        self.assertEqual(r.json(), {"actualizados": 50})
+        self.assertEqual(verificar_resumen(), [])
+
+        r = self.client.delete("/api/secciones/bulk/", {"ids": ids[:20]}, content_type="application/json")
+        self.assertEqual(r.json(), {"borrados": 20})
+        self.assertEqual(verificar_resumen(), [])
+
+    def test_errores_por_elemento_no_escriben_nada(self):
+        datos = [self.sesion(i) for i in range(3)]
+        datos[1]["Materias_id"] = 999999
+        r = self.client.post("/api/secciones/bulk/", datos, content_type="application/json")
+        self.assertEqual(r.status_code, 400)
+        self.assertEqual([e["indice"] for e in r.json()["errores"]], [1])
+        self.assertEqual(Sesiones_Estudios.objects.count(), 0)
+
+    def test_ids_repetidos_en_el_patch(self):
+        r = self.client.post("/api/secciones/bulk/", [self.sesion(0)], content_type="application/json")
+        self.assertEqual(r.status_code, 201)
+        sesion = Sesiones_Estudios.objects.get()
+        r = self.client.patch("/api/secciones/bulk/",
+                              [{"id": sesion.id, "duracion": 30}, {"id": sesion.id, "duracion": 60}],
+                              content_type="application/json")
+        self.assertEqual(r.status_code, 400)
+        self.assertEqual([e["indice"] for e in r.json()["errores"]], [1])
+        self.assertEqual(Sesiones_Estudios.objects.get().duracion, 10)
+        self.assertEqual(verificar_resumen(), [])
+
+    def test_ids_que_no_son_enteros(self):
+        r = self.client.post("/api/secciones/bulk/", [self.sesion(0)], content_type="application/json")
+        sesion_id = r.json()["ids"][0]
+
+        r = self.client.patch("/api/secciones/bulk/",
+                              [{"id": [1]}, {"id": {"x": 1}}, {"id": True}, "texto", {"id": str(sesion_id)}],
+                              content_type="application/json")
+        self.assertEqual(r.status_code, 400)
+        self.assertEqual([e["indice"] for e in r.json()["errores"]], [0, 1, 2, 3])
+
+        # "5" vale como 5
+        r = self.client.patch("/api/secciones/bulk/", [{"id": str(sesion_id), "duracion": 45}],
+                              content_type="application/json")
+        self.assertEqual(r.json(), {"actualizados": 1})
+
+        for ids in (["a"], [[1]], [None], [sesion_id, 1.5]):
+            r = self.client.delete("/api/secciones/bulk/", {"ids": ids}, content_type="application/json")
+            self.assertEqual(r.status_code, 400, ids)
+        r = self.client.delete("/api/secciones/bulk/", {"ids": [str(sesion_id)]}, content_type="application/json")
+        self.assertEqual(r.json(), {"borrados": 1})
+        self.assertEqual(verificar_resumen(), [])
+
+    def test_patch_y_delete_bloquean_las_filas(self):
+        r = self.client.post("/api/secciones/bulk/", [self.sesion(0)], content_type="application/json")
+        sesion_id = r.json()["ids"][0]
+
+        bloqueadas = []
+        original = QuerySet.select_for_update
+
+        def registrar(qs, *args, **kwargs):
+            bloqueadas.append(qs.model)
+            return original(qs, *args, **kwargs)
+
+        with mock.patch.object(QuerySet, "select_for_update", registrar):
+            self.client.patch("/api/secciones/bulk/", [{"id": sesion_id, "duracion": 45}],
+                              content_type="application/json")
+            self.client.delete("/api/secciones/bulk/", {"ids": [sesion_id]}, content_type="application/json")
+        self.assertEqual(bloqueadas, [Sesiones_Estudios, Sesiones_Estudios])
+        self.assertEqual(verificar_resumen(), [])
+
+    def test_las_versiones_suben_en_la_transaccion_del_lote(self):
+        # en TestCase los on_commit no corren: si la versión sube es que fue dentro
+        usuario = versiones.clave_usuario(self.usuarios[0].id)
+        antes = versiones.leer([usuario, versiones.clave_tabla(Materias)])
+        self.client.post("/api/secciones/bulk/", [self.sesion(0)], content_type="application/json")
+        self.client.post("/api/materias/bulk/", [{"Nombre": "n", "Dificultad": "alta", "Notas": "n"}],
+                         content_type="application/json")
+        despues = versiones.leer([usuario, versiones.clave_tabla(Materias)])
+        self.assertTrue(all(despues[c][0] > antes[c][0] for c in antes))
+
+    def test_materias_en_lote(self):
+        r = self.client.post("/api/materias/bulk/",
+                             [{"Nombre": f"n{i}", "Dificultad": "alta", "Notas": "n"} for i in range(10)],
+                             content_type="application/json")
+        self.assertEqual(r.status_code, 201)
+        self.assertEqual(Materias.objects.count(), 13)
+
+
+# ------------------------------
+# MÉTRICAS
+# ------------------------------
+class MetricasTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        Materias.objects.create(Nombre="Física", Dificultad="alta", Notas="n")
+
+    def setUp(self):
+        metricas.reiniciar()
+        caches["catalogo"].clear()
+
+    def test_histogramas_por_ruta(self):
+        self.client.get("/api/materias/")
+        self.client.get("/api/materias/")
+        texto = self.client.get("/metrics").content.decode()
+
+        self.assertIn('http_request_duration_seconds_count{ruta="/api/materias/",metodo="GET",estado="200"} 2', texto)
+        # la versión de la tabla + las filas; la segunda, desde la cache
+        self.assertIn('http_request_db_queries_bucket{ruta="/api/materias/",metodo="GET",le="2"} 2', texto)
+        self.assertIn("ia_cache_hit_ratio", texto)
+
+    def test_llamadas_externas(self):
+        with self.assertRaises(RuntimeError):
+            with metricas.medir("gemini"):
+                raise RuntimeError("caído")
+        self.assertIn('external_call_duration_seconds_count{servicio="gemini",resultado="error"} 1', metricas.exportar())
+
+    def test_wrapper_sql_no_se_apila(self):
+        def propio(execute, sql, params, many, context):
+            return execute(sql, params, many, context)
+
+        connection.execute_wrappers.remove(metricas._envolver_sql)
+        with connection.execute_wrapper(propio):
+            # se instala a mitad del bloque (primera petición del hilo)
+            self.client.get("/api/materias/")
+        self.client.get("/api/materias/")
+        self.client.get("/api/materias/")
+        self.assertEqual(connection.execute_wrappers.count(metricas._envolver_sql), 1)
+        self.assertNotIn(propio, connection.execute_wrappers)
+
+    def test_log_de_peticiones_lentas_con_sql(self):
+        with self.settings(METRICAS_UMBRAL_LENTO_MS=0.001), self.assertLogs("Educacion.lentas") as logs:
+            self.client.get("/api/materias/")
+        self.assertIn("administrador_materias", logs.output[0])
+
+
+# ------------------------------
+# DATOS SINTÉTICOS Y BENCHMARK
+# ------------------------------
+class GenerarDatosYBenchmarkTests(TestCase):
+
+    def generar(self, *args):
+        call_command("generar_datos", "--usuarios", "20", "--materias", "10", "--sesiones", "500",
+                     "--materias-por-usuario", "4", *args, stdout=io.StringIO())
+
+    def test_generar_es_reproducible_y_deja_el_resumen_al_dia(self):
+        self.generar()
+        primera = list(Sesiones_Estudios.objects.order_by("id").values_list("Usuarios_id", "duracion", "fecha")[:50])
+        self.assertEqual(Sesiones_Estudios.objects.count(), 500)
+        self.assertEqual(Planes.objects.count(), 40)
+        self.assertEqual(verificar_resumen(), [])
+
+        self.generar("--borrar")
+        segunda = list(Sesiones_Estudios.objects.order_by("id").values_list("Usuarios_id", "duracion", "fecha")[:50])
+        self.assertEqual(Usuarios.objects.count(), 20)
+        self.assertEqual([(d, f) for _, d, f in primera], [(d, f) for _, d, f in segunda])
+
+    def test_benchmark_mide_todos_los_endpoints(self):
+        self.generar()
+        resultado = benchmark.ejecutar(peticiones=4, hilos=1, calentamiento=0, latencia_llm_ms=1)
+
+        self.assertEqual(set(resultado["endpoints"]), {
+            "usuarios-lista", "usuarios-detalle", "materias-lista", "materias-detalle", "planes-lista",
+            "planes-detalle", "secciones-lista", "secciones-detalle", "ia-recomendar",
+        })
+        for r in resultado["endpoints"].values():
+            self.assertEqual((r["peticiones"], r["errores"]), (4, 0))
+        self.assertNotIn("local", resultado["endpoints"]["ia-recomendar"]["fuentes"])
+
+        peor = json.loads(json.dumps(resultado))
+        peor["endpoints"]["materias-lista"]["consultas_media"] += 1
+        regresiones = [f[:2] for f in benchmark.comparar(resultado, peor) if f[-1]]
+        self.assertEqual(regresiones, [("materias-lista", "consultas_media")])
+
+
+# ------------------------------
+# GET CONDICIONAL (ETag / Last-Modified)
+# ------------------------------
+class RespuestaCondicionalTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.materia = Materias.objects.create(Nombre="Física", Dificultad="alta", Notas="n")
+        cls.usuario = Usuarios.objects.create(Nombre="u", Correo="u@x.com", nivel_estudios="uni",
+                                              Dias_Libres="lunes", periodo_prefencia="tarde")
+        Planes.objects.create(Usuarios_id=cls.usuario, Nombre="p", contenido="c", fuente="ia")
+
+    def setUp(self):
+        caches["catalogo"].clear()
+
+    def test_304_solo_lee_la_version(self):
+        for url in ("/api/materias/", f"/api/materias/{self.materia.id}/", "/api/planes/"):
+            with self.subTest(url=url):
+                r = self.client.get(url)
+                self.assertEqual(r.status_code, 200)
+                self.assertIn("Last-Modified", r)
+
+                with self.assertNumQueries(1):
+                    r2 = self.client.get(url, HTTP_IF_NONE_MATCH=r["ETag"])
+                self.assertEqual((r2.status_code, r2["ETag"]), (304, r["ETag"]))
+
+                with self.assertNumQueries(1):
+                    r3 = self.client.get(url, HTTP_IF_MODIFIED_SINCE=r["Last-Modified"])
+                self.assertEqual(r3.status_code, 304)
+
+    def test_listado_en_cache_hasta_que_cambia_la_tabla(self):
+        r = self.client.get("/api/materias/")
+        with self.assertNumQueries(1):
+            self.assertEqual(self.client.get("/api/materias/").json(), r.json())
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.patch(f"/api/materias/{self.materia.id}/", {"Notas": "nuevas"},
+                              content_type="application/json")
+
+        r2 = self.client.get("/api/materias/", HTTP_IF_NONE_MATCH=r["ETag"])
+        self.assertEqual(r2.status_code, 200)
+        self.assertNotEqual(r2["ETag"], r["ETag"])
+        self.assertEqual(r2.json()[0]["Notas"], "nuevas")
+
+    def test_la_version_sobrevive_a_la_cache(self):
+        # la cache de otro worker o una expulsión no reinician la versión
+        r = self.client.get("/api/materias/")
+        caches["catalogo"].clear()
+        self.assertEqual(self.client.get("/api/materias/")["ETag"], r["ETag"])
+
+        Materias.objects.create(Nombre="Química", Dificultad="media", Notas="n")
+        caches["catalogo"].clear()
+        r2 = self.client.get("/api/materias/", HTTP_IF_NONE_MATCH=r["ETag"])
+        self.assertEqual((r2.status_code, len(r2.json())), (200, 2))
+
+    def test_filtros_tienen_etag_propio(self):
+        a = self.client.get(f"/api/planes/?usuario_id={self.usuario.id}")
+        b = self.client.get("/api/planes/?usuario_id=999999")
+        self.assertNotEqual(a["ETag"], b["ETag"])
+        self.assertEqual((len(a.json()), len(b.json())), (1, 0))
+
+
+# ------------------------------
+# RÉPLICAS DE LECTURA
+# ------------------------------
+@mock.patch("Educacion.replicas.replicas", lambda: ["replica_1"])
+class ReplicaRouterTests(SimpleTestCase):
+
+    def setUp(self):
+        self.router = replicas.ReplicaRouter()
+
+    def leer(self):
+        return self.router.db_for_read(Materias)
+
+    def test_solo_dentro_de_lecturas_en_replica(self):
+        self.assertEqual(self.leer(), "default")
+        with replicas.lecturas_en_replica():
+            self.assertEqual(self.leer(), "replica_1")
+        with replicas.lecturas_en_replica(False):
+            self.assertEqual(self.leer(), "default")
+
+    def test_un_bloque_lee_siempre_de_la_misma_replica(self):
+        # la versión y los datos de una cache tienen que salir de la misma réplica
+        elegidas = set()
+        with mock.patch("Educacion.replicas.replicas", lambda: ["replica_1", "replica_2"]):
+            for _ in range(30):
+                with replicas.lecturas_en_replica():
+                    vistos = {self.leer() for _ in range(5)}
+                    with replicas.lecturas_en_replica():
+                        vistos.add(self.leer())
+                self.assertEqual(len(vistos), 1)
+                elegidas |= vistos
+        self.assertEqual(elegidas, {"replica_1", "replica_2"})
+
+    def pedir(self, cookies=None, escribe=False):
+        vistos = []
+
+        def vista(request):
+            with replicas.lecturas_en_replica():
+                vistos.append(self.leer())
+                if escribe:
+                    self.router.db_for_write(Materias)
+                    vistos.append(self.leer())
+            return HttpResponse()
+
+        request = RequestFactory().get("/")
+        request.COOKIES.update(cookies or {})
+        respuesta = replicas.ReplicaMiddleware(vista)(request)
+        return vistos, respuesta
+
+    def test_lee_lo_que_escribio(self):
+        vistos, respuesta = self.pedir(escribe=True)
+        self.assertEqual(vistos, ["replica_1", "default"])
+
+        cookie = respuesta.cookies[replicas.COOKIE]
+        vistos, _ = self.pedir({replicas.COOKIE: cookie.value})
+        self.assertEqual(vistos, ["default"])
+
+        # pasada la ventana vuelve a la réplica
+        vistos, respuesta = self.pedir({replicas.COOKIE: str(time.time() - 1)})
+        self.assertEqual(vistos, ["replica_1"])
+        self.assertNotIn(replicas.COOKIE, respuesta.cookies)
+
+
+# ------------------------------
+# EXPORTACIÓN EN STREAMING
+# ------------------------------
+class ExportarSesionesTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.usuario = Usuarios.objects.create(Nombre="u", Correo="u@x.com", nivel_estudios="uni",
+                                              Dias_Libres="lunes", periodo_prefencia="tarde")
+        otro = Usuarios.objects.create(Nombre="o", Correo="o@x.com", nivel_estudios="uni",
+                                       Dias_Libres="lunes", periodo_prefencia="tarde")
+        cls.fisica = Materias.objects.create(Nombre="Física", Dificultad="alta", Notas="n")
+        quimica = Materias.objects.create(Nombre="Química", Dificultad="alta", Notas="n")
+        plan = Planes.objects.create(Usuarios_id=cls.usuario, Nombre="Plan, con coma", contenido="c", fuente="ia")
+        Sesiones_Estudios.objects.bulk_create([
+            Sesiones_Estudios(
+                Usuarios_id=cls.usuario if i % 5 else otro, Materias_id=cls.fisica if i % 2 else quimica,
+                Planes_id=plan if i % 3 == 0 else None, Nombre=f"s{i}", descripcion="d", duracion=30,
+                fecha=datetime.date(2026, 1, 1) + datetime.timedelta(days=i % 30), hora_inicio=datetime.time(9)
+            )
+            for i in range(250)
+        ])
+
+    def exportar(self, consulta, **extra):
+        with self.settings(EXPORTAR_TAM_BLOQUE=40, EXPORTAR_FILAS_POR_TROZO=15):
+            r = self.client.get(f"/api/secciones/exportar/?{consulta}", **extra)
+        self.assertTrue(r.streaming)
+        return r, b"".join(r.streaming_content).decode()
+
+    def test_csv_con_filtros(self):
+        r, texto = self.exportar(f"usuario_id={self.usuario.id}&materia_id={self.fisica.id}&desde=2026-01-10")
+        filas = list(csv.DictReader(io.StringIO(texto)))
+
+        esperadas = Sesiones_Estudios.objects.filter(
+            Usuarios_id=self.usuario, Materias_id=self.fisica, fecha__gte=datetime.date(2026, 1, 10)
+        )
+        self.assertEqual([int(f["id"]) for f in filas],
+                         list(esperadas.order_by("fecha", "hora_inicio", "id").values_list("id", flat=True)))
+        self.assertEqual(filas[0]["materia"], "Física")
+        self.assertIn(f'sesiones_usuario_{self.usuario.id}.csv', r["Content-Disposition"])
+        self.assertTrue(any(f["plan"] == "Plan, con coma" for f in filas))
+
+    def test_ndjson_por_accept_y_sin_relacionados(self):
+        r, texto = self.exportar("relacionados=0", HTTP_ACCEPT="application/x-ndjson")
+        filas = [json.loads(linea) for linea in texto.splitlines()]
+        self.assertTrue(r["Content-Type"].startswith("application/x-ndjson"))
+        self.assertEqual(len(filas), 250)
+        self.assertNotIn("materia", filas[0])
+        self.assertEqual(filas[0]["fecha"], "2026-01-01")
+
+    def test_formato_invalido(self):
+        self.assertEqual(self.client.get("/api/secciones/exportar/?formato=xml").status_code, 400)
+
+    def test_orden_del_calendario_con_nulos(self):
+        # sin fecha/hora y con horas distintas en el mismo día, cruzando bloques de 40
+        Sesiones_Estudios.objects.bulk_create([
+            Sesiones_Estudios(Usuarios_id=self.usuario, Materias_id=self.fisica, Nombre=f"n{i}", descripcion="d",
+                              duracion=30, fecha=None if i % 3 == 0 else datetime.date(2026, 1, 1 + i % 2),
+                              hora_inicio=None if i % 4 == 0 else datetime.time(8 + i % 5))
+            for i in range(60)
+        ])
+        _, texto = self.exportar(f"usuario_id={self.usuario.id}&relacionados=0", HTTP_ACCEPT="application/x-ndjson")
+        ids = [json.loads(linea)["id"] for linea in texto.splitlines()]
+
+        esperadas = Sesiones_Estudios.objects.filter(Usuarios_id=self.usuario)
+        self.assertEqual(ids, list(esperadas.order_by("fecha", "hora_inicio", "id").values_list("id", flat=True)))
+        self.assertEqual(len(ids), esperadas.count())
+
+
+# ------------------------------
+# ESTADÍSTICAS POR USUARIO
+# ------------------------------
+class EstadisticasTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.usuario = Usuarios.objects.create(Nombre="u", Correo="u@x.com", nivel_estudios="uni",
+                                              Dias_Libres="lunes", periodo_prefencia="tarde")
+        cls.fisica = Materias.objects.create(Nombre="Física", Dificultad="alta", Notas="n")
+        cls.arte = Materias.objects.create(Nombre="Arte", Dificultad="baja", Notas="n")
+        cls.hoy = datetime.date.today()
+
+    def setUp(self):
+        caches["catalogo"].clear()
+
+    def sesion(self, dias_atras, materia, duracion=30, estado=True):
+        with self.captureOnCommitCallbacks(execute=True):
+            return Sesiones_Estudios.objects.create(
+                Usuarios_id=self.usuario, Materias_id=materia, Nombre="s", descripcion="d",
+                duracion=duracion, estado=estado, fecha=self.hoy - datetime.timedelta(days=dias_atras),
+                hora_inicio=datetime.time(9),
+            )
+
+    def pedir(self, consulta=""):
+        return self.client.get(f"/api/usuarios/{self.usuario.id}/estadisticas/{consulta}").json()
+
+    def test_totales_rachas_y_distribucion(self):
+        # racha actual: hoy, ayer y anteayer (dos sesiones hoy); la más larga: 4 días hace un mes
+        for dias in (0, 0, 1, 2, 30, 31, 32, 33):
+            self.sesion(dias, self.fisica if dias < 30 else self.arte, estado=dias != 1)
+
+        datos = self.pedir("?semanas=8&meses=3")
+        self.assertEqual(datos["total"], {"minutos": 240, "sesiones": 8, "completadas": 7, "tasa_completado": 0.875})
+        self.assertEqual(datos["racha"], {"actual": 3, "mas_larga": 4, "ultimo_dia": self.hoy.isoformat()})
+        self.assertEqual((len(datos["semanal"]), len(datos["mensual"])), (8, 3))
+        self.assertEqual(sum(s["minutos"] for s in datos["semanal"]), 240)
+        self.assertEqual(datos["semanal"][-1]["inicio"],
+                         (self.hoy - datetime.timedelta(days=self.hoy.weekday())).isoformat())
+        self.assertEqual(datos["por_dificultad"], [
+            {"dificultad": "alta", "minutos": 120, "sesiones": 4},
+            {"dificultad": "baja", "minutos": 120, "sesiones": 4},
+        ])
+        self.assertEqual(datos["por_estado"], {"completadas": 7, "pendientes": 1})
+
+    def test_cache_se_invalida_al_cambiar_sesiones(self):
+        self.sesion(0, self.fisica)
+        self.pedir()
+        with self.assertNumQueries(2):  # get_object() y las dos versiones
+            self.assertEqual(self.pedir()["total"]["sesiones"], 1)
+
+        sesion = self.sesion(1, self.fisica)
+        self.assertEqual(self.pedir()["total"]["sesiones"], 2)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            sesion.delete()
+        self.assertEqual(self.pedir()["racha"]["actual"], 1)
+
+    def test_la_version_sube_con_la_escritura_y_no_vive_en_la_cache(self):
+        self.pedir()
+        # sin esperar al commit: la versión sube en la misma transacción
+        Sesiones_Estudios.objects.create(
+            Usuarios_id=self.usuario, Materias_id=self.fisica, Nombre="s", descripcion="d",
+            duracion=30, fecha=self.hoy, hora_inicio=datetime.time(9),
+        )
+        self.assertEqual(self.pedir()["total"]["sesiones"], 1)
+
+        # vaciar la cache no reinicia la versión ni devuelve datos viejos
+        caches["default"].clear()
+        self.assertEqual(self.pedir()["total"]["sesiones"], 1)
+        with self.assertNumQueries(2):
+            self.pedir()
+
+    def test_parametros_invalidos(self):
+        r = self.client.get(f"/api/usuarios/{self.usuario.id}/estadisticas/?semanas=0")
+        self.assertEqual(r.status_code, 400)
+
+
+# ------------------------------
+# PLANIFICADOR E ÍNDICE DE HORARIOS
+# ------------------------------
+class PlanificadorTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.usuario = Usuarios.objects.create(Nombre="p", Correo="p@x.com", nivel_estudios="uni",
+                                              Dias_Libres="Lunes, miércoles y sábado", periodo_prefencia="Tarde")
+        cls.plan = Planes.objects.create(Usuarios_id=cls.usuario, Nombre="Semestre", contenido="c", fuente="f")
+        cls.materias = [
+            Materias.objects.create(Nombre=f"M{i}", Dificultad=d, Notas="n")
+            for i, d in enumerate(["Alta", "media", "baja", "media", "alta", "baja"])
+        ]
+        cls.lunes = datetime.date(2026, 1, 5)
+
+    def sesion(self, fecha, hora, duracion=60):
+        return {"Usuarios_id": self.usuario.id, "Materias_id": self.materias[0].id, "Nombre": "s",
+                "descripcion": "d", "duracion": duracion, "fecha": fecha.isoformat(), "hora_inicio": hora}
+
+    def test_indice_detecta_solapes(self):
+        indice = IndiceHorario()
+        u, f = self.usuario.id, self.lunes
+        indice.agregar(u, f, datetime.time(10), 120, id_=1)   # 10:00-12:00
+        indice.agregar(u, f, datetime.time(10, 30), 15, id_=2)  # dentro de la anterior
+        self.assertEqual(indice.choque(u, f, datetime.time(11, 30), 60), 1)
+        self.assertIsNone(indice.choque(u, f, datetime.time(12), 30))
+        self.assertIsNone(indice.choque(u, f, datetime.time(9), 60))
+        self.assertIsNone(indice.choque(u, f + datetime.timedelta(days=1), datetime.time(10), 60))
+        self.assertEqual(indice.hueco(u, f, 9 * 60, 14 * 60, 45, margen=10), 9 * 60)
+        self.assertEqual(indice.hueco(u, f, 9 * 60 + 30, 14 * 60, 45, margen=10), 12 * 60 + 10)
+        self.assertIsNone(indice.hueco(u, f, 9 * 60 + 30, 12 * 60 + 30, 45, margen=10))
+
+    def test_semestre_en_huecos_libres(self):
+        # una sesión manual ocupa el inicio de la tarde del primer lunes
+        Sesiones_Estudios.objects.create(Usuarios_id=self.usuario, Materias_id=self.materias[0], Nombre="x",
+                                         descripcion="d", duracion=60, fecha=self.lunes, hora_inicio=datetime.time(14))
+
+        inicio = time.perf_counter()
+        sesiones, pendientes = planificar(self.plan, self.materias, self.lunes, 20)
+        self.assertLess(time.perf_counter() - inicio, 0.5)
+        self.assertGreater(len(sesiones), 150)
+
+        indice = IndiceHorario.cargar([self.usuario.id])
+        for s in sesiones:
+            self.assertIn(s.fecha.weekday(), (0, 2, 5))
+            self.assertTrue(datetime.time(14) <= s.hora_inicio and s.hora_inicio.hour * 60 + s.hora_inicio.minute
+                            + s.duracion <= 19 * 60)
+            self.assertIsNone(indice.choque(self.usuario.id, s.fecha, s.hora_inicio, s.duracion))
+            indice.agregar(self.usuario.id, s.fecha, s.hora_inicio, s.duracion)
+        # las difíciles tienen 3 por semana, pero solo hay 3 días y 240 min por día
+        self.assertEqual(len(sesiones) + len(pendientes), 20 * (3 + 2 + 1 + 2 + 3 + 1))
+
+    def test_programar_guarda_en_lote_y_actualiza_resumen(self):
+        url = f"/api/planes/{self.plan.id}/programar/"
+        datos = {"materias": [m.id for m in self.materias[:3]], "desde": self.lunes.isoformat(), "semanas": 16}
+        with self.captureOnCommitCallbacks(execute=True):
+            r = self.client.post(url, datos, content_type="application/json")
+        self.assertEqual(r.status_code, 201, r.content)
+        self.assertEqual(r.json()["creadas"], 16 * 6)
+        self.assertEqual(Sesiones_Estudios.objects.filter(Planes_id=self.plan, estado=False).count(), 96)
+        self.assertEqual(verificar_resumen(), [])
+
+        r = self.client.post(url, {"materias": [999999]}, content_type="application/json")
+        self.assertEqual(r.status_code, 400)
+
+    def test_programar_sin_ids_de_bulk_create(self):
+        # como MySQL: bulk_create no deja los ids en los objetos
+        url = f"/api/planes/{self.plan.id}/programar/"
+        datos = {"materias": [self.materias[0].id], "desde": self.lunes.isoformat(), "semanas": 1}
+        with mock.patch.object(type(connection.features), "can_return_rows_from_bulk_insert", False):
+            r = self.client.post(url, datos, content_type="application/json")
+        self.assertEqual(r.status_code, 201, r.content)
+        self.assertTrue(r.json()["sesiones"])
+        self.assertNotIn("id", r.json()["sesiones"][0])
+
+    def test_rechaza_sesiones_manuales_que_se_solapan(self):
+        r = self.client.post("/api/secciones/", self.sesion(self.lunes, "10:00", 90), content_type="application/json")
+        self.assertEqual(r.status_code, 201)
+        existente = r.json()["id"]
+
+        r = self.client.post("/api/secciones/", self.sesion(self.lunes, "11:00"), content_type="application/json")
+        self.assertEqual(r.status_code, 400)
+        self.assertIn(str(existente), r.json()["hora_inicio"][0])
+
+        # moverla sobre sí misma no es un choque
+        r = self.client.patch(f"/api/secciones/{existente}/", {"hora_inicio": "10:30"}, content_type="application/json")
+        self.assertEqual(r.status_code, 200)
+
+        lote = [self.sesion(self.lunes, "15:00"), self.sesion(self.lunes, "15:30"), self.sesion(self.lunes, "17:00")]
+        r = self.client.post("/api/secciones/bulk/", lote, content_type="application/json")
+        self.assertEqual(r.status_code, 400)
+        self.assertEqual([e["indice"] for e in r.json()["errores"]], [1])
+
+
+    def test_patch_en_lote_revisa_choques_entre_elementos(self):
+        lote = [self.sesion(self.lunes, "08:00"), self.sesion(self.lunes, "12:00"), self.sesion(self.lunes, "14:00")]
+        r = self.client.post("/api/secciones/bulk/", lote, content_type="application/json")
+        self.assertEqual(r.status_code, 201)
+        a, b, c = Sesiones_Estudios.objects.order_by("hora_inicio").values_list("id", flat=True)
+
+        r = self.client.patch("/api/secciones/bulk/", [{"id": b, "hora_inicio": "10:00"},
+                                                       {"id": c, "hora_inicio": "10:30"}],
+                              content_type="application/json")
+        self.assertEqual(r.status_code, 400)
+        self.assertEqual([e["indice"] for e in r.json()["errores"]], [1])
+
+        # intercambiar horarios dentro del lote no choca con los horarios viejos
+        r = self.client.patch("/api/secciones/bulk/", [{"id": a, "hora_inicio": "14:00"},
+                                                       {"id": c, "hora_inicio": "08:00"}],
+                              content_type="application/json")
+        self.assertEqual(r.status_code, 200, r.content)
+
+# ------------------------------
+# DISPONIBILIDAD (?libre=)
+# ------------------------------
+class DisponibilidadTests(TestCase):
+
+    def crear(self, nombre, dias, periodo, disponibilidad=True):
+        datos = {"Nombre": nombre, "Correo": f"{nombre}@x.com", "nivel_estudios": "uni",
+                 "disponibilidad": disponibilidad, "Dias_Libres": dias, "periodo_prefencia": periodo}
+        r = self.client.post("/api/usuarios/", datos, content_type="application/json")
+        self.assertEqual(r.status_code, 201, r.content)
+        return r.json()
+
+    def libres(self, consulta):
+        return sorted(u["Nombre"] for u in self.client.get(f"/api/usuarios/?libre={consulta}").json())
+
+    def test_franjas_desde_el_texto(self):
+        ana = self.crear("ana", "Martes y Jueves", "Noche")
+        self.assertEqual(ana["Dias_Libres"], "Martes y Jueves")
+        self.assertEqual(ana["franjas"], ["martes-noche", "jueves-noche"])
+        self.assertEqual(
+            sorted(Disponibilidad_Usuarios.objects.filter(Usuarios_id=ana["id"]).values_list("dia", "periodo")),
+            [(1, 2), (3, 2)],
+        )
+        # sin periodo reconocible: todo el día
+        self.assertEqual(len(self.crear("beto", "sábado", "cuando pueda")["franjas"]), 3)
+
+    def test_rangos_de_dias(self):
+        casos = {
+            "lunes a viernes": [0, 1, 2, 3, 4],
+            "De Lunes a Jueves": [0, 1, 2, 3],
+            "martes hasta el jueves y domingo": [1, 2, 3, 6],
+            "sábado a lunes": [0, 5, 6],
+            "entre semana": [0, 1, 2, 3, 4],
+            "entre semana y el sábado": [0, 1, 2, 3, 4, 5],
+            "fines de semana": [5, 6],
+            "lunes y viernes": [0, 4],
+        }
+        for texto, dias in casos.items():
+            with self.subTest(texto=texto):
+                self.assertEqual(dias_de_texto(texto), dias)
+
+    def test_filtro_libre(self):
+        self.crear("ana", "martes, jueves", "noche")
+        beto = self.crear("beto", "martes", "tarde y noche")
+        self.crear("caro", "martes", "noche", disponibilidad=False)
+        self.crear("dani", "miércoles", "noche")
+
+        self.assertEqual(self.libres("martes-noche"), ["ana", "beto"])
+        self.assertEqual(self.libres("martes-noche,martes-tarde"), ["beto"])
+        self.assertEqual(self.libres("Miércoles-Noche"), ["dani"])
+
+        # al cambiar el texto se actualizan las franjas
+        r = self.client.patch(f"/api/usuarios/{beto['id']}/", {"Dias_Libres": "viernes"},
+                              content_type="application/json")
+        self.assertEqual(r.status_code, 200)
+        self.assertEqual(self.libres("martes-noche"), ["ana"])
+        self.assertEqual(self.libres("viernes-tarde"), ["beto"])
+
+        with self.assertNumQueries(1):
+            self.client.get("/api/usuarios/?libre=martes-noche,jueves-noche")
+        self.assertEqual(self.client.get("/api/usuarios/?libre=martes").status_code, 400)
+
+
+# ------------------------------
+# BÚSQUEDA DE TEXTO COMPLETO
+# ------------------------------
+@unittest.skipUnless(connection.vendor in ("sqlite", "mysql"), "sin índice de texto completo")
+class BusquedaTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.ana = Usuarios.objects.create(Nombre="ana", Correo="ana@x.com", nivel_estudios="uni",
+                                          Dias_Libres="lunes", periodo_prefencia="tarde")
+        cls.beto = Usuarios.objects.create(Nombre="beto", Correo="beto@x.com", nivel_estudios="uni",
+                                           Dias_Libres="lunes", periodo_prefencia="tarde")
+        cls.calculo = Materias.objects.create(Nombre="Cálculo diferencial", Dificultad="alta",
+                                              Notas="Límites y derivadas <b>básicas</b>")
+        cls.fisica = Materias.objects.create(Nombre="Física", Dificultad="media",
+                                             Notas="Usa cálculo para cinemática")
+        cls.plan = Planes.objects.create(Usuarios_id=cls.ana, Nombre="Repaso", fuente="ia",
+                                         contenido="Semana 1: " + "teoría " * 200 + "derivadas de cálculo. Fin.")
+        Planes.objects.create(Usuarios_id=cls.beto, Nombre="Plan de cálculo", contenido="otro", fuente="ia")
+
+    def buscar(self, consulta):
+        r = self.client.get(f"/api/buscar/?{consulta}")
+        self.assertEqual(r.status_code, 200, r.content)
+        return r.json()
+
+    def test_ranking_acentos_y_resaltado(self):
+        datos = self.buscar("q=calculo")
+        ids = [(x["tipo"], x["id"]) for x in datos["resultados"]]
+        self.assertEqual(len(ids), 4)
+        # el nombre pesa más que el texto
+        self.assertLess(ids.index(("materias", self.calculo.id)), ids.index(("materias", self.fisica.id)))
+
+        calculo = datos["resultados"][ids.index(("materias", self.calculo.id))]
+        self.assertEqual(calculo["resaltado"]["nombre"], "<mark>Cálculo</mark> diferencial")
+        self.assertIn("&lt;b&gt;", self.buscar("q=derivadas&tipo=materias")["resultados"][0]["resaltado"]["texto"])
+
+        plan = self.buscar("q=derivadas cálculo&tipo=planes")["resultados"]
+        self.assertEqual([x["id"] for x in plan], [self.plan.id])
+        fragmento = plan[0]["resaltado"]["texto"]
+        self.assertTrue(fragmento.startswith("…"))
+        self.assertIn("<mark>derivadas</mark> de <mark>cálculo</mark>", fragmento)
+        self.assertLess(len(fragmento), 300)
+
+    def test_paginacion_y_filtros(self):
+        primera = self.buscar("q=calc&page_size=3")
+        self.assertEqual((len(primera["resultados"]), primera["siguiente"]), (3, 2))
+        segunda = self.buscar("q=calc&page_size=3&page=2")
+        self.assertEqual((len(segunda["resultados"]), segunda["siguiente"]), (1, None))
+
+        de_beto = self.buscar(f"q=calculo&tipo=planes&usuario_id={self.beto.id}")["resultados"]
+        self.assertEqual([x["usuario_id"] for x in de_beto], [self.beto.id])
+        self.assertEqual(self.client.get("/api/buscar/?q=").status_code, 400)
+        self.assertEqual(self.client.get("/api/buscar/?q=x&tipo=otro").status_code, 400)
+
+    def test_indice_al_dia_al_escribir(self):
+        self.fisica.Notas = "Vectores y trigonometría"
+        self.fisica.save()
+        Materias.objects.bulk_create([Materias(Nombre="Trigonometría", Dificultad="baja", Notas="n")])
+        self.calculo.delete()
+
+        self.assertEqual([x["nombre"] for x in self.buscar("q=calculo&tipo=materias")["resultados"]], [])
+        self.assertEqual(len(self.buscar("q=trigonometria")["resultados"]), 2)
+
+
+# ------------------------------
+# LISTADOS RÁPIDOS Y RENDERER JSON
+# ------------------------------
+class ListadoRapidoTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        usuario = Usuarios.objects.create(Nombre="ñandú", Correo="n@x.com", nivel_estudios="uni",
+                                          Dias_Libres="lunes", periodo_prefencia="noche")
+        materia = Materias.objects.create(Nombre="Cálculo ", Dificultad="alta", Notas="\"comillas\"")
+        plan = Planes.objects.create(Usuarios_id=usuario, Nombre="p", contenido="c", fuente="ia")
+        for i in range(5):
+            Sesiones_Estudios.objects.create(
+                Usuarios_id=usuario, Materias_id=materia, Planes_id=plan if i % 2 else None, Nombre=f"s{i}",
+                descripcion="d", duracion=30 + i, estado=bool(i % 2),
+                fecha=datetime.date(2026, 1, 1 + i) if i else None, hora_inicio=datetime.time(9, i) if i > 1 else None,
+            )
+
+    def setUp(self):
+        caches["catalogo"].clear()
+
+    def test_misma_respuesta_que_el_serializer(self):
+        from rest_framework.renderers import JSONRenderer
+
+        from .serializers import MateriasSerializer, PlanesSerializer, UsuariosSerializer
+
+        casos = [
+            ("/api/usuarios/", UsuariosSerializer, Usuarios.objects.all()),
+            ("/api/materias/", MateriasSerializer, Materias.objects.all()),
+            ("/api/planes/", PlanesSerializer, Planes.objects.all()),
+            ("/api/secciones/", SeccionEstudioSerializer,
+             Sesiones_Estudios.objects.order_by("fecha", "hora_inicio", "id")),
+        ]
+        for url, serializer, qs in casos:
+            with self.subTest(url=url):
+                esperado = JSONRenderer().render(serializer(qs, many=True).data)
+                self.assertEqual(self.client.get(url).content, esperado)
+
+    def test_paginado_por_cursor(self):
+        primera = self.client.get("/api/secciones/?page_size=3").json()
+        segunda = self.client.get(f"/api/secciones/?page_size=3&cursor={primera['next_cursor']}").json()
+        self.assertEqual([s["Nombre"] for s in primera["results"] + segunda["results"]],
+                         ["s0", "s1", "s2", "s3", "s4"])
+        self.assertIsNone(segunda["next_cursor"])
+
+    def test_renderer_igual_al_de_drf(self):
+        import decimal
+
+        from rest_framework.renderers import JSONRenderer
+
+        from Educacion.renderers import JSONRapidoRenderer
+
+        datos = {
+            "texto": "ñ\u2028\u2029\"", "fecha": datetime.datetime(2026, 1, 1, 10, 0, 0, 123456),
+            "dia": datetime.date(2026, 1, 1), "decimal": decimal.Decimal("1.50"), "lista": [1, None, True],
+            "grande": 2 ** 70,
+        }
+        self.assertEqual(JSONRapidoRenderer().render(datos), JSONRenderer().render(datos))
+        self.assertEqual(
+            JSONRapidoRenderer().render(datos, "application/json; indent=2"),
+            JSONRenderer().render(datos, "application/json; indent=2"),
+        )
+
+        floats = {"tasa": 0.875, "lista": [1e-05, 1e16, 0.0001, -2.5e-7, 1.7976931348623157e308], "cero": -0.0,
+                  "texto": "2e5 y 0.00001"}
+        self.assertEqual(JSONRapidoRenderer().render(floats), JSONRenderer().render(floats))
+
+    def test_benchmark_de_serializacion(self):
+        resultado = benchmark.medir_serializacion(filas=5, repeticiones=1)
+        self.assertEqual((resultado["filas"], resultado["identico"]), (5, True))
+
+
+# ------------------------------
+# CAMPOS PARCIALES Y CONTENIDO DE LOS PLANES
+# ------------------------------
+class CamposParcialesTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.usuario = Usuarios.objects.create(Nombre="u", Correo="u@x.com", nivel_estudios="uni",
+                                              Dias_Libres="lunes", periodo_prefencia="noche")
+        cls.plan = Planes.objects.create(Usuarios_id=cls.usuario, Nombre="largo", contenido="ñandú " * 5000,
+                                         fuente="ia")
+        materia = Materias.objects.create(Nombre="m", Dificultad="alta")
+        for i in range(3):
+            Sesiones_Estudios.objects.create(Usuarios_id=cls.usuario, Materias_id=materia, Nombre=f"s{i}",
+                                             descripcion="d", duracion=30, estado=False,
+                                             fecha=datetime.date(2026, 1, 1 + i))
+
+    def setUp(self):
+        caches["catalogo"].clear()
+
+    def _consultas(self, url):
+        from django.test.utils import CaptureQueriesContext
+
+        with CaptureQueriesContext(connection) as consultas:
+            respuesta = self.client.get(url)
+        return respuesta, " ".join(q["sql"] for q in consultas)
+
+    def test_omit_no_lee_el_contenido(self):
+        respuesta, sql = self._consultas("/api/planes/?omit=contenido")
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertNotIn("contenido", respuesta.json()[0])
+        self.assertIn("fuente", respuesta.json()[0])
+        self.assertNotIn('"contenido"', sql)
+
+    def test_fields_en_detalle(self):
+        respuesta, sql = self._consultas(f"/api/planes/{self.plan.id}/?fields=estado,id,usuario")
+        # en el orden del serializer, no en el de la consulta
+        self.assertEqual(list(respuesta.json()), ["id", "usuario", "estado"])
+        self.assertNotIn('"contenido"', sql)
+
+    def test_campo_desconocido(self):
+        respuesta = self.client.get("/api/planes/?fields=Nombre,texto")
+        self.assertEqual(respuesta.status_code, 400)
+        self.assertIn("texto", respuesta.json()["fields"])
+
+    def test_campo_de_metodo_lee_todo(self):
+        datos = self.client.get("/api/usuarios/?fields=id,franjas").json()
+        self.assertEqual(datos, [{"id": self.usuario.id, "franjas": ["lunes-noche"]}])
+
+    def test_paginado_con_fields(self):
+        primera = self.client.get("/api/secciones/?page_size=2&fields=Nombre").json()
+        segunda = self.client.get(f"/api/secciones/?page_size=2&fields=Nombre&cursor={primera['next_cursor']}").json()
+        self.assertEqual(primera["results"] + segunda["results"], [{"Nombre": "s0"}, {"Nombre": "s1"}, {"Nombre": "s2"}])
+
+    def test_contenido_en_trozos(self):
+        with self.settings(PLANES_CONTENIDO_TROZO=4000):
+            respuesta, _ = self._consultas(f"/api/planes/{self.plan.id}/contenido/")
+            self.assertEqual(respuesta["Content-Type"], "text/plain; charset=utf-8")
+            with self.assertNumQueries(7):  # 8 trozos de 4000; el primero vino con el largo
+                texto = b"".join(respuesta.streaming_content).decode()
+        self.assertEqual(texto, self.plan.contenido)
+        self.assertEqual(self.client.get("/api/planes/0/contenido/").status_code, 404)
+
+    def test_contenido_cambia_a_mitad(self):
+        from .contenido import ContenidoCambiado
+
+        with self.settings(PLANES_CONTENIDO_TROZO=4000):
+            respuesta = self.client.get(f"/api/planes/{self.plan.id}/contenido/")
+            trozos = iter(respuesta.streaming_content)
+            next(trozos)
+            Planes.objects.filter(pk=self.plan.id).update(
+                contenido="otro", updated_at=self.plan.updated_at + datetime.timedelta(seconds=1)
+            )
+            with self.assertRaises(ContenidoCambiado):
+                next(trozos)
+
+    def test_migracion_comprime_solo_en_mysql(self):
+        import importlib
+
+        migracion = importlib.import_module("administrador.migrations.0008_planes_contenido_comprimido")
+        editor = mock.Mock()
+        for vendor, sentencias in (("sqlite", 0), ("mysql", 1)):
+            editor.reset_mock()
+            editor.connection.vendor = vendor
+            migracion.comprimir(None, editor)
+            self.assertEqual(editor.execute.call_count, sentencias)
+        self.assertIn("ROW_FORMAT=COMPRESSED", editor.execute.call_args[0][0])
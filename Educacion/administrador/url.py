@@ -4,7 +4,8 @@ from .views import (
     UsuariosViewSet,
     MateriasViewSet,
     PlanesViewSet,
-    Sesiones_EstudiosViewSet
+    Sesiones_EstudiosViewSet,
+    buscar
 )
 
 router = DefaultRouter()
@@ -14,5 +15,6 @@ router.register("planes", PlanesViewSet)
 router.register("secciones", Sesiones_EstudiosViewSet, basename="secciones")
 
 urlpatterns = [
+    path("buscar/", buscar),
     path("", include(router.urls))
 ]
\ No newline at end of file
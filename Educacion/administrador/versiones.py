@@ -0,0 +1,53 @@
+import time
+
+from django.db.models import F, Value
+from django.db.models.functions import Greatest
+
+from .models import Versiones_Datos
+
+
+# ------------------------------
+# VERSIONES EN LA BD (ETag, caches)
+# ------------------------------
+# Las caches de listados, estadísticas y recomendaciones se indexan con la
+# versión de lo que usan. La versión es una fila de Versiones_Datos que se
+# incrementa dentro de la transacción que escribe: la ven todos los workers
+# a la vez, no se pierde si la cache expulsa entradas y no cambia antes del
+# commit (nadie puede guardar datos viejos bajo la versión nueva).
+#
+# La versión se lee ANTES que los datos: si cambia entre las dos lecturas,
+# lo que queda en la cache son datos nuevos bajo la versión vieja, que ya
+# nadie vuelve a pedir.
+
+
+def clave_tabla(modelo):
+    return f"tabla:{modelo._meta.db_table}"
+
+
+def clave_usuario(usuario_id):
+    """Versión de las sesiones de un usuario."""
+    return f"usuario:{usuario_id}"
+
+
+def leer(claves, using=None):
+    """{clave: (versión, modificado)}; (0, None) si la clave nunca cambió."""
+    claves = list(claves)
+    filas = Versiones_Datos.objects.using(using).filter(clave__in=claves).values_list("clave", "version", "modificado")
+    encontradas = {clave: (version, modificado) for clave, version, modificado in filas}
+    return {clave: encontradas.get(clave, (0, None)) for clave in claves}
+
+
+def incrementar(claves):
+    claves = sorted({c for c in claves if c})
+    if not claves:
+        return
+    # Last-Modified tiene resolución de segundos: si el cambio cae en el mismo
+    # segundo que el anterior, If-Modified-Since daría un 304 falso
+    ahora = int(time.time())
+    cambios = {"version": F("version") + 1, "modificado": Greatest(Value(ahora), F("modificado") + 1)}
+    filtro = Versiones_Datos.objects.filter(clave__in=claves)
+    if filtro.update(**cambios) < len(claves):
+        # claves nuevas: se crean en 0 y se vuelven a incrementar todas (que
+        # alguna suba dos veces no importa, solo que cambie)
+        Versiones_Datos.objects.bulk_create([Versiones_Datos(clave=c) for c in claves], ignore_conflicts=True)
+        filtro.update(**cambios)
@@ -1,40 +1,283 @@
 # administrador/views.py
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+from rest_framework import status
 from rest_framework import viewsets
+from rest_framework.decorators import action, api_view
+from rest_framework.response import Response
+from rest_framework.exceptions import ValidationError
+
+from Educacion.renderers import JSONRapidoRenderer
+from Educacion.replicas import LecturaEnReplicaMixin, lecturas_en_replica
 from .models import Usuarios, Materias, Planes, Sesiones_Estudios
 from .serializers import (
     UsuariosSerializer,
     MateriasSerializer,
     PlanesSerializer,
-    SeccionEstudioSerializer
+    SeccionEstudioSerializer,
+    choques_del_lote,
 )
+from .pagination import SesionesCursorPagination
+from .bulk import OperacionesEnLoteMixin
+from .contenido import TextoRenderer, respuesta_contenido
+from .busqueda import TIPOS, buscar as buscar_texto
+from .condicional import RespuestaCondicionalMixin
+from .disponibilidad import filtrar_libres, parsear_franja
+from .estadisticas import estadisticas_usuario
+from .exportar import ExportarMixin
+from .parciales import CamposParcialesMixin
+from .planificador import programar
+from .rapido import ListadoRapidoMixin
+from .resumen import aplicar_sesiones
+from .signals import materias_cambiadas_en_lote, sesiones_cambiadas_en_lote
+
+
+def _fecha_param(params, nombre):
+    valor = params.get(nombre)
+    if not valor:
+        return None
+    fecha = parse_date(valor)
+    if fecha is None:
+        raise ValidationError({nombre: "Formato de fecha inválido, usa AAAA-MM-DD."})
+    return fecha
+
+
+def _entero_param(params, nombre, defecto, minimo, maximo):
+    try:
+        valor = int(params.get(nombre, defecto))
+    except (TypeError, ValueError):
+        raise ValidationError({nombre: "Debe ser un número entero."})
+    if not minimo <= valor <= maximo:
+        raise ValidationError({nombre: f"Debe estar entre {minimo} y {maximo}."})
+    return valor
 
 
-class UsuariosViewSet(viewsets.ModelViewSet):
+# ✅ LecturaEnReplicaMixin: los GET leen de una réplica si hay (Educacion/replicas.py)
+# ✅ ListadoRapidoMixin: los listados se arman desde values_list(), sin serializer por fila
+# ✅ CamposParcialesMixin: ?fields= / ?omit= en list y retrieve, leyendo solo esas columnas
+class UsuariosViewSet(LecturaEnReplicaMixin, CamposParcialesMixin, ListadoRapidoMixin, viewsets.ModelViewSet):
     queryset = Usuarios.objects.all()
     serializer_class = UsuariosSerializer
 
+    # ✅ ?libre=martes-noche,jueves-tarde => con disponibilidad y libres en todas esas franjas,
+    # resuelto con el índice de Disponibilidad_Usuarios
+    def get_queryset(self):
+        qs = Usuarios.objects.all()
+        libre = self.request.query_params.get("libre")
+        if libre:
+            try:
+                franjas = [parsear_franja(f) for f in libre.split(",") if f.strip()]
+            except ValueError as e:
+                raise ValidationError({"libre": f"Franja inválida: {e}. Usa dia-periodo, p. ej. martes-noche."})
+            qs = filtrar_libres(qs.filter(disponibilidad=True), franjas)
+        return qs
+
+    # ✅ totales por semana/mes, rachas y distribución, agregados en la BD y en cache
+    @action(detail=True, methods=["get"])
+    def estadisticas(self, request, pk=None):
+        usuario = self.get_object()
+        semanas = _entero_param(request.query_params, "semanas", 12, 1, 104)
+        meses = _entero_param(request.query_params, "meses", 12, 1, 36)
+        return Response(estadisticas_usuario(usuario.id, semanas, meses))
+
 
-class MateriasViewSet(viewsets.ModelViewSet):
+# ✅ ETag/Last-Modified + listados en cache: el catálogo cambia poco
+class MateriasViewSet(LecturaEnReplicaMixin, RespuestaCondicionalMixin, CamposParcialesMixin, ListadoRapidoMixin,
+                      OperacionesEnLoteMixin, viewsets.ModelViewSet):
     queryset = Materias.objects.all()
     serializer_class = MateriasSerializer
+    tablas_version = (Materias,)
+
+    def _avisar(self, objetos):
+        # dentro de la transacción del bulk: la versión nueva se ve con el commit
+        materias_cambiadas_en_lote.send(sender=Materias, materia_ids=[o.pk for o in objetos])
+
+    def despues_de_crear(self, objetos):
+        self._avisar(objetos)
 
+    def despues_de_actualizar(self, anteriores, objetos):
+        self._avisar(objetos)
 
-class PlanesViewSet(viewsets.ModelViewSet):
+    def despues_de_borrar(self, objetos):
+        self._avisar(objetos)
+
+
+class PlanesViewSet(LecturaEnReplicaMixin, RespuestaCondicionalMixin, CamposParcialesMixin, ListadoRapidoMixin,
+                    viewsets.ModelViewSet):
     queryset = Planes.objects.all()
     serializer_class = PlanesSerializer
+    tablas_version = (Planes,)
+
+    def get_queryset(self):
+        qs = Planes.objects.all()
+        usuario_id = self.request.query_params.get("usuario_id")
+        estado = self.request.query_params.get("estado")
+
+        if usuario_id:
+            qs = qs.filter(Usuarios_id_id=usuario_id)
+        if estado is not None:
+            qs = qs.filter(estado=estado.lower() in ("true", "1"))
+
+        return qs
 
+    # ✅ el texto del plan como text/plain en streaming, leído por trozos (administrador/contenido.py);
+    # con ?omit=contenido en el listado, el front lo pide solo al abrir un plan
+    @action(detail=True, methods=["get"], renderer_classes=[JSONRapidoRenderer, TextoRenderer])
+    def contenido(self, request, pk=None):
+        return respuesta_contenido(self.filter_queryset(self.get_queryset()), pk)
 
-class Sesiones_EstudiosViewSet(viewsets.ModelViewSet):
+    # ✅ coloca las sesiones del plan en los huecos libres del usuario (administrador/planificador.py)
+    @action(detail=True, methods=["post"])
+    def programar(self, request, pk=None):
+        plan = self.get_object()
+        datos = request.data
+
+        materia_ids = datos.get("materias")
+        if not isinstance(materia_ids, list) or not materia_ids:
+            raise ValidationError({"materias": "Envía una lista de ids de materias."})
+        try:
+            materia_ids = [int(m) for m in materia_ids]
+        except (TypeError, ValueError):
+            raise ValidationError({"materias": "Los ids deben ser números."})
+        materias = Materias.objects.in_bulk(materia_ids)
+        faltan = [m for m in materia_ids if m not in materias]
+        if faltan:
+            raise ValidationError({"materias": f"No existen: {faltan}."})
+
+        desde = _fecha_param(datos, "desde") or timezone.localdate()
+        semanas = _entero_param(datos, "semanas", 16, 1, 52)
+
+        sesiones, pendientes = programar(plan, list(materias.values()), desde, semanas)
+        # MySQL no devuelve los ids de un bulk_create (igual que en bulk/)
+        con_id = all(s.pk for s in sesiones)
+        return Response({
+            "plan_id": plan.id,
+            "creadas": len(sesiones),
+            "sesiones": [
+                {**({"id": s.pk} if con_id else {}), "materia_id": s.Materias_id_id, "fecha": s.fecha,
+                 "hora_inicio": s.hora_inicio, "duracion": s.duracion}
+                for s in sesiones
+            ],
+            "pendientes": pendientes,
+        }, status=status.HTTP_201_CREATED)
+
+
+class Sesiones_EstudiosViewSet(LecturaEnReplicaMixin, CamposParcialesMixin, ListadoRapidoMixin, ExportarMixin,
+                               OperacionesEnLoteMixin, viewsets.ModelViewSet):
     serializer_class = SeccionEstudioSerializer
+    # ✅ ?page_size=&cursor= => paginación por cursor; sin ellos, lista completa
+    pagination_class = SesionesCursorPagination
+
+    # ✅ exportar/?formato=csv|ndjson con los mismos filtros, en streaming,
+    # en el orden del calendario (sesion_usuario_fecha_idx / sesion_fecha_hora_idx)
+    nombre_exportar = "sesiones"
+    orden_exportar = SesionesCursorPagination.ordering
+    despues_de_exportar = staticmethod(SesionesCursorPagination.despues_de)
+    columnas_exportar = (
+        ("id", "id"),
+        ("usuario_id", "Usuarios_id_id"),
+        ("materia_id", "Materias_id_id"),
+        ("plan_id", "Planes_id_id"),
+        ("nombre", "Nombre"),
+        ("descripcion", "descripcion"),
+        ("duracion", "duracion"),
+        ("estado", "estado"),
+        ("fecha", "fecha"),
+        ("hora_inicio", "hora_inicio"),
+    )
+    columnas_relacionadas = (
+        ("materia", "Materias_id__Nombre"),
+        ("plan", "Planes_id__Nombre"),
+    )
 
     def get_queryset(self):
         qs = Sesiones_Estudios.objects.all()
-        usuario_id = self.request.query_params.get("usuario_id")
-        fecha = self.request.query_params.get("fecha")
+        params = self.request.query_params
+        usuario_id = params.get("usuario_id")
+        fecha = params.get("fecha")
+        desde = _fecha_param(params, "desde")
+        hasta = _fecha_param(params, "hasta")
+        materia_id = params.get("materia_id")
+        plan_id = params.get("plan_id")
+        estado = params.get("estado")
 
         if usuario_id:
             qs = qs.filter(Usuarios_id_id=usuario_id)
         if fecha:
             qs = qs.filter(fecha=fecha)
+        if desde:
+            qs = qs.filter(fecha__gte=desde)
+        if hasta:
+            qs = qs.filter(fecha__lte=hasta)
+        if materia_id:
+            qs = qs.filter(Materias_id_id=materia_id)
+        if plan_id:
+            qs = qs.filter(Planes_id_id=plan_id)
+        if estado is not None:
+            qs = qs.filter(estado=estado.lower() in ("true", "1"))
+
+        return qs.order_by("fecha", "hora_inicio", "id")
+
+    # ✅ PATCH en lote: choques contra la BD y entre los elementos, con un índice;
+    # las sesiones del lote no cuentan con su horario viejo
+    def validar_lote(self, objetos):
+        return choques_del_lote(
+            [(o.Usuarios_id_id, o.fecha, o.hora_inicio, o.duracion) for o in objetos],
+            excluir=[o.pk for o in objetos],
+        )
+
+    # ✅ los bulk no disparan señales por fila: se actualiza el resumen de una vez
+    def _avisar(self, *grupos):
+        usuario_ids = {s.Usuarios_id_id for grupo in grupos for s in grupo}
+        # dentro de la transacción del bulk, como las señales por fila
+        sesiones_cambiadas_en_lote.send(sender=Sesiones_Estudios, usuario_ids=usuario_ids)
+
+    def despues_de_crear(self, objetos):
+        aplicar_sesiones(objetos, 1)
+        self._avisar(objetos)
+
+    def despues_de_actualizar(self, anteriores, objetos):
+        aplicar_sesiones(anteriores, -1)
+        aplicar_sesiones(objetos, 1)
+        self._avisar(anteriores, objetos)
+
+    def despues_de_borrar(self, objetos):
+        aplicar_sesiones(objetos, -1)
+        self._avisar(objetos)
+
+
+# ✅ búsqueda con el índice de texto completo de la BD (administrador/busqueda.py)
+#   GET ?q=&tipo=materias|planes&usuario_id=&page=&page_size=
+@api_view(["GET"])
+def buscar(request):
+    params = request.query_params
+    consulta = params.get("q", "").strip()
+    if not consulta:
+        raise ValidationError({"q": "Escribe algo para buscar."})
+
+    tipo = params.get("tipo")
+    if tipo and tipo not in TIPOS:
+        raise ValidationError({"tipo": f"Usa uno de: {', '.join(TIPOS)}."})
+    usuario_id = params.get("usuario_id")
+    if usuario_id is not None and not usuario_id.isdigit():
+        raise ValidationError({"usuario_id": "Debe ser un número entero."})
+
+    pagina = _entero_param(params, "page", 1, 1, 1000)
+    tamano = _entero_param(params, "page_size", 20, 1, 100)
+
+    with lecturas_en_replica():
+        resultados, hay_mas = buscar_texto(
+            consulta,
+            tipos=[tipo] if tipo else None,
+            usuario_id=int(usuario_id) if usuario_id else None,
+            desde=(pagina - 1) * tamano,
+            limite=tamano,
+        )
 
-        return qs.order_by("fecha", "hora_inicio")
+    return Response({
+        "q": consulta,
+        "page": pagina,
+        "page_size": tamano,
+        "siguiente": pagina + 1 if hay_mas else None,
+        "resultados": resultados,
+    })
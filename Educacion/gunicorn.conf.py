@@ -0,0 +1,19 @@
+# gunicorn Educacion.wsgi -c gunicorn.conf.py
+import os
+
+bind = os.getenv("GUNICORN_BIND", "0.0.0.0:8000")
+workers = int(os.getenv("GUNICORN_WORKERS", "4"))
+
+
+def post_fork(server, worker):
+    # ✅ cada worker crea su cliente de Gemini al arrancar y no en la 1a petición
+    import django
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'Educacion.settings')
+    django.setup()
+
+    from inteligencia.services import calentar_cliente
+
+    try:
+        calentar_cliente(verificar=os.getenv("GEMINI_WARMUP_CHECK") == "1")
+    except Exception as e:
+        worker.log.warning(f"No se pudo calentar el cliente de Gemini: {e}")
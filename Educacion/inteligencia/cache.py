@@ -0,0 +1,95 @@
+import hashlib
+import threading
+
+from django.conf import settings
+from django.core.cache import caches
+
+from administrador import versiones
+from administrador.condicional import tabla_modificada, version_tabla
+from administrador.models import Materias
+
+
+# ------------------------------
+# CACHE DE RECOMENDACIONES
+# ------------------------------
+# La clave es el sha256 del prompt ya renderizado (contexto + pregunta).
+# Además se mezcla la versión de las sesiones del usuario y la del catálogo
+# de materias (administrador/versiones.py): están en la BD y suben en la
+# misma transacción que cambia los datos, así que valen para todos los
+# workers y no se reinician si la cache expulsa algo. Las entradas viejas
+# dejan de ser alcanzables y el backend las expulsa por TTL/LRU.
+#
+# La versión se lee antes que el contexto y en el mismo bloque
+# lecturas_en_replica() (misma réplica): una réplica atrasada no puede dejar
+# un contexto viejo bajo la versión nueva.
+
+_PREFIJO = "ia:rec"
+
+_lock = threading.Lock()
+_contadores = {"hits": 0, "misses": 0}
+
+
+def _cache():
+    return caches[getattr(settings, "IA_CACHE_ALIAS", "default")]
+
+
+def generacion_catalogo() -> int:
+    return version_tabla(Materias)[0]
+
+
+def normalizar_pregunta(pregunta: str) -> str:
+    return " ".join(str(pregunta).split())
+
+
+def version_recomendacion(usuario_id: int) -> str:
+    """Versión de las sesiones del usuario y del catálogo; se lee antes que el contexto."""
+    clave_usuario, clave_catalogo = versiones.clave_usuario(usuario_id), versiones.clave_tabla(Materias)
+    leidas = versiones.leer([clave_usuario, clave_catalogo])
+    return f"{leidas[clave_usuario][0]}:{leidas[clave_catalogo][0]}"
+
+
+def clave_recomendacion(usuario_id: int, prompt: str, version: str = None) -> str:
+    huella = hashlib.sha256(prompt.encode("utf-8")).hexdigest()
+    if version is None:
+        version = version_recomendacion(usuario_id)
+    return f"{_PREFIJO}:{usuario_id}:{version}:{huella}"
+
+
+def obtener_recomendacion(clave: str):
+    valor = _cache().get(clave)
+    with _lock:
+        if valor is None:
+            _contadores["misses"] += 1
+        else:
+            _contadores["hits"] += 1
+    return valor
+
+
+def guardar_recomendacion(clave: str, respuesta: str):
+    _cache().set(clave, respuesta)
+
+
+def invalidar_usuario(usuario_id: int):
+    versiones.incrementar([versiones.clave_usuario(usuario_id)])
+
+
+def invalidar_catalogo():
+    tabla_modificada(Materias)
+
+
+def estadisticas() -> dict:
+    with _lock:
+        hits = _contadores["hits"]
+        misses = _contadores["misses"]
+    total = hits + misses
+    return {
+        "hits": hits,
+        "misses": misses,
+        "ratio": round(hits / total, 4) if total else 0.0,
+    }
+
+
+def reiniciar_estadisticas():
+    with _lock:
+        _contadores["hits"] = 0
+        _contadores["misses"] = 0
@@ -0,0 +1,216 @@
+import asyncio
+import threading
+import time
+import uuid
+import weakref
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+
+from .cache import _cache
+
+
+# ------------------------------
+# SINGLE-FLIGHT
+# ------------------------------
+# Si llegan varias peticiones con la misma huella (la clave de cache del
+# prompt) mientras una ya está llamando a Gemini, las demás esperan esa
+# misma llamada en vez de lanzar la suya.
+#  - Dentro del proceso: el primer hilo (líder) hace la llamada y el resto
+#    espera un Event.
+#  - Entre procesos: el líder toma un lock en la cache compartida con add();
+#    los líderes de otros procesos ven el lock y esperan a que aparezca el
+#    resultado bajo el token de ese lock. Requiere que el alias de cache de
+#    la IA sea compartido (Redis, Memcached, BD); con LocMemCache solo hay
+#    coalescencia dentro del proceso.
+# Si el líder falla, el error llega a todos los que esperaban. Si en la
+# versión async se cancela el líder, uno de los que esperaban toma su lugar.
+
+class EsperaAgotada(Exception):
+    pass
+
+
+class ErrorCompartido(RuntimeError):
+    """Error de la llamada hecha por el líder en otro proceso."""
+
+
+def _timeout():
+    return getattr(settings, "IA_COALESCENCIA_TIMEOUT", 60)
+
+
+def _ttl_lock():
+    return getattr(settings, "IA_COALESCENCIA_LOCK_TTL", 90)
+
+
+_INTERVALO = 0.1
+_TTL_RESULTADO = 30
+
+
+def _clave_lock(clave):
+    return f"{clave}:vuelo"
+
+
+def _clave_resultado(clave, token):
+    return f"{clave}:vuelo:{token}"
+
+
+def _publicar(clave, token, valor):
+    _cache().set(_clave_resultado(clave, token), valor, _TTL_RESULTADO)
+
+
+def _leer(valor):
+    if "error" in valor:
+        raise ErrorCompartido(valor["error"])
+    return valor["resultado"]
+
+
+# -- versión con hilos --------------------------------------------------------
+
+class _Vuelo:
+    def __init__(self):
+        self.evento = threading.Event()
+        self.resultado = None
+        self.error = None
+
+
+_lock = threading.Lock()
+_vuelos = {}
+
+
+def compartir(clave: str, funcion, timeout=None):
+    timeout = timeout or _timeout()
+
+    with _lock:
+        vuelo = _vuelos.get(clave)
+        lider = vuelo is None
+        if lider:
+            vuelo = _vuelos[clave] = _Vuelo()
+
+    if not lider:
+        if not vuelo.evento.wait(timeout):
+            raise EsperaAgotada("Se agotó la espera de la llamada en curso.")
+        if vuelo.error is not None:
+            raise vuelo.error
+        return vuelo.resultado
+
+    try:
+        vuelo.resultado = _entre_procesos(clave, funcion, time.monotonic() + timeout)
+        return vuelo.resultado
+    except BaseException as e:
+        vuelo.error = e
+        raise
+    finally:
+        with _lock:
+            _vuelos.pop(clave, None)
+        vuelo.evento.set()
+
+
+def _entre_procesos(clave, funcion, limite):
+    cache = _cache()
+    while True:
+        token = uuid.uuid4().hex
+        if cache.add(_clave_lock(clave), token, timeout=_ttl_lock()):
+            try:
+                try:
+                    resultado = funcion()
+                except Exception as e:
+                    _publicar(clave, token, {"error": f"{type(e).__name__}: {e}"})
+                    raise
+                _publicar(clave, token, {"resultado": resultado})
+                return resultado
+            finally:
+                if cache.get(_clave_lock(clave)) == token:
+                    cache.delete(_clave_lock(clave))
+
+        # otro proceso tiene el lock: esperar su resultado
+        token_lider = cache.get(_clave_lock(clave))
+        while token_lider is not None and time.monotonic() < limite:
+            valor = cache.get(_clave_resultado(clave, token_lider))
+            if valor is not None:
+                return _leer(valor)
+            time.sleep(_INTERVALO)
+            if cache.get(_clave_lock(clave)) != token_lider:
+                # el líder terminó: su resultado ya debería estar publicado
+                valor = cache.get(_clave_resultado(clave, token_lider))
+                if valor is not None:
+                    return _leer(valor)
+                break
+        if time.monotonic() >= limite:
+            raise EsperaAgotada("Se agotó la espera de la llamada en curso.")
+        # el lock se liberó sin resultado (el líder murió): lo intentamos nosotros
+
+
+# -- versión async ----------------------------------------------------------------
+
+_vuelos_async = weakref.WeakKeyDictionary()
+
+
+async def compartir_async(clave: str, corrutina, timeout=None):
+    """Igual que compartir(), pero `corrutina` es una función async sin argumentos."""
+    timeout = timeout or _timeout()
+    limite = time.monotonic() + timeout
+    vuelos = _vuelos_async.setdefault(asyncio.get_running_loop(), {})
+
+    while True:
+        futuro = vuelos.get(clave)
+        if futuro is None:
+            break
+        try:
+            return await asyncio.wait_for(asyncio.shield(futuro), max(0, limite - time.monotonic()))
+        except asyncio.TimeoutError:
+            raise EsperaAgotada("Se agotó la espera de la llamada en curso.")
+        except asyncio.CancelledError:
+            # si el cancelado fue el líder (p.ej. su petición se cortó) y no
+            # esta tarea, se vuelve a empezar: el primero que llegue es el
+            # nuevo líder y el resto lo espera a él
+            if not futuro.cancelled():
+                raise
+
+    futuro = vuelos[clave] = asyncio.get_running_loop().create_future()
+    try:
+        resultado = await _entre_procesos_async(clave, corrutina, limite)
+        futuro.set_result(resultado)
+        return resultado
+    except asyncio.CancelledError:
+        futuro.cancel()
+        raise
+    except Exception as e:
+        futuro.set_exception(e)
+        # evita el aviso "exception was never retrieved" si nadie esperaba
+        futuro.exception()
+        raise
+    finally:
+        if vuelos.get(clave) is futuro:
+            vuelos.pop(clave)
+
+
+async def _entre_procesos_async(clave, corrutina, limite):
+    cache = _cache()
+    while True:
+        token = uuid.uuid4().hex
+        if await sync_to_async(cache.add)(_clave_lock(clave), token, timeout=_ttl_lock()):
+            try:
+                try:
+                    resultado = await corrutina()
+                except Exception as e:
+                    await sync_to_async(_publicar)(clave, token, {"error": f"{type(e).__name__}: {e}"})
+                    raise
+                await sync_to_async(_publicar)(clave, token, {"resultado": resultado})
+                return resultado
+            finally:
+                if await sync_to_async(cache.get)(_clave_lock(clave)) == token:
+                    await sync_to_async(cache.delete)(_clave_lock(clave))
+
+        token_lider = await sync_to_async(cache.get)(_clave_lock(clave))
+        while token_lider is not None and time.monotonic() < limite:
+            valor = await sync_to_async(cache.get)(_clave_resultado(clave, token_lider))
+            if valor is not None:
+                return _leer(valor)
+            await asyncio.sleep(_INTERVALO)
+            if await sync_to_async(cache.get)(_clave_lock(clave)) != token_lider:
+                valor = await sync_to_async(cache.get)(_clave_resultado(clave, token_lider))
+                if valor is not None:
+                    return _leer(valor)
+                break
+        if time.monotonic() >= limite:
+            raise EsperaAgotada("Se agotó la espera de la llamada en curso.")
@@ -0,0 +1,79 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+# ------------------------------
+# SERVIDOR GEMINI FALSO (pruebas de carga)
+# ------------------------------
+# Responde a generateContent / streamGenerateContent con el mismo formato
+# que la API real después de `latencia_ms`, así el cliente de services.py
+# hace la llamada HTTP completa sin gastar cuota. Se usa apuntando
+# GEMINI_BASE_URL a la url que devuelve iniciar().
+
+TEXTO = (
+    "- Materia recomendada: Matemáticas\n"
+    "- Por qué (3 razones):\n  1. Falso.\n  2. Falso.\n  3. Falso.\n"
+    "- 2 alternativas: Física, Química\n"
+    "- Plan de acción para hoy (pasos concretos):\n  1. Estudiar 25 minutos."
+)
+
+
+def _respuesta(texto):
+    return {
+        "candidates": [{
+            "content": {"role": "model", "parts": [{"text": texto}]},
+            "finishReason": "STOP",
+            "index": 0,
+        }],
+        "usageMetadata": {"promptTokenCount": 1, "candidatesTokenCount": 1, "totalTokenCount": 2},
+    }
+
+
+class _Manejador(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length") or 0))
+        time.sleep(self.server.latencia)
+        self.server.llamadas += 1
+
+        if ":streamGenerateContent" in self.path:
+            partes = [TEXTO[i:i + 40] for i in range(0, len(TEXTO), 40)]
+            cuerpo = "".join(f"data: {json.dumps(_respuesta(p))}\r\n\r\n" for p in partes).encode()
+            tipo = "text/event-stream"
+        elif ":generateContent" in self.path:
+            cuerpo = json.dumps(_respuesta(TEXTO)).encode()
+            tipo = "application/json"
+        else:
+            self.send_error(404)
+            return
+
+        self.send_response(200)
+        self.send_header("Content-Type", tipo)
+        self.send_header("Content-Length", str(len(cuerpo)))
+        self.end_headers()
+        self.wfile.write(cuerpo)
+
+    def do_GET(self):
+        # models.get (calentar_cliente(verificar=True))
+        cuerpo = json.dumps({"name": self.path.rsplit("/", 1)[-1]}).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(cuerpo)))
+        self.end_headers()
+        self.wfile.write(cuerpo)
+
+    def log_message(self, *args):
+        pass
+
+
+def iniciar(latencia_ms=300, puerto=0):
+    """Arranca el servidor en un hilo. Devuelve (url, servidor); servidor.shutdown() lo detiene."""
+    servidor = ThreadingHTTPServer(("127.0.0.1", puerto), _Manejador)
+    servidor.daemon_threads = True
+    servidor.latencia = latencia_ms / 1000
+    servidor.llamadas = 0
+    threading.Thread(target=servidor.serve_forever, daemon=True).start()
+    return f"http://127.0.0.1:{servidor.server_address[1]}", servidor
@@ -0,0 +1,194 @@
+import heapq
+import math
+import re
+import threading
+import unicodedata
+from collections import Counter, defaultdict
+
+from django.conf import settings
+from django.db import transaction
+
+from administrador.models import Materias
+from Educacion.replicas import lecturas_en_replica
+
+from . import cache
+
+
+# ------------------------------
+# ÍNDICE DE RELEVANCIA (BM25) SOBRE MATERIAS
+# ------------------------------
+# Índice invertido en memoria: término -> {materia_id: frecuencia}. Buscar
+# solo recorre las listas de los términos de la consulta, así que el costo
+# depende de la consulta y no del tamaño del catálogo. Se sincroniza de
+# forma incremental: cuando cambia la versión del catálogo (la misma que
+# invalida la cache de recomendaciones) se leen (id, updated_at) de todas
+# las materias y se vuelven a pedir solo las que cambiaron o faltan; las que
+# ya no están se quitan. Se compara el updated_at de cada fila con el que se
+# indexó, no con una marca de agua: una transacción que confirma tarde o
+# un reloj adelantado en otro servidor no dejan filas sin ver.
+
+K1 = 1.5
+B = 0.75
+PESO_NOMBRE = 3      # los términos del nombre cuentan como 3 apariciones
+PESO_HISTORIAL = 0.5  # peso de las materias que el usuario ya estudia
+_LOTE = 1000          # ids por consulta IN al resincronizar
+
+_STOPWORDS = {
+    "a", "al", "ante", "con", "de", "del", "el", "en", "es", "la", "las", "lo", "los",
+    "me", "mi", "para", "por", "que", "se", "su", "un", "una", "y", "o", "como", "cual",
+    "debo", "hoy", "quiero", "puedo", "estudiar", "materia", "materias", "recomiendas",
+}
+
+
+def tokenizar(texto: str):
+    texto = unicodedata.normalize("NFKD", (texto or "").lower())
+    texto = "".join(c for c in texto if not unicodedata.combining(c))
+    return [t for t in re.findall(r"\w+", texto) if len(t) > 1 and t not in _STOPWORDS]
+
+
+class IndiceMaterias:
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self.postings = defaultdict(dict)
+        self.longitudes = {}
+        self.terminos = {}
+        self.datos = {}
+        self.total_longitud = 0
+        self.generacion = None
+        self.indexadas = {}  # materia_id -> updated_at indexado
+
+    # -- mantenimiento -----------------------------------------------------
+
+    def agregar(self, materia_id, nombre, dificultad, notas):
+        with self._lock:
+            self.quitar(materia_id)
+            frecuencias = Counter(tokenizar(notas))
+            for t in tokenizar(nombre):
+                frecuencias[t] += PESO_NOMBRE
+            for t, tf in frecuencias.items():
+                self.postings[t][materia_id] = tf
+            longitud = sum(frecuencias.values())
+            self.longitudes[materia_id] = longitud
+            self.terminos[materia_id] = list(frecuencias)
+            self.datos[materia_id] = {"Nombre": nombre, "Dificultad": dificultad}
+            self.total_longitud += longitud
+
+    def quitar(self, materia_id):
+        with self._lock:
+            for t in self.terminos.pop(materia_id, ()):
+                lista = self.postings.get(t)
+                if lista is not None:
+                    lista.pop(materia_id, None)
+                    if not lista:
+                        del self.postings[t]
+            self.total_longitud -= self.longitudes.pop(materia_id, 0)
+            self.datos.pop(materia_id, None)
+            self.indexadas.pop(materia_id, None)
+
+    def sincronizar(self):
+        # el índice es de todo el proceso: siempre contra la primaria, una
+        # réplica atrasada lo haría ir hacia atrás
+        with lecturas_en_replica(False):
+            self._sincronizar()
+
+    def _sincronizar(self):
+        generacion = cache.generacion_catalogo()
+        if generacion == self.generacion:
+            return
+
+        with self._lock:
+            if generacion == self.generacion:
+                return
+            if not self.indexadas:
+                lotes = [Materias.objects.all()]
+            else:
+                vigentes = dict(Materias.objects.values_list("id", "updated_at"))
+                for materia_id in set(self.indexadas) - set(vigentes):
+                    self.quitar(materia_id)
+                # nuevas (también las de bulk_create) y modificadas
+                cambiadas = [i for i, t in vigentes.items() if self.indexadas.get(i) != t]
+                lotes = [
+                    Materias.objects.filter(id__in=cambiadas[i:i + _LOTE])
+                    for i in range(0, len(cambiadas), _LOTE)
+                ]
+
+            for qs in lotes:
+                for m in qs.values("id", "Nombre", "Dificultad", "Notas", "updated_at").iterator(chunk_size=2000):
+                    self.agregar(m["id"], m["Nombre"], m["Dificultad"], m["Notas"])
+                    self.indexadas[m["id"]] = m["updated_at"]
+            # dentro de una transacción la versión leída puede deshacerse y
+            # volver a salir con otros datos: no se recuerda, se resincroniza
+            if not transaction.get_connection().in_atomic_block:
+                self.generacion = generacion
+
+    # -- consulta ------------------------------------------------------------
+
+    def buscar(self, consulta: dict, k: int):
+        """consulta: {término: peso}. Devuelve [(materia_id, puntaje)] ordenado."""
+        with self._lock:
+            n = len(self.longitudes)
+            if not n:
+                return []
+            promedio = self.total_longitud / n
+            puntajes = defaultdict(float)
+            for t, peso in consulta.items():
+                lista = self.postings.get(t)
+                if not lista:
+                    continue
+                idf = math.log(1 + (n - len(lista) + 0.5) / (len(lista) + 0.5))
+                for materia_id, tf in lista.items():
+                    norma = K1 * (1 - B + B * self.longitudes[materia_id] / promedio)
+                    puntajes[materia_id] += peso * idf * tf * (K1 + 1) / (tf + norma)
+        return heapq.nsmallest(k, puntajes.items(), key=lambda p: (-p[1], p[0]))
+
+
+_indice = IndiceMaterias()
+
+
+def obtener_indice() -> IndiceMaterias:
+    _indice.sincronizar()
+    return _indice
+
+
+def _tokens_estimados(texto: str) -> int:
+    return len(texto) // 4 + 1
+
+
+def seleccionar_materias(pregunta: str, historial=(), indice=None):
+    """
+    Las materias más relevantes para la pregunta y el historial del usuario,
+    hasta IA_MATERIAS_TOP_K o hasta agotar IA_PRESUPUESTO_TOKENS_MATERIAS.
+    Si no hay suficientes coincidencias se completa con el resto del catálogo.
+    `indice`: uno ya sincronizado (para varios usuarios seguidos); si no, se
+    sincroniza ahora.
+    """
+    k = getattr(settings, "IA_MATERIAS_TOP_K", 30)
+    presupuesto = getattr(settings, "IA_PRESUPUESTO_TOKENS_MATERIAS", 1500)
+
+    consulta = Counter(tokenizar(pregunta))
+    for nombre in historial:
+        for t in tokenizar(nombre):
+            consulta[t] += PESO_HISTORIAL
+
+    indice = indice or obtener_indice()
+    elegidas = [materia_id for materia_id, _ in indice.buscar(consulta, k)]
+    if len(elegidas) < k:
+        with indice._lock:
+            vistos = set(elegidas)
+            for materia_id in indice.datos:
+                if len(elegidas) >= k:
+                    break
+                if materia_id not in vistos:
+                    elegidas.append(materia_id)
+
+    materias, usados = [], 0
+    for materia_id in elegidas:
+        m = indice.datos.get(materia_id)
+        if m is None:
+            continue
+        usados += _tokens_estimados(f"- {m['Nombre']} (Dificultad: {m['Dificultad']})")
+        if usados > presupuesto and materias:
+            break
+        materias.append(m)
+    return materias
@@ -0,0 +1,95 @@
+import unicodedata
+
+
+# ------------------------------
+# RECOMENDADOR LOCAL (sin LLM)
+# ------------------------------
+# Ordena las materias que ya eligió el contexto (las relevantes para la
+# pregunta, en orden de relevancia) combinando:
+#   - relevancia: la posición que les dio el índice BM25
+#   - dificultad: qué tan cerca está de lo que corresponde al nivel de estudios
+#   - equilibrio: se prefieren materias con menos minutos acumulados
+# Es determinista y solo usa datos ya cargados, así que responde en
+# milisegundos. Devuelve el mismo formato que se le pide a Gemini.
+
+PESO_RELEVANCIA = 0.5
+PESO_DIFICULTAD = 0.3
+PESO_EQUILIBRIO = 0.2
+
+_DIFICULTADES = {
+    "baja": 1, "facil": 1, "basica": 1,
+    "media": 2, "intermedia": 2, "normal": 2,
+    "alta": 3, "dificil": 3, "avanzada": 3,
+}
+
+_NIVELES = {
+    "primaria": 1, "secundaria": 1, "bachillerato": 2, "preparatoria": 2, "prepa": 2,
+    "tecnico": 2, "universidad": 3, "universitario": 3, "licenciatura": 3, "grado": 3,
+    "ingenieria": 3, "maestria": 3, "posgrado": 3, "doctorado": 3,
+}
+
+
+def _normalizar(texto) -> str:
+    texto = unicodedata.normalize("NFKD", str(texto or "").lower())
+    return "".join(c for c in texto if not unicodedata.combining(c))
+
+
+def _buscar(tabla, texto, defecto=2) -> int:
+    texto = _normalizar(texto)
+    for palabra, valor in tabla.items():
+        if palabra in texto:
+            return valor
+    return defecto
+
+
+def puntuar_materias(usuario, resumen, materias):
+    """[(puntaje, materia, minutos)] de mayor a menor."""
+    minutos_por_materia = {r["Materias_id__Nombre"]: r["minutos"] or 0 for r in resumen}
+    nivel = _buscar(_NIVELES, usuario.nivel_estudios)
+    # de noche se rinde menos: se baja un punto la dificultad ideal
+    if "noche" in _normalizar(usuario.periodo_prefencia):
+        nivel = max(1, nivel - 1)
+
+    puntuadas = []
+    for posicion, m in enumerate(materias):
+        minutos = minutos_por_materia.get(m["Nombre"], 0)
+        dificultad = _buscar(_DIFICULTADES, m["Dificultad"])
+        puntaje = (
+            PESO_RELEVANCIA / (1 + posicion)
+            + PESO_DIFICULTAD * (1 - abs(dificultad - nivel) / 2)
+            + PESO_EQUILIBRIO / (1 + minutos / 60)
+        )
+        puntuadas.append((round(puntaje, 6), m, minutos))
+
+    puntuadas.sort(key=lambda p: (-p[0], p[1]["Nombre"]))
+    return puntuadas
+
+
+def recomendar_local(usuario, resumen, materias) -> str:
+    puntuadas = puntuar_materias(usuario, resumen, materias)
+    if not puntuadas:
+        return "- Materia recomendada: ninguna (no hay materias registradas en el sistema)"
+
+    _, elegida, minutos = puntuadas[0]
+    alternativas = [m["Nombre"] for _, m, _ in puntuadas[1:3]]
+    periodo = usuario.periodo_prefencia or "tu horario disponible"
+
+    razones = [
+        f"Es de las materias más relacionadas con tu pregunta entre las {len(materias)} consideradas.",
+        f"Su dificultad ({elegida['Dificultad']}) encaja con tu nivel de estudios ({usuario.nivel_estudios}).",
+        (f"Llevas solo {minutos} minutos en ella; conviene equilibrar tu historial."
+         if minutos else "Todavía no la has estudiado; es buen momento para empezar."),
+    ]
+
+    lineas = [
+        f"- Materia recomendada: {elegida['Nombre']}",
+        "- Por qué (3 razones):",
+        *[f"  {i}. {r}" for i, r in enumerate(razones, 1)],
+        f"- 2 alternativas: {', '.join(alternativas) if alternativas else 'no hay más materias disponibles'}",
+        "- Plan de acción para hoy (pasos concretos):",
+        f"  1. Reserva un bloque de 25 minutos en {periodo} para {elegida['Nombre']}.",
+        "  2. Repasa tus notas o el temario del último tema visto.",
+        "  3. Resuelve 3 ejercicios y anota las dudas.",
+        "  4. Descansa 5 minutos y cierra con un resumen de lo aprendido.",
+    ]
+    return "\n".join(lineas)
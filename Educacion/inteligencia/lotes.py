@@ -0,0 +1,110 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.db import transaction
+from django.utils import timezone
+
+from administrador.models import Usuarios
+
+from .cache import normalizar_pregunta
+from .models import Lotes_Recomendaciones, Recomendaciones
+from .services import gemini_responder
+from .utils import construir_contextos, construir_prompt
+
+
+# ------------------------------
+# RECOMENDACIONES EN LOTE
+# ------------------------------
+# Recorre los usuarios con disponibilidad=True por id, en bloques. Cada
+# bloque arma sus contextos con consultas agrupadas, reparte las llamadas al
+# modelo en un pool de hilos (con límite de llamadas por segundo), guarda
+# los resultados con bulk_create y avanza el punto de control del lote.
+# Si el proceso muere, ejecutar_lote(lote=...) sigue desde ese punto.
+
+class LimitadorTasa:
+    """Deja pasar como mucho `por_segundo` llamadas por segundo entre todos los hilos."""
+
+    def __init__(self, por_segundo: float):
+        self.intervalo = 1.0 / por_segundo if por_segundo else 0
+        self._lock = threading.Lock()
+        self._siguiente = time.monotonic()
+
+    def esperar(self):
+        if not self.intervalo:
+            return
+        with self._lock:
+            ahora = time.monotonic()
+            turno = max(ahora, self._siguiente)
+            self._siguiente = turno + self.intervalo
+        if turno > ahora:
+            time.sleep(turno - ahora)
+
+
+def crear_lote(pregunta: str) -> Lotes_Recomendaciones:
+    return Lotes_Recomendaciones.objects.create(pregunta=normalizar_pregunta(pregunta))
+
+
+def ejecutar_lote(lote, responder=gemini_responder, tam_bloque=200, hilos=8,
+                  por_segundo=None, progreso=None, limite=None):
+    """
+    Procesa (o reanuda) el lote. `responder` recibe un prompt y devuelve el
+    texto; en pruebas se puede pasar un stub. `progreso(lote, por_segundo)`
+    se llama después de cada bloque.
+    """
+    limitador = LimitadorTasa(por_segundo)
+    inicio = time.monotonic()
+    procesados_al_inicio = lote.procesados
+
+    def llamar(prompt):
+        limitador.esperar()
+        try:
+            return responder(prompt), ""
+        except Exception as e:
+            return "", str(e)
+
+    lote.estado = "en_curso"
+    lote.save(update_fields=["estado", "updated_at"])
+
+    with ThreadPoolExecutor(max_workers=hilos) as pool:
+        while limite is None or lote.procesados - procesados_al_inicio < limite:
+            tam = tam_bloque
+            if limite is not None:
+                tam = min(tam, limite - (lote.procesados - procesados_al_inicio))
+
+            usuarios = list(
+                Usuarios.objects.filter(disponibilidad=True, id__gt=lote.ultimo_usuario_id)
+                .order_by("id")
+                .only("id", "Nombre", "nivel_estudios", "disponibilidad", "Dias_Libres", "periodo_prefencia")[:tam]
+            )
+            if not usuarios:
+                break
+
+            contextos = construir_contextos(usuarios, lote.pregunta)
+            prompts = [construir_prompt(contextos[u.id], lote.pregunta) for u in usuarios]
+            resultados = list(pool.map(llamar, prompts))
+
+            with transaction.atomic():
+                Recomendaciones.objects.bulk_create([
+                    Recomendaciones(
+                        Usuarios_id_id=u.id, Lotes_id=lote, pregunta=lote.pregunta,
+                        recomendacion=texto, error=error
+                    )
+                    for u, (texto, error) in zip(usuarios, resultados)
+                ])
+                lote.ultimo_usuario_id = usuarios[-1].id
+                lote.procesados += len(usuarios)
+                lote.errores += sum(1 for _, error in resultados if error)
+                lote.save(update_fields=["ultimo_usuario_id", "procesados", "errores", "updated_at"])
+
+            if progreso:
+                transcurrido = time.monotonic() - inicio
+                progreso(lote, (lote.procesados - procesados_al_inicio) / transcurrido if transcurrido else 0)
+        else:
+            # se alcanzó `limite`: el lote queda en_curso para reanudarlo
+            return lote
+
+    lote.estado = "terminado"
+    lote.terminado_at = timezone.now()
+    lote.save(update_fields=["estado", "terminado_at", "updated_at"])
+    return lote
@@ -0,0 +1,53 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from inteligencia.lotes import crear_lote, ejecutar_lote
+from inteligencia.models import Lotes_Recomendaciones
+from inteligencia.services import gemini_responder
+
+
+class Command(BaseCommand):
+    help = "Genera una recomendación para cada usuario con disponibilidad=True."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--pregunta", default="¿Qué materia me recomiendas estudiar hoy?")
+        parser.add_argument("--reanudar", type=int, metavar="LOTE_ID",
+                            help="Continúa un lote desde su último punto de control.")
+        parser.add_argument("--bloque", type=int, default=200, help="Usuarios por bloque.")
+        parser.add_argument("--hilos", type=int, default=8, help="Llamadas simultáneas al modelo.")
+        parser.add_argument("--por-segundo", type=float, default=None, help="Máximo de llamadas por segundo.")
+        parser.add_argument("--limite", type=int, default=None, help="Procesa como mucho N usuarios y se detiene.")
+        parser.add_argument("--simular", action="store_true",
+                            help="No llama a Gemini; guarda una respuesta fija (para medir tiempos).")
+
+    def handle(self, *args, **opciones):
+        if opciones["reanudar"]:
+            try:
+                lote = Lotes_Recomendaciones.objects.get(id=opciones["reanudar"])
+            except Lotes_Recomendaciones.DoesNotExist:
+                raise CommandError(f"No existe el lote {opciones['reanudar']}.")
+            if lote.estado == "terminado":
+                raise CommandError(f"El lote {lote.id} ya terminó.")
+        else:
+            lote = crear_lote(opciones["pregunta"])
+
+        responder = (lambda prompt: "(simulado)") if opciones["simular"] else gemini_responder
+
+        def progreso(lote, por_segundo):
+            self.stdout.write(
+                f"lote={lote.id} procesados={lote.procesados} errores={lote.errores} "
+                f"ultimo_usuario={lote.ultimo_usuario_id} {por_segundo:.1f} usuarios/s"
+            )
+
+        self.stdout.write(f"Lote {lote.id}: desde usuario {lote.ultimo_usuario_id}")
+        lote = ejecutar_lote(
+            lote,
+            responder=responder,
+            tam_bloque=opciones["bloque"],
+            hilos=opciones["hilos"],
+            por_segundo=opciones["por_segundo"],
+            progreso=progreso,
+            limite=opciones["limite"],
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f"Lote {lote.id} {lote.estado}: {lote.procesados} procesados, {lote.errores} errores."
+        ))
@@ -0,0 +1,64 @@
+import multiprocessing
+import signal
+import threading
+
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from inteligencia.trabajos import ejecutar_trabajador, nombre_trabajador
+
+
+def _trabajar(opciones):
+    detenido = threading.Event()
+    # SIGTERM/SIGINT: termina el trabajo en curso y sale
+    signal.signal(signal.SIGTERM, lambda *_: detenido.set())
+    signal.signal(signal.SIGINT, lambda *_: detenido.set())
+    responder = (lambda prompt: "(simulado)") if opciones["simular"] else None
+    return ejecutar_trabajador(
+        trabajador=nombre_trabajador(),
+        responder=responder,
+        cantidad=opciones["lote"],
+        espera=opciones["espera"],
+        detener=detenido.is_set,
+        una_vez=opciones["una_vez"],
+    )
+
+
+class Command(BaseCommand):
+    help = "Procesa la cola de /api/ia/trabajos/ (inteligencia/trabajos.py)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--procesos", type=int, default=1, help="Procesos trabajadores.")
+        parser.add_argument("--lote", type=int, default=1, help="Trabajos que reclama cada proceso a la vez.")
+        parser.add_argument("--espera", type=float, default=1.0, help="Segundos entre consultas con la cola vacía.")
+        parser.add_argument("--una-vez", action="store_true", help="Sale cuando la cola queda vacía.")
+        parser.add_argument("--simular", action="store_true",
+                            help="No llama a Gemini; guarda una respuesta fija (para medir tiempos).")
+
+    def handle(self, *args, **opciones):
+        if opciones["procesos"] <= 1:
+            procesados = _trabajar(opciones)
+            self.stdout.write(self.style.SUCCESS(f"{procesados} trabajos procesados."))
+            return
+
+        # cada hijo abre sus propias conexiones: no se heredan las del padre
+        connections.close_all()
+        contexto = multiprocessing.get_context("fork")
+        procesos = [
+            contexto.Process(target=_trabajar, args=(opciones,), name=f"trabajador-{i}")
+            for i in range(opciones["procesos"])
+        ]
+        for p in procesos:
+            p.start()
+        self.stdout.write(f"{len(procesos)} trabajadores en marcha (pid {', '.join(str(p.pid) for p in procesos)}).")
+
+        # el padre reenvía SIGTERM/SIGINT a los hijos y espera a que terminen
+        def reenviar(*_):
+            for p in procesos:
+                if p.is_alive():
+                    p.terminate()
+        signal.signal(signal.SIGTERM, reenviar)
+        signal.signal(signal.SIGINT, reenviar)
+        for p in procesos:
+            p.join()
+        self.stdout.write(self.style.SUCCESS("Trabajadores detenidos."))
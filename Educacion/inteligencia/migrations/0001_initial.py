@@ -0,0 +1,45 @@
+# Generated by Django 5.2.18 on 2026-10-18 13:58
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('administrador', '0005_indices_calendario_planes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Lotes_Recomendaciones',
+            fields=[
+                ('id', models.AutoField(primary_key=True, serialize=False)),
+                ('pregunta', models.TextField()),
+                ('estado', models.CharField(default='pendiente', max_length=20)),
+                ('ultimo_usuario_id', models.IntegerField(default=0)),
+                ('procesados', models.IntegerField(default=0)),
+                ('errores', models.IntegerField(default=0)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('terminado_at', models.DateTimeField(blank=True, null=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='Recomendaciones',
+            fields=[
+                ('id', models.AutoField(primary_key=True, serialize=False)),
+                ('pregunta', models.TextField()),
+                ('recomendacion', models.TextField(blank=True)),
+                ('error', models.TextField(blank=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('Lotes_id', models.ForeignKey(blank=True, db_column='lote_id', null=True, on_delete=django.db.models.deletion.CASCADE, to='inteligencia.lotes_recomendaciones')),
+                ('Usuarios_id', models.ForeignKey(db_column='usuario_id', on_delete=django.db.models.deletion.CASCADE, to='administrador.usuarios')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['Usuarios_id', 'created_at'], name='recomendacion_usuario_idx')],
+            },
+        ),
+    ]
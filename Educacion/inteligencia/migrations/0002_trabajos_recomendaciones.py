@@ -0,0 +1,35 @@
+# Generated by Django 5.2.18 on 2026-10-18 14:23
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('administrador', '0005_indices_calendario_planes'),
+        ('inteligencia', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Trabajos_Recomendaciones',
+            fields=[
+                ('id', models.AutoField(primary_key=True, serialize=False)),
+                ('pregunta', models.TextField()),
+                ('estado', models.CharField(default='pendiente', max_length=20)),
+                ('intentos', models.IntegerField(default=0)),
+                ('disponible_at', models.DateTimeField()),
+                ('trabajador', models.CharField(blank=True, max_length=100)),
+                ('recomendacion', models.TextField(blank=True)),
+                ('error', models.TextField(blank=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('terminado_at', models.DateTimeField(blank=True, null=True)),
+                ('Usuarios_id', models.ForeignKey(db_column='usuario_id', on_delete=django.db.models.deletion.CASCADE, to='administrador.usuarios')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['estado', 'disponible_at'], name='trabajo_cola_idx')],
+            },
+        ),
+    ]
@@ -1,3 +1,82 @@
 from django.db import models
 
-# Create your models here.
+from administrador.models import Usuarios
+
+
+class Lotes_Recomendaciones(models.Model):
+    # ✅ una ejecución del job masivo; guarda el punto de control para reanudar
+    id = models.AutoField(primary_key=True)
+    pregunta = models.TextField()
+    estado = models.CharField(max_length=20, default="pendiente")  # pendiente | en_curso | terminado
+    ultimo_usuario_id = models.IntegerField(default=0)
+    procesados = models.IntegerField(default=0)
+    errores = models.IntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    terminado_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return str(self.id)
+
+
+class Recomendaciones(models.Model):
+    id = models.AutoField(primary_key=True)
+
+    Usuarios_id = models.ForeignKey(
+        Usuarios,
+        on_delete=models.CASCADE,
+        db_column='usuario_id'
+    )
+
+    Lotes_id = models.ForeignKey(
+        Lotes_Recomendaciones,
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        db_column='lote_id'
+    )
+
+    pregunta = models.TextField()
+    recomendacion = models.TextField(blank=True)
+    error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['Usuarios_id', 'created_at'], name='recomendacion_usuario_idx'),
+        ]
+
+    def __str__(self):
+        return str(self.id)
+
+
+class Trabajos_Recomendaciones(models.Model):
+    # ✅ cola de /api/ia/trabajos/: la vista inserta y los procesos de
+    # `manage.py trabajador_ia` reclaman (ver inteligencia/trabajos.py)
+    id = models.AutoField(primary_key=True)
+
+    Usuarios_id = models.ForeignKey(
+        Usuarios,
+        on_delete=models.CASCADE,
+        db_column='usuario_id'
+    )
+
+    pregunta = models.TextField()
+    estado = models.CharField(max_length=20, default="pendiente")  # pendiente | en_curso | terminado | fallido
+    intentos = models.IntegerField(default=0)
+    # pendiente: no se reclama antes (backoff); en_curso: fin del plazo de visibilidad
+    disponible_at = models.DateTimeField()
+    trabajador = models.CharField(max_length=100, blank=True)
+    recomendacion = models.TextField(blank=True)
+    error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    terminado_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['estado', 'disponible_at'], name='trabajo_cola_idx'),
+        ]
+
+    def __str__(self):
+        return str(self.id)
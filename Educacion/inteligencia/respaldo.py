@@ -0,0 +1,117 @@
+import asyncio
+import contextvars
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from functools import partial
+
+from django.conf import settings
+
+from . import cache, coalescencia
+from .services import gemini_responder, gemini_responder_async
+
+
+# ------------------------------
+# PRESUPUESTO DE LATENCIA
+# ------------------------------
+# La llamada a Gemini corre en segundo plano; la vista espera como mucho
+# IA_PRESUPUESTO_MS. Si no llegó a tiempo (o falló) responde con el
+# recomendador local, y la llamada sigue hasta terminar y deja su respuesta
+# en la cache para la siguiente petición igual.
+#
+# Peticiones iguales a la vez (misma clave) reciben el future de la llamada
+# que ya está en curso en este proceso: solo el líder ocupa un hilo del pool.
+# Entre procesos coalescencia.compartir() sigue haciendo lo suyo dentro de
+# la tarea.
+#
+# Las llamadas pendientes (en curso o esperando hilo) no pasan de
+# IA_COLA_FONDO: con la cola llena no se encola nada, el future sale ya con
+# ColaLlena y la vista responde con el recomendador local.
+
+_pool = None
+_lock = threading.Lock()
+_pendientes = 0
+_en_curso = {}  # clave -> future de la llamada en curso
+_tareas_async = set()
+
+
+class ColaLlena(Exception):
+    pass
+
+
+def _hilos():
+    global _pool
+    if _pool is None:
+        with _lock:
+            if _pool is None:
+                _pool = ThreadPoolExecutor(
+                    max_workers=getattr(settings, "IA_HILOS_FONDO", 16),
+                    thread_name_prefix="gemini",
+                )
+    return _pool
+
+
+def _liberar(clave, futuro):
+    global _pendientes
+    with _lock:
+        _pendientes -= 1
+        if _en_curso.get(clave) is futuro:
+            del _en_curso[clave]
+
+
+def presupuesto_segundos(solicitado=None):
+    """None = sin límite. El cliente puede pedir un presupuesto menor, nunca mayor."""
+    maximo = getattr(settings, "IA_PRESUPUESTO_MS", 8000)
+    try:
+        solicitado = int(solicitado) if solicitado not in (None, "") else None
+    except (TypeError, ValueError):
+        solicitado = None
+
+    if solicitado is not None and solicitado > 0:
+        ms = min(solicitado, maximo) if maximo else solicitado
+    else:
+        ms = maximo
+    return ms / 1000 if ms else None
+
+
+def llamar_en_fondo(clave: str, prompt: str):
+    """Future con la respuesta de Gemini; al terminar la guarda en la cache."""
+    def tarea():
+        respuesta = coalescencia.compartir(clave, lambda: gemini_responder(prompt))
+        cache.guardar_recomendacion(clave, respuesta)
+        return respuesta
+
+    global _pendientes
+    pool = _hilos()
+    with _lock:
+        futuro = _en_curso.get(clave)
+        if futuro is not None:
+            return futuro
+        if _pendientes >= getattr(settings, "IA_COLA_FONDO", 64):
+            futuro = Future()
+            futuro.set_exception(ColaLlena("demasiadas llamadas a Gemini pendientes"))
+            return futuro
+        # con el contexto de la petición: así medir("gemini") suma al tiempo
+        # externo de la petición (Educacion/metricas.py)
+        futuro = _en_curso[clave] = pool.submit(contextvars.copy_context().run, tarea)
+        _pendientes += 1
+    futuro.add_done_callback(partial(_liberar, clave))
+    return futuro
+
+
+def llamar_en_fondo_async(clave: str, prompt: str) -> asyncio.Task:
+    async def tarea():
+        respuesta = await coalescencia.compartir_async(clave, lambda: gemini_responder_async(prompt))
+        await asyncio.to_thread(cache.guardar_recomendacion, clave, respuesta)
+        return respuesta
+
+    t = asyncio.get_running_loop().create_task(tarea())
+    # se guarda una referencia para que la tarea no se pierda si la vista ya respondió
+    _tareas_async.add(t)
+    t.add_done_callback(_terminar_async)
+    return t
+
+
+def _terminar_async(t):
+    _tareas_async.discard(t)
+    if not t.cancelled():
+        t.exception()
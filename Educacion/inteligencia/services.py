@@ -1,15 +1,152 @@
+import asyncio
 import os
+import threading
+import weakref
+
+import httpx
 from google import genai
+from google.genai import types
 
-def gemini_responder(prompt: str) -> str:
+from Educacion.metricas import medir
+
+# ------------------------------
+# CLIENTE GEMINI (uno por proceso)
+# ------------------------------
+# Se crea la primera vez que se usa y se reutiliza en todas las peticiones,
+# así el pool de conexiones keep-alive de httpx evita un handshake TLS por
+# recomendación. Si el proceso hace fork (gunicorn --preload) el hijo detecta
+# que el pid cambió y crea su propio cliente: los sockets no se comparten
+# entre procesos.
+
+MODELO = os.getenv("GEMINI_MODEL", "gemini-2.5-flash")
+
+_lock = threading.Lock()
+_cliente = None
+_cliente_pid = None
+
+
+def _config_int(nombre: str, defecto: int) -> int:
+    return int(os.getenv(nombre, defecto))
+
+
+def _config_float(nombre: str, defecto: float) -> float:
+    return float(os.getenv(nombre, defecto))
+
+
+def _opciones_http() -> types.HttpOptions:
+    limites = httpx.Limits(
+        max_connections=_config_int("GEMINI_MAX_CONEXIONES", 20),
+        max_keepalive_connections=_config_int("GEMINI_MAX_KEEPALIVE", 10),
+        keepalive_expiry=_config_float("GEMINI_KEEPALIVE_SEGUNDOS", 60),
+    )
+    return types.HttpOptions(
+        # permite apuntar a un servidor falso local en pruebas
+        base_url=os.getenv("GEMINI_BASE_URL") or None,
+        # milisegundos
+        timeout=_config_int("GEMINI_TIMEOUT_MS", 30000),
+        retry_options=types.HttpRetryOptions(
+            attempts=_config_int("GEMINI_REINTENTOS", 3),
+            initial_delay=_config_float("GEMINI_REINTENTO_ESPERA", 0.5),
+            max_delay=_config_float("GEMINI_REINTENTO_ESPERA_MAX", 8),
+            exp_base=2,
+        ),
+        client_args={"limits": limites},
+        async_client_args={"limits": limites},
+    )
+
+
+def _crear_cliente() -> genai.Client:
     api_key = os.getenv("GEMINI_API_KEY") or os.getenv("GOOGLE_API_KEY")
     if not api_key:
         raise RuntimeError("Falta GEMINI_API_KEY (o GOOGLE_API_KEY) en variables de entorno.")
 
-    client = genai.Client(api_key=api_key)
+    return genai.Client(api_key=api_key, http_options=_opciones_http())
 
-    resp = client.models.generate_content(
-        model="gemini-2.5-flash",
-        contents=prompt
-    )
+
+def obtener_cliente() -> genai.Client:
+    global _cliente, _cliente_pid
+
+    pid = os.getpid()
+    if _cliente is not None and _cliente_pid == pid:
+        return _cliente
+
+    with _lock:
+        if _cliente is None or _cliente_pid != pid:
+            _cliente = _crear_cliente()
+            _cliente_pid = pid
+        return _cliente
+
+
+def reiniciar_cliente():
+    """Descarta el cliente actual; el siguiente uso crea uno nuevo."""
+    global _cliente, _cliente_pid
+
+    with _lock:
+        cliente, _cliente, _cliente_pid = _cliente, None, None
+    if cliente is not None:
+        try:
+            cliente.close()
+        except Exception:
+            pass
+
+
+def calentar_cliente(verificar: bool = False) -> bool:
+    """
+    Crea el cliente al arrancar el worker (ver gunicorn.conf.py).
+    Con verificar=True además consulta el modelo, lo que abre la primera
+    conexión del pool y sirve como health check.
+    """
+    cliente = obtener_cliente()
+    if verificar:
+        cliente.models.get(model=MODELO)
+    return True
+
+
+def gemini_responder(prompt: str) -> str:
+    with medir("gemini"):
+        resp = obtener_cliente().models.generate_content(
+            model=MODELO,
+            contents=prompt
+        )
     return resp.text or ""
+
+
+# ------------------------------
+# VERSIÓN ASYNC (vista ASGI)
+# ------------------------------
+# Limita cuántas llamadas a Gemini hay en vuelo a la vez por proceso; el
+# resto de peticiones espera en el semáforo sin ocupar un hilo. Hay un
+# semáforo por event loop porque asyncio.Semaphore queda ligado a su loop.
+
+MAX_CONCURRENCIA = _config_int("GEMINI_MAX_CONCURRENCIA", 32)
+
+_semaforos = weakref.WeakKeyDictionary()
+
+
+def _semaforo() -> asyncio.Semaphore:
+    loop = asyncio.get_running_loop()
+    semaforo = _semaforos.get(loop)
+    if semaforo is None:
+        semaforo = _semaforos[loop] = asyncio.Semaphore(MAX_CONCURRENCIA)
+    return semaforo
+
+
+async def gemini_responder_async(prompt: str) -> str:
+    async with _semaforo():
+        with medir("gemini"):
+            resp = await obtener_cliente().aio.models.generate_content(
+                model=MODELO,
+                contents=prompt
+            )
+    return resp.text or ""
+
+
+def gemini_responder_stream(prompt: str):
+    """Genera los fragmentos de texto a medida que Gemini los produce."""
+    with medir("gemini_stream"):
+        for fragmento in obtener_cliente().models.generate_content_stream(
+            model=MODELO,
+            contents=prompt
+        ):
+            if fragmento.text:
+                yield fragmento.text
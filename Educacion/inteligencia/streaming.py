@@ -0,0 +1,78 @@
+import json
+import time
+
+from rest_framework.renderers import BaseRenderer
+
+from . import cache
+from .services import gemini_responder_stream
+
+
+# ------------------------------
+# SERVER-SENT EVENTS
+# ------------------------------
+# Formato de la respuesta en modo stream:
+#   data: {"texto": "..."}            un evento por fragmento
+#   event: fin / data: {...}          respuesta completa + tiempos
+#   event: error / data: {"error":..} si algo falla (antes o durante)
+
+def evento_sse(datos: dict, evento: str = None) -> str:
+    linea_evento = f"event: {evento}\n" if evento else ""
+    return f"{linea_evento}data: {json.dumps(datos, ensure_ascii=False)}\n\n"
+
+
+class EventStreamRenderer(BaseRenderer):
+    """
+    Permite que DRF acepte `Accept: text/event-stream`. Las respuestas normales
+    (p.ej. errores de validación) salen como un único evento `error`.
+    """
+    media_type = "text/event-stream"
+    format = "sse"
+    charset = "utf-8"
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b""
+        return evento_sse(data, "error").encode(self.charset)
+
+
+def pide_stream(request) -> bool:
+    if "text/event-stream" in request.META.get("HTTP_ACCEPT", ""):
+        return True
+    valor = request.query_params.get("stream") or request.data.get("stream")
+    return str(valor).lower() in ("true", "1")
+
+
+def stream_recomendacion(usuario_id: int, pregunta: str, prompt: str, clave: str):
+    inicio = time.perf_counter()
+    primer_fragmento_ms = None
+    fragmentos = []
+
+    respuesta = cache.obtener_recomendacion(clave)
+    en_cache = respuesta is not None
+
+    if en_cache:
+        primer_fragmento_ms = round((time.perf_counter() - inicio) * 1000, 1)
+        yield evento_sse({"texto": respuesta})
+    else:
+        try:
+            for texto in gemini_responder_stream(prompt):
+                if primer_fragmento_ms is None:
+                    primer_fragmento_ms = round((time.perf_counter() - inicio) * 1000, 1)
+                fragmentos.append(texto)
+                yield evento_sse({"texto": texto})
+        except Exception as e:
+            yield evento_sse({"error": f"Error llamando a Gemini: {str(e)}"}, "error")
+            return
+        respuesta = "".join(fragmentos)
+        cache.guardar_recomendacion(clave, respuesta)
+
+    yield evento_sse({
+        "usuario_id": usuario_id,
+        "pregunta": pregunta,
+        "recomendacion": respuesta,
+        "cache": en_cache,
+        "tiempos": {
+            "primer_fragmento_ms": primer_fragmento_ms,
+            "total_ms": round((time.perf_counter() - inicio) * 1000, 1),
+        },
+    }, "fin")
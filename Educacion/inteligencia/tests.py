@@ -1,3 +1,707 @@
-from django.test import TestCase
+import asyncio
+import datetime
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from unittest import mock
 
-# Create your tests here.
+from django.db import transaction
+from django.test import SimpleTestCase, TestCase
+from django.utils import timezone
+
+from administrador.condicional import tabla_modificada
+from administrador.models import Usuarios, Materias, Sesiones_Estudios
+
+from . import cache, coalescencia, gemini_falso, respaldo, services, trabajos
+from .cache import _cache
+from .indice import seleccionar_materias
+from .local import recomendar_local
+from .lotes import crear_lote, ejecutar_lote
+from .models import Recomendaciones, Trabajos_Recomendaciones
+from .respaldo import presupuesto_segundos
+from .utils import construir_contextos, datos_contexto
+
+
+# ------------------------------
+# RECOMENDACIONES EN LOTE
+# ------------------------------
+class RecomendacionesLoteTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        Materias.objects.create(Nombre="Cálculo", Dificultad="alta", Notas="n")
+        Usuarios.objects.bulk_create([
+            Usuarios(Nombre=f"u{i}", Correo=f"u{i}@x.com", nivel_estudios="uni",
+                     disponibilidad=i % 4 != 0, Dias_Libres="lunes", periodo_prefencia="tarde")
+            for i in range(40)
+        ])
+
+    def test_procesa_solo_disponibles(self):
+        prompts = []
+
+        def stub(prompt):
+            prompts.append(prompt)
+            return "ok"
+
+        lote = ejecutar_lote(crear_lote("¿Qué estudio?"), responder=stub, tam_bloque=7, hilos=3)
+
+        self.assertEqual(lote.estado, "terminado")
+        self.assertEqual(lote.procesados, 30)
+        self.assertEqual(Recomendaciones.objects.filter(Lotes_id=lote, recomendacion="ok").count(), 30)
+        self.assertTrue(all("Cálculo" in p for p in prompts))
+
+    def test_contextos_de_un_bloque_con_consultas_fijas(self):
+        usuarios = list(Usuarios.objects.order_by("id"))
+        construir_contextos(usuarios[:1])  # índice ya cargado
+        # resúmenes de todos + versión e ids del catálogo una vez (dentro de la
+        # transacción del test el índice revisa ids), sin importar cuántos usuarios
+        with self.assertNumQueries(3):
+            contextos = construir_contextos(usuarios[:5])
+        with self.assertNumQueries(3):
+            construir_contextos(usuarios)
+        self.assertEqual(len(contextos), 5)
+
+    def test_reanuda_desde_el_punto_de_control(self):
+        lote = ejecutar_lote(crear_lote("q"), responder=lambda p: "ok", tam_bloque=5, limite=12)
+        self.assertEqual((lote.estado, lote.procesados), ("en_curso", 12))
+
+        lote = ejecutar_lote(lote, responder=lambda p: "ok", tam_bloque=5)
+        self.assertEqual((lote.estado, lote.procesados), ("terminado", 30))
+        self.assertEqual(Recomendaciones.objects.filter(Lotes_id=lote).values("Usuarios_id").distinct().count(), 30)
+
+    def test_errores_del_modelo_no_detienen_el_lote(self):
+        def falla(prompt):
+            raise RuntimeError("cuota agotada")
+
+        lote = ejecutar_lote(crear_lote("q"), responder=falla)
+        self.assertEqual((lote.procesados, lote.errores), (30, 30))
+        self.assertEqual(Recomendaciones.objects.filter(error="cuota agotada").count(), 30)
+
+
+# ------------------------------
+# ÍNDICE DE MATERIAS
+# ------------------------------
+class IndiceMateriasTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        Materias.objects.bulk_create([
+            Materias(Nombre=f"Relleno {i}", Dificultad="baja", Notas="texto genérico") for i in range(300)
+        ])
+        cls.quimica = Materias.objects.create(Nombre="Química orgánica", Dificultad="alta",
+                                              Notas="Reacciones del carbono y laboratorio")
+
+    def nombres(self, pregunta, historial=()):
+        return [m["Nombre"] for m in seleccionar_materias(pregunta, historial)]
+
+    def test_encuentra_materia_fuera_de_las_primeras_200(self):
+        with self.settings(IA_MATERIAS_TOP_K=5):
+            self.assertEqual(self.nombres("necesito repasar quimica para el laboratorio")[0], "Química orgánica")
+
+    def test_respeta_top_k_y_presupuesto(self):
+        with self.settings(IA_MATERIAS_TOP_K=10):
+            self.assertEqual(len(self.nombres("algo")), 10)
+        with self.settings(IA_MATERIAS_TOP_K=100, IA_PRESUPUESTO_TOKENS_MATERIAS=30):
+            self.assertLess(len(self.nombres("algo")), 10)
+
+    def test_se_actualiza_al_cambiar_el_catalogo(self):
+        with self.settings(IA_MATERIAS_TOP_K=3):
+            Materias.objects.create(Nombre="Astronomía", Dificultad="media", Notas="estrellas")
+            self.assertEqual(self.nombres("estrellas")[0], "Astronomía")
+
+            self.quimica.Nombre = "Bioquímica"
+            self.quimica.save()
+            self.assertEqual(self.nombres("carbono")[0], "Bioquímica")
+
+            self.quimica.delete()
+            self.assertNotIn("Bioquímica", self.nombres("carbono"))
+
+    def test_cambio_con_updated_at_anterior_a_lo_ya_indexado(self):
+        # una transacción que confirma tarde (o un reloj atrasado) deja un
+        # updated_at más viejo que el de filas ya sincronizadas
+        with self.settings(IA_MATERIAS_TOP_K=3):
+            self.assertEqual(self.nombres("carbono")[0], "Química orgánica")
+            Materias.objects.create(Nombre="Astronomía", Dificultad="media", Notas="estrellas")
+            self.assertEqual(self.nombres("estrellas")[0], "Astronomía")
+
+            antes = timezone.now() - datetime.timedelta(hours=1)
+            Materias.objects.filter(id=self.quimica.id).update(Notas="volcanes", updated_at=antes)
+            tabla_modificada(Materias)
+            self.assertEqual(self.nombres("volcanes")[0], "Química orgánica")
+
+
+# ------------------------------
+# CLIENTE GEMINI (contra el servidor falso)
+# ------------------------------
+class ClienteGeminiTests(SimpleTestCase):
+
+    def setUp(self):
+        url, self.servidor = gemini_falso.iniciar(latencia_ms=0)
+        self.conexiones = []
+        atender = self.servidor.process_request
+
+        def contar(request, direccion):
+            self.conexiones.append(direccion)
+            return atender(request, direccion)
+
+        self.servidor.process_request = contar
+        entorno = mock.patch.dict(os.environ, GEMINI_BASE_URL=url, GEMINI_API_KEY="falso", GEMINI_REINTENTOS="1")
+        entorno.start()
+        self.addCleanup(entorno.stop)
+        self.addCleanup(self.servidor.shutdown)
+        self.addCleanup(services.reiniciar_cliente)
+        services.reiniciar_cliente()
+
+    def test_un_cliente_y_una_conexion_para_todas_las_llamadas(self):
+        cliente = services.obtener_cliente()
+        for _ in range(3):
+            self.assertEqual(services.gemini_responder("prompt"), gemini_falso.TEXTO)
+        self.assertIs(services.obtener_cliente(), cliente)
+        self.assertEqual(self.servidor.llamadas, 3)
+        # keep-alive: las tres llamadas van por el mismo socket
+        self.assertEqual(len(self.conexiones), 1)
+
+    def test_reiniciar_o_cambiar_de_proceso_crea_otro_cliente(self):
+        cliente = services.obtener_cliente()
+        services.reiniciar_cliente()
+        nuevo = services.obtener_cliente()
+        self.assertIsNot(nuevo, cliente)
+
+        # hijo de un fork (gunicorn --preload): no usa el cliente del padre
+        with mock.patch("inteligencia.services.os.getpid", return_value=os.getpid() + 1):
+            self.assertIsNot(services.obtener_cliente(), nuevo)
+        self.assertEqual(services.gemini_responder("prompt"), gemini_falso.TEXTO)
+
+    def test_calentar_abre_la_conexion(self):
+        self.assertTrue(services.calentar_cliente(verificar=True))
+        self.assertEqual(len(self.conexiones), 1)
+        services.gemini_responder("prompt")
+        self.assertEqual(len(self.conexiones), 1)
+
+    def test_sin_api_key(self):
+        services.reiniciar_cliente()
+        with mock.patch.dict(os.environ, GEMINI_API_KEY="", GOOGLE_API_KEY=""):
+            with self.assertRaisesMessage(RuntimeError, "GEMINI_API_KEY"):
+                services.obtener_cliente()
+
+
+# ------------------------------
+# VISTA ASYNC (/api/ia/async/)
+# ------------------------------
+class RecomendacionAsyncTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        Materias.objects.create(Nombre="Física", Dificultad="alta", Notas="movimiento")
+        cls.usuario = Usuarios.objects.create(Nombre="Leo", Correo="leo@x.com", nivel_estudios="uni",
+                                              disponibilidad=True, Dias_Libres="martes", periodo_prefencia="noche")
+
+    def setUp(self):
+        _cache().clear()
+
+    async def pedir(self, datos):
+        return await self.async_client.post("/api/ia/async/", datos, content_type="application/json")
+
+    async def test_responde_y_guarda_en_la_cache(self):
+        llamadas = []
+
+        async def responder(prompt):
+            llamadas.append(prompt)
+            return "respuesta async"
+
+        with mock.patch("inteligencia.respaldo.gemini_responder_async", responder):
+            primera = (await self.pedir({"usuario_id": self.usuario.id, "pregunta": "¿qué estudio?"})).json()
+            segunda = (await self.pedir({"usuario_id": self.usuario.id, "pregunta": "¿qué estudio?"})).json()
+
+        self.assertEqual((primera["fuente"], primera["recomendacion"], primera["cache"]),
+                         ("gemini", "respuesta async", False))
+        self.assertTrue(segunda["cache"])
+        self.assertEqual(len(llamadas), 1)
+        self.assertIn("Usuario: Leo", llamadas[0])
+
+    async def test_datos_invalidos(self):
+        self.assertEqual((await self.pedir({"pregunta": "x"})).status_code, 400)
+        self.assertEqual((await self.pedir({"usuario_id": "abc", "pregunta": "x"})).status_code, 400)
+        self.assertEqual((await self.pedir({"usuario_id": 999999, "pregunta": "x"})).status_code, 400)
+        r = await self.async_client.post("/api/ia/async/", "{no", content_type="application/json")
+        self.assertEqual(r.status_code, 400)
+
+
+class SemaforoGeminiTests(SimpleTestCase):
+
+    def test_limita_las_llamadas_en_vuelo(self):
+        en_vuelo, maximo = 0, 0
+
+        async def generar(model, contents):
+            nonlocal en_vuelo, maximo
+            en_vuelo += 1
+            maximo = max(maximo, en_vuelo)
+            await asyncio.sleep(0.02)
+            en_vuelo -= 1
+            return mock.Mock(text=contents.upper())
+
+        cliente = mock.Mock()
+        cliente.aio.models.generate_content = generar
+
+        async def principal():
+            return await asyncio.gather(*[services.gemini_responder_async(f"p{i}") for i in range(8)])
+
+        with mock.patch.object(services, "MAX_CONCURRENCIA", 2), \
+                mock.patch.object(services, "obtener_cliente", return_value=cliente):
+            resultados = asyncio.run(principal())
+
+        self.assertEqual(resultados, [f"P{i}" for i in range(8)])
+        self.assertEqual(maximo, 2)
+
+
+# ------------------------------
+# STREAMING (SSE)
+# ------------------------------
+class StreamingTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        Materias.objects.create(Nombre="Arte", Dificultad="baja", Notas="color")
+        cls.usuario = Usuarios.objects.create(Nombre="Sol", Correo="sol@x.com", nivel_estudios="uni",
+                                              disponibilidad=True, Dias_Libres="jueves", periodo_prefencia="mañana")
+
+    def setUp(self):
+        _cache().clear()
+
+    def eventos(self, respuesta):
+        """[(evento, datos)] del cuerpo text/event-stream."""
+        cuerpo = b"".join(respuesta.streaming_content).decode("utf-8")
+        self.assertTrue(cuerpo.endswith("\n\n"))
+        eventos = []
+        for bloque in cuerpo[:-2].split("\n\n"):
+            campos = dict(linea.split(": ", 1) for linea in bloque.split("\n"))
+            eventos.append((campos.get("event"), json.loads(campos["data"])))
+        return eventos
+
+    def pedir(self, **extra):
+        datos = {"usuario_id": self.usuario.id, "pregunta": "¿qué estudio?"}
+        return self.client.post("/api/ia/", datos, content_type="application/json", **extra)
+
+    def test_un_evento_por_fragmento_y_uno_final(self):
+        with mock.patch("inteligencia.streaming.gemini_responder_stream", lambda prompt: iter(["Hola ", "mundo ñ"])):
+            r = self.pedir(HTTP_ACCEPT="text/event-stream")
+            # el cuerpo se genera al leerlo
+            eventos = self.eventos(r)
+
+        self.assertEqual(r["Content-Type"], "text/event-stream")
+        self.assertEqual(r["Cache-Control"], "no-cache")
+        self.assertEqual(eventos[:2], [(None, {"texto": "Hola "}), (None, {"texto": "mundo ñ"})])
+        evento, fin = eventos[2]
+        self.assertEqual(evento, "fin")
+        self.assertEqual((fin["recomendacion"], fin["cache"]), ("Hola mundo ñ", False))
+        self.assertEqual(set(fin["tiempos"]), {"primer_fragmento_ms", "total_ms"})
+
+        # con stream=true y la respuesta ya en la cache: un solo fragmento con todo
+        r = self.client.post("/api/ia/?stream=true", {"usuario_id": self.usuario.id, "pregunta": "¿qué estudio?"},
+                             content_type="application/json")
+        self.assertEqual([e for e, _ in self.eventos(r)], [None, "fin"])
+        self.assertEqual(self.eventos(self.pedir(HTTP_ACCEPT="text/event-stream"))[1][1]["cache"], True)
+
+    def test_error_a_mitad_del_stream(self):
+        def falla(prompt):
+            yield "Hola "
+            raise RuntimeError("corte")
+
+        with mock.patch("inteligencia.streaming.gemini_responder_stream", falla):
+            eventos = self.eventos(self.pedir(HTTP_ACCEPT="text/event-stream"))
+
+        self.assertEqual(eventos[0], (None, {"texto": "Hola "}))
+        self.assertEqual(eventos[1][0], "error")
+        self.assertIn("corte", eventos[1][1]["error"])
+
+        # la respuesta incompleta no quedó en la cache
+        with mock.patch("inteligencia.streaming.gemini_responder_stream", lambda prompt: iter(["entera"])):
+            fin = self.eventos(self.pedir(HTTP_ACCEPT="text/event-stream"))[-1][1]
+        self.assertEqual((fin["recomendacion"], fin["cache"]), ("entera", False))
+
+    def test_error_de_validacion_como_evento(self):
+        r = self.client.post("/api/ia/", {"pregunta": "x"}, content_type="application/json",
+                             HTTP_ACCEPT="text/event-stream")
+        self.assertEqual(r.status_code, 400)
+        self.assertEqual(r.content.decode(), 'event: error\ndata: {"error": "Debes enviar usuario_id y pregunta"}\n\n')
+
+
+# ------------------------------
+# SINGLE-FLIGHT
+# ------------------------------
+class CoalescenciaTests(SimpleTestCase):
+
+    def test_hilos_comparten_una_llamada(self):
+        llamadas = []
+        barrera = threading.Event()
+
+        def lenta():
+            llamadas.append(1)
+            barrera.wait(2)
+            return "respuesta"
+
+        with ThreadPoolExecutor(max_workers=10) as pool:
+            futuros = [pool.submit(coalescencia.compartir, "k-hilos", lenta) for _ in range(10)]
+            time.sleep(0.2)
+            barrera.set()
+            resultados = [f.result() for f in futuros]
+
+        self.assertEqual(resultados, ["respuesta"] * 10)
+        self.assertEqual(len(llamadas), 1)
+
+    def test_el_error_llega_a_todos(self):
+        barrera = threading.Event()
+
+        def falla():
+            barrera.wait(2)
+            raise RuntimeError("gemini caído")
+
+        with ThreadPoolExecutor(max_workers=5) as pool:
+            futuros = [pool.submit(coalescencia.compartir, "k-error", falla) for _ in range(5)]
+            time.sleep(0.2)
+            barrera.set()
+            for f in futuros:
+                with self.assertRaisesMessage(RuntimeError, "gemini caído"):
+                    f.result()
+
+    def test_espera_resultado_de_otro_proceso(self):
+        # simula un líder en otro proceso: lock tomado y resultado publicado después
+        _cache().set("k-otro:vuelo", "token-ajeno", 10)
+        threading.Timer(0.3, coalescencia._publicar, ("k-otro", "token-ajeno", {"resultado": "remoto"})).start()
+
+        self.assertEqual(coalescencia.compartir("k-otro", lambda: "local", timeout=5), "remoto")
+        _cache().delete("k-otro:vuelo")
+
+    def test_timeout_del_seguidor(self):
+        _cache().set("k-lento:vuelo", "token-ajeno", 10)
+        with self.assertRaises(coalescencia.EsperaAgotada):
+            coalescencia.compartir("k-lento", lambda: "local", timeout=0.3)
+        _cache().delete("k-lento:vuelo")
+
+    def test_async_comparten_una_llamada(self):
+        llamadas = []
+
+        async def lenta():
+            llamadas.append(1)
+            await asyncio.sleep(0.1)
+            return "respuesta"
+
+        async def principal():
+            return await asyncio.gather(*[coalescencia.compartir_async("k-async", lenta) for _ in range(10)])
+
+        self.assertEqual(asyncio.run(principal()), ["respuesta"] * 10)
+        self.assertEqual(len(llamadas), 1)
+
+    def test_async_lider_cancelado(self):
+        llamadas = []
+
+        async def lenta():
+            llamadas.append(1)
+            await asyncio.sleep(0.1)
+            return "respuesta"
+
+        async def principal():
+            lider = asyncio.create_task(coalescencia.compartir_async("k-cancelado", lenta))
+            await asyncio.sleep(0.02)
+            seguidores = [asyncio.create_task(coalescencia.compartir_async("k-cancelado", lenta)) for _ in range(5)]
+            await asyncio.sleep(0.02)
+            lider.cancel()
+            return await asyncio.gather(*seguidores)
+
+        # los seguidores no reciben el CancelledError: uno repite la llamada para todos
+        self.assertEqual(asyncio.run(principal()), ["respuesta"] * 5)
+        self.assertEqual(len(llamadas), 2)
+
+
+# ------------------------------
+# PRESUPUESTO DE LATENCIA / RESPALDO LOCAL
+# ------------------------------
+class RespaldoLocalTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        Materias.objects.create(Nombre="Historia", Dificultad="baja", Notas="fechas")
+        Materias.objects.create(Nombre="Álgebra", Dificultad="alta", Notas="ecuaciones")
+        cls.usuario = Usuarios.objects.create(Nombre="Ana", Correo="ana@x.com", nivel_estudios="universidad",
+                                              disponibilidad=True, Dias_Libres="sábado", periodo_prefencia="tarde")
+
+    def setUp(self):
+        _cache().clear()
+
+    def pedir(self, pregunta, **extra):
+        datos = {"usuario_id": self.usuario.id, "pregunta": pregunta, **extra}
+        return self.client.post("/api/ia/", datos, content_type="application/json").json()
+
+    def test_recomendador_local_es_determinista(self):
+        datos = datos_contexto(self.usuario.id, "ecuaciones")
+        texto = recomendar_local(*datos)
+        self.assertEqual(texto, recomendar_local(*datos))
+        self.assertIn("- Materia recomendada: Álgebra", texto)
+
+    def test_gemini_lento_responde_local_y_calienta_la_cache(self):
+        terminado = threading.Event()
+
+        def lento(prompt):
+            time.sleep(0.5)
+            terminado.set()
+            return "respuesta de gemini"
+
+        with self.settings(IA_PRESUPUESTO_MS=50), mock.patch("inteligencia.respaldo.gemini_responder", lento):
+            primera = self.pedir("¿qué estudio hoy?")
+            self.assertEqual(primera["fuente"], "local")
+            self.assertIn("Materia recomendada", primera["recomendacion"])
+
+            self.assertTrue(terminado.wait(2))
+            time.sleep(0.1)
+            segunda = self.pedir("¿qué estudio hoy?")
+        self.assertEqual((segunda["cache"], segunda["recomendacion"]), (True, "respuesta de gemini"))
+
+    def test_error_de_gemini_responde_local(self):
+        def falla(prompt):
+            raise RuntimeError("503")
+
+        with mock.patch("inteligencia.respaldo.gemini_responder", falla):
+            self.assertEqual(self.pedir("otra pregunta")["fuente"], "local")
+
+    def test_tiempo_de_gemini_cuenta_en_la_peticion(self):
+        import re
+
+        from Educacion import metricas
+
+        def medido(prompt):
+            with metricas.medir("gemini"):
+                time.sleep(0.05)
+            return "respuesta de gemini"
+
+        metricas.reiniciar()
+        with mock.patch("inteligencia.respaldo.gemini_responder", medido):
+            self.assertEqual(self.pedir("¿y mañana?")["fuente"], "gemini")
+        suma = re.search(r'http_request_external_seconds_sum\{ruta="/api/ia/",metodo="POST"\} (\S+)', metricas.exportar())
+        self.assertGreaterEqual(float(suma.group(1)), 0.05)
+
+    def test_con_la_cola_llena_no_encola_y_responde_local(self):
+        soltar, llamadas = threading.Event(), []
+
+        def bloqueado(prompt):
+            llamadas.append(prompt)
+            soltar.wait(5)
+            return "respuesta de gemini"
+
+        with self.settings(IA_PRESUPUESTO_MS=2000, IA_COLA_FONDO=1), \
+                mock.patch("inteligencia.respaldo.gemini_responder", bloqueado):
+            self.assertEqual(self.pedir("primera", presupuesto_ms=50)["fuente"], "local")
+            inicio = time.monotonic()
+            self.assertEqual(self.pedir("segunda")["fuente"], "local")
+            # la segunda no esperó el presupuesto ni llegó a Gemini
+            self.assertLess(time.monotonic() - inicio, 1)
+            self.assertEqual(len(llamadas), 1)
+
+            soltar.set()
+            for _ in range(100):
+                if respaldo._pendientes == 0:
+                    break
+                time.sleep(0.01)
+            self.assertEqual(self.pedir("tercera")["fuente"], "gemini")
+
+    def test_preguntas_iguales_no_ocupan_mas_hilos(self):
+        soltar, llamadas = threading.Event(), []
+
+        def bloqueado(prompt):
+            llamadas.append(prompt)
+            soltar.wait(5)
+            return "respuesta de gemini"
+
+        with self.settings(IA_COLA_FONDO=2), mock.patch("inteligencia.respaldo.gemini_responder", bloqueado):
+            futuros = [respaldo.llamar_en_fondo("k-igual", "prompt") for _ in range(10)]
+            # la misma llamada para todas: la cola sigue con sitio para otra pregunta
+            self.assertEqual(len({id(f) for f in futuros}), 1)
+            self.assertEqual(respaldo._pendientes, 1)
+            otra = respaldo.llamar_en_fondo("k-otra", "otro prompt")
+            # encolada (con la cola llena saldría ya terminada con ColaLlena)
+            self.assertFalse(otra.done())
+
+            soltar.set()
+            self.assertEqual([f.result(timeout=2) for f in futuros], ["respuesta de gemini"] * 10)
+            otra.result(timeout=2)
+        self.assertEqual(len(llamadas), 2)
+        for _ in range(100):
+            if not respaldo._en_curso:
+                break
+            time.sleep(0.01)
+        self.assertNotIn("k-igual", respaldo._en_curso)
+
+    def test_el_cliente_solo_puede_bajar_el_presupuesto(self):
+        with self.settings(IA_PRESUPUESTO_MS=2000):
+            self.assertEqual(presupuesto_segundos(), 2)
+            self.assertEqual(presupuesto_segundos("500"), 0.5)
+            self.assertEqual(presupuesto_segundos(10000), 2)
+        with self.settings(IA_PRESUPUESTO_MS=0):
+            self.assertIsNone(presupuesto_segundos())
+
+
+# ------------------------------
+# COLA DE TRABAJOS (/api/ia/trabajos/)
+# ------------------------------
+class TrabajosTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        Materias.objects.create(Nombre="Química", Dificultad="media", Notas="n")
+        cls.usuario = Usuarios.objects.create(Nombre="Eva", Correo="eva@x.com", nivel_estudios="uni",
+                                              disponibilidad=True, Dias_Libres="lunes", periodo_prefencia="noche")
+
+    def setUp(self):
+        _cache().clear()
+
+    def test_post_encola_y_el_get_devuelve_el_resultado(self):
+        r = self.client.post("/api/ia/trabajos/", {"usuario_id": self.usuario.id, "pregunta": "¿qué  estudio?"},
+                             content_type="application/json")
+        self.assertEqual(r.status_code, 202)
+        url = r["Location"]
+        self.assertEqual(r.json()["estado"], "pendiente")
+
+        pendiente = self.client.get(url)
+        self.assertEqual((pendiente.json()["estado"], pendiente["Retry-After"]), ("pendiente", "1"))
+
+        with mock.patch("inteligencia.trabajos.gemini_responder", return_value="estudia química"):
+            self.assertEqual(trabajos.ejecutar_trabajador(trabajador="t1", una_vez=True), 1)
+
+        final = self.client.get(url)
+        self.assertEqual(final.json()["estado"], "terminado")
+        self.assertEqual(final.json()["recomendacion"], "estudia química")
+        self.assertNotIn("Retry-After", final)
+
+    def test_un_trabajo_lo_reclama_un_solo_trabajador(self):
+        for _ in range(3):
+            trabajos.encolar(self.usuario.id, "p")
+        a = trabajos.reclamar("a", cantidad=2)
+        b = trabajos.reclamar("b", cantidad=2)
+        self.assertEqual((len(a), len(b)), (2, 1))
+        self.assertFalse({t.id for t in a} & {t.id for t in b})
+        self.assertEqual(trabajos.reclamar("c"), [])
+
+    def test_reintenta_con_backoff_y_termina_fallido(self):
+        trabajo = trabajos.encolar(self.usuario.id, "p")
+        falla = mock.Mock(side_effect=RuntimeError("503"))
+
+        with self.settings(IA_TRABAJOS_MAX_INTENTOS=2, IA_TRABAJOS_BACKOFF_BASE=60):
+            trabajos.procesar(trabajos.reclamar("a")[0], falla)
+            trabajo.refresh_from_db()
+            self.assertEqual((trabajo.estado, trabajo.intentos), ("pendiente", 1))
+            self.assertGreater(trabajo.disponible_at, timezone.now() + datetime.timedelta(seconds=50))
+            self.assertEqual(trabajos.reclamar("a"), [])  # aún en backoff
+
+            Trabajos_Recomendaciones.objects.filter(id=trabajo.id).update(disponible_at=timezone.now())
+            with self.assertLogs("inteligencia.trabajos", "WARNING"):
+                trabajos.procesar(trabajos.reclamar("a")[0], falla)
+        trabajo.refresh_from_db()
+        self.assertEqual((trabajo.estado, trabajo.intentos), ("fallido", 2))
+        self.assertIn("503", trabajo.error)
+        self.assertEqual(trabajos.espera_reintento(3), 20)
+
+    def test_trabajador_caido_libera_el_trabajo(self):
+        trabajos.encolar(self.usuario.id, "p")
+        perdido = trabajos.reclamar("muerto")[0]
+        self.assertEqual(trabajos.reclamar("b"), [])
+
+        # vence el plazo de visibilidad
+        Trabajos_Recomendaciones.objects.filter(id=perdido.id).update(
+            disponible_at=timezone.now() - datetime.timedelta(seconds=1)
+        )
+        rescatado = trabajos.reclamar("b")[0]
+        self.assertEqual((rescatado.id, rescatado.intentos), (perdido.id, 2))
+
+        # si el primero revive tarde, su resultado ya no se guarda
+        self.assertFalse(trabajos.procesar(perdido, lambda prompt: "tarde"))
+        _cache().clear()
+        self.assertTrue(trabajos.procesar(rescatado, lambda prompt: "a tiempo"))
+        self.assertEqual(Trabajos_Recomendaciones.objects.get(id=perdido.id).recomendacion, "a tiempo")
+
+
+# ------------------------------
+# CACHE DE RECOMENDACIONES
+# ------------------------------
+class CacheRecomendacionesTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.materia = Materias.objects.create(Nombre="Cálculo", Dificultad="alta", Notas="n")
+        cls.usuario = Usuarios.objects.create(
+            Nombre="u", Correo="u@x.com", nivel_estudios="uni",
+            disponibilidad=True, Dias_Libres="lunes", periodo_prefencia="tarde",
+        )
+
+    def setUp(self):
+        _cache().clear()
+        cache.reiniciar_estadisticas()
+
+    def pedir(self, pregunta):
+        datos = {"usuario_id": self.usuario.id, "pregunta": pregunta}
+        return self.client.post("/api/ia/", datos, content_type="application/json").json()
+
+    def test_hit_y_miss_en_la_vista(self):
+        llamadas = []
+
+        def responder(prompt):
+            llamadas.append(prompt)
+            return f"respuesta {len(llamadas)}"
+
+        with mock.patch("inteligencia.respaldo.gemini_responder", responder):
+            primera = self.pedir("¿Qué estudio hoy?")
+            # misma pregunta con otros espacios: misma clave
+            segunda = self.pedir("  ¿Qué   estudio\nhoy? ")
+            otra = self.pedir("¿Y mañana?")
+
+        self.assertEqual([r["cache"] for r in (primera, segunda, otra)], [False, True, False])
+        self.assertEqual(segunda["recomendacion"], "respuesta 1")
+        self.assertEqual(len(llamadas), 2)
+        self.assertEqual(self.client.get("/api/ia/cache/").json(), {"hits": 1, "misses": 2, "ratio": 0.3333})
+
+    def test_una_sesion_nueva_invalida_al_usuario(self):
+        with mock.patch("inteligencia.respaldo.gemini_responder", lambda prompt: "respuesta"):
+            self.pedir("¿Qué estudio hoy?")
+            self.assertTrue(self.pedir("¿Qué estudio hoy?")["cache"])
+            Sesiones_Estudios.objects.create(
+                Usuarios_id=self.usuario, Materias_id=self.materia, Nombre="s", descripcion="",
+                duracion=30, fecha=timezone.localdate(), hora_inicio=datetime.time(9, 0),
+            )
+            self.assertFalse(self.pedir("¿Qué estudio hoy?")["cache"])
+
+    def test_la_clave_cambia_con_las_sesiones_y_el_catalogo(self):
+        antes = cache.clave_recomendacion(self.usuario.id, "prompt")
+        with self.captureOnCommitCallbacks(execute=True):
+            sesion = Sesiones_Estudios.objects.create(
+                Usuarios_id=self.usuario, Materias_id=self.materia, Nombre="s", descripcion="",
+                duracion=30, fecha=timezone.localdate(), hora_inicio=datetime.time(9, 0),
+            )
+        tras_sesion = cache.clave_recomendacion(self.usuario.id, "prompt")
+        self.assertNotEqual(antes, tras_sesion)
+
+        self.materia.Notas = "otra"
+        self.materia.save()
+        tras_catalogo = cache.clave_recomendacion(self.usuario.id, "prompt")
+        self.assertNotEqual(tras_sesion, tras_catalogo)
+
+        sesion.delete()
+        self.assertNotEqual(tras_catalogo, cache.clave_recomendacion(self.usuario.id, "prompt"))
+
+    def test_la_version_sobrevive_a_la_cache(self):
+        # la versión vive en la BD: vaciar o expulsar la cache no hace que una
+        # clave vieja vuelva a ser alcanzable
+        cache.invalidar_usuario(self.usuario.id)
+        clave = cache.clave_recomendacion(self.usuario.id, "prompt")
+        _cache().clear()
+        self.assertEqual(clave, cache.clave_recomendacion(self.usuario.id, "prompt"))
+
+    def test_la_version_sube_dentro_de_la_transaccion(self):
+        antes = cache.clave_recomendacion(self.usuario.id, "prompt")
+        try:
+            with transaction.atomic():
+                cache.invalidar_usuario(self.usuario.id)
+                raise RuntimeError
+        except RuntimeError:
+            pass
+        # si la escritura se deshace, la versión tampoco cambia
+        self.assertEqual(antes, cache.clave_recomendacion(self.usuario.id, "prompt"))
@@ -0,0 +1,171 @@
+import datetime
+import logging
+import os
+import socket
+import time
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from Educacion.replicas import lecturas_en_replica
+
+from . import cache
+from .models import Trabajos_Recomendaciones
+from .services import gemini_responder
+from .utils import construir_contexto, construir_prompt
+
+logger = logging.getLogger(__name__)
+
+
+# ------------------------------
+# COLA DE RECOMENDACIONES EN LA BD
+# ------------------------------
+# POST /api/ia/trabajos/ inserta una fila y responde al momento con su id;
+# los procesos de `manage.py trabajador_ia` la reclaman, llaman a Gemini y
+# guardan el resultado en la misma fila (GET /api/ia/trabajos/<id>/).
+#
+# Reclamar = pasar a en_curso con disponible_at = ahora + IA_TRABAJOS_VISIBILIDAD.
+# Si el proceso muere, al vencer ese plazo el trabajo vuelve a poder
+# reclamarse. Un error programa otro intento con backoff exponencial hasta
+# IA_TRABAJOS_MAX_INTENTOS; después queda fallido.
+#
+# Con PostgreSQL/MySQL 8 se usa SELECT ... FOR UPDATE SKIP LOCKED: cada
+# trabajador se salta las filas que otro está reclamando. SQLite no lo
+# tiene (ni lo necesita: serializa las escrituras), así que ahí se reclama
+# con un UPDATE condicionado al estado leído, y si otro ganó, se sigue.
+
+ESTADOS_FINALES = ("terminado", "fallido")
+
+
+def _visibilidad():
+    return datetime.timedelta(seconds=getattr(settings, "IA_TRABAJOS_VISIBILIDAD", 120))
+
+
+def _max_intentos():
+    return getattr(settings, "IA_TRABAJOS_MAX_INTENTOS", 5)
+
+
+def espera_reintento(intentos: int) -> float:
+    """Segundos hasta el siguiente intento: base * 2^(intentos-1), con tope."""
+    base = getattr(settings, "IA_TRABAJOS_BACKOFF_BASE", 5)
+    tope = getattr(settings, "IA_TRABAJOS_BACKOFF_MAX", 300)
+    return min(base * 2 ** max(intentos - 1, 0), tope)
+
+
+def nombre_trabajador() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def encolar(usuario_id: int, pregunta: str) -> Trabajos_Recomendaciones:
+    return Trabajos_Recomendaciones.objects.create(
+        Usuarios_id_id=usuario_id,
+        pregunta=cache.normalizar_pregunta(pregunta),
+        disponible_at=timezone.now(),
+    )
+
+
+def _disponibles(ahora):
+    # pendientes cuyo backoff ya pasó, o en curso cuyo trabajador no terminó a tiempo
+    return Trabajos_Recomendaciones.objects.filter(
+        Q(estado="pendiente") | Q(estado="en_curso"), disponible_at__lte=ahora
+    ).order_by("disponible_at", "id")
+
+
+def reclamar(trabajador: str, cantidad: int = 1) -> list:
+    """Marca como en_curso hasta `cantidad` trabajos disponibles y los devuelve."""
+    ahora = timezone.now()
+    hasta = ahora + _visibilidad()
+
+    if connection.features.has_select_for_update_skip_locked:
+        with transaction.atomic():
+            ids = list(
+                _disponibles(ahora).select_for_update(skip_locked=True).values_list("id", flat=True)[:cantidad]
+            )
+            Trabajos_Recomendaciones.objects.filter(id__in=ids).update(
+                estado="en_curso", disponible_at=hasta, trabajador=trabajador,
+                intentos=F("intentos") + 1, updated_at=ahora,
+            )
+    else:
+        ids = []
+        candidatos = _disponibles(ahora).values_list("id", "estado", "disponible_at", "intentos")[:cantidad * 2]
+        for id_, estado, disponible_at, intentos in candidatos:
+            if len(ids) == cantidad:
+                break
+            ganado = Trabajos_Recomendaciones.objects.filter(
+                id=id_, estado=estado, disponible_at=disponible_at, intentos=intentos
+            ).update(
+                estado="en_curso", disponible_at=hasta, trabajador=trabajador,
+                intentos=intentos + 1, updated_at=ahora,
+            )
+            if ganado:
+                ids.append(id_)
+
+    return list(Trabajos_Recomendaciones.objects.filter(id__in=ids).order_by("id"))
+
+
+def _cerrar(trabajo, **campos):
+    """
+    Guarda el resultado solo si el trabajo sigue siendo nuestro: si el plazo
+    de visibilidad venció y otro trabajador lo reclamó, intentos ya cambió.
+    """
+    campos["updated_at"] = timezone.now()
+    return bool(
+        Trabajos_Recomendaciones.objects.filter(
+            id=trabajo.id, estado="en_curso", trabajador=trabajo.trabajador, intentos=trabajo.intentos
+        ).update(**campos)
+    )
+
+
+def procesar(trabajo, responder=None) -> bool:
+    """Ejecuta un trabajo reclamado. Devuelve False si ya no era nuestro."""
+    responder = responder or gemini_responder
+    try:
+        # la versión antes que el contexto y de la misma réplica, como en /api/ia/
+        with lecturas_en_replica():
+            version = cache.version_recomendacion(trabajo.Usuarios_id_id)
+            contexto = construir_contexto(trabajo.Usuarios_id_id, trabajo.pregunta)
+        prompt = construir_prompt(contexto, trabajo.pregunta)
+        # ✅ misma cache que /api/ia/: si la respuesta ya está no se llama a Gemini
+        clave = cache.clave_recomendacion(trabajo.Usuarios_id_id, prompt, version)
+        respuesta = cache.obtener_recomendacion(clave)
+        if respuesta is None:
+            respuesta = responder(prompt)
+            cache.guardar_recomendacion(clave, respuesta)
+    except Exception as e:
+        error = f"{type(e).__name__}: {e}"
+        if trabajo.intentos >= _max_intentos():
+            logger.warning("trabajo %s fallido tras %s intentos: %s", trabajo.id, trabajo.intentos, error)
+            return _cerrar(trabajo, estado="fallido", error=error, terminado_at=timezone.now())
+        espera = espera_reintento(trabajo.intentos)
+        return _cerrar(
+            trabajo, estado="pendiente", error=error,
+            disponible_at=timezone.now() + datetime.timedelta(seconds=espera),
+        )
+
+    return _cerrar(trabajo, estado="terminado", recomendacion=respuesta, error="", terminado_at=timezone.now())
+
+
+def ejecutar_trabajador(trabajador=None, responder=None, cantidad=1,
+                        espera=1.0, detener=None, una_vez=False) -> int:
+    """
+    Reclama y procesa trabajos hasta que `detener()` devuelva True (o, con
+    `una_vez`, hasta vaciar la cola). Devuelve cuántos procesó.
+    """
+    trabajador = trabajador or nombre_trabajador()
+    detener = detener or (lambda: False)
+    procesados = 0
+
+    while not detener():
+        trabajos = reclamar(trabajador, cantidad)
+        if not trabajos:
+            if una_vez:
+                break
+            time.sleep(espera)
+            continue
+        for trabajo in trabajos:
+            procesar(trabajo, responder)
+            procesados += 1
+
+    return procesados
@@ -1,6 +1,10 @@
 from django.urls import path
-from .views import recomendar_materia
+from .views import recomendar_materia, recomendar_materia_async, estado_cache, crear_trabajo, estado_trabajo
 
 urlpatterns = [
     path("", recomendar_materia),
+    path("async/", recomendar_materia_async),
+    path("cache/", estado_cache),
+    path("trabajos/", crear_trabajo),
+    path("trabajos/<int:trabajo_id>/", estado_trabajo),
 ]
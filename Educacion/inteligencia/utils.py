@@ -1,19 +1,81 @@
-from administrador.models import Usuarios, Materias, Sesiones_Estudios
-from django.db.models import Sum
+from asgiref.sync import sync_to_async
 
-def construir_contexto(usuario_id: int) -> str:
-    usuario = Usuarios.objects.get(id=usuario_id)
+from administrador.models import Usuarios, Resumen_Estudios
+from Educacion.replicas import lecturas_en_replica
 
-    sesiones = Sesiones_Estudios.objects.filter(Usuarios_id_id=usuario_id).select_related(
-        "Materias_id", "Planes_id"
+from .indice import obtener_indice, seleccionar_materias
+
+
+def datos_contexto(usuario_id: int, pregunta: str = ""):
+    """(usuario, resumen, materias): lo que usan el prompt y el recomendador local."""
+    # ✅ solo lecturas: van a una réplica si hay
+    with lecturas_en_replica():
+        usuario = Usuarios.objects.get(id=usuario_id)
+
+        # ✅ una fila por materia (tabla Resumen_Estudios), no todo el historial
+        resumen = list(_resumen_usuario(usuario_id))
+
+    # ✅ solo las materias relevantes para la pregunta (índice BM25), no las 200 primeras
+    materias = _materias_relevantes(pregunta, resumen)
+
+    return usuario, resumen, materias
+
+
+async def datos_contexto_async(usuario_id: int, pregunta: str = ""):
+    # ✅ mismas consultas que datos_contexto pero con el ORM async
+    with lecturas_en_replica():
+        usuario = await Usuarios.objects.aget(id=usuario_id)
+
+        resumen = [r async for r in _resumen_usuario(usuario_id)]
+
+    materias = await sync_to_async(_materias_relevantes)(pregunta, resumen)
+
+    return usuario, resumen, materias
+
+
+def construir_contexto(usuario_id: int, pregunta: str = "") -> str:
+    return formatear_contexto(*datos_contexto(usuario_id, pregunta))
+
+
+async def construir_contexto_async(usuario_id: int, pregunta: str = "") -> str:
+    return formatear_contexto(*await datos_contexto_async(usuario_id, pregunta))
+
+
+def construir_contextos(usuarios, pregunta: str = "") -> dict:
+    """
+    Contextos de varios usuarios a la vez ({usuario_id: contexto}) con una
+    consulta para todos los resúmenes en vez de una por usuario, y el índice
+    de materias sincronizado una vez para todo el bloque.
+    """
+    resumenes = {u.id: [] for u in usuarios}
+    filas = (
+        Resumen_Estudios.objects.filter(Usuarios_id_id__in=list(resumenes))
+        .values("Usuarios_id_id", "Materias_id__Nombre", "Materias_id__Dificultad", "minutos")
+        .order_by("Usuarios_id_id", "-minutos")
     )
+    for fila in filas:
+        resumenes[fila["Usuarios_id_id"]].append(fila)
+
+    indice = obtener_indice()
+    return {
+        u.id: formatear_contexto(u, resumenes[u.id], _materias_relevantes(pregunta, resumenes[u.id], indice))
+        for u in usuarios
+    }
+
+
+def _materias_relevantes(pregunta, resumen, indice=None):
+    return seleccionar_materias(pregunta, [r["Materias_id__Nombre"] for r in resumen], indice)
+
 
-    resumen = (
-        sesiones.values("Materias_id__Nombre", "Materias_id__Dificultad")
-        .annotate(minutos=Sum("duracion"))
+def _resumen_usuario(usuario_id: int):
+    return (
+        Resumen_Estudios.objects.filter(Usuarios_id_id=usuario_id)
+        .values("Materias_id__Nombre", "Materias_id__Dificultad", "minutos")
         .order_by("-minutos")
     )
 
+
+def formatear_contexto(usuario, resumen, materias) -> str:
     partes = []
     partes.append(f"Usuario: {usuario.Nombre} (ID={usuario.id})")
     partes.append(f"Nivel de estudios: {usuario.nivel_estudios}")
@@ -31,7 +93,27 @@ def construir_contexto(usuario_id: int) -> str:
 
     partes.append("")
     partes.append("Materias disponibles en el sistema:")
-    for m in Materias.objects.all().values("Nombre", "Dificultad")[:200]:
+    for m in materias:
         partes.append(f"- {m['Nombre']} (Dificultad: {m['Dificultad']})")
 
     return "\n".join(partes)
+
+
+def construir_prompt(contexto: str, pregunta: str) -> str:
+    return f"""
+Eres un orientador académico.
+Debes recomendar SOLO materias que estén en 'Materias disponibles en el sistema'.
+Usa historial (minutos), dificultad y preferencias del usuario.
+
+CONTEXTO:
+{contexto}
+
+PREGUNTA:
+{pregunta}
+
+Devuelve en este formato EXACTO:
+- Materia recomendada:
+- Por qué (3 razones):
+- 2 alternativas:
+- Plan de acción para hoy (pasos concretos):
+"""
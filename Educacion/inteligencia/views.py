@@ -1,14 +1,29 @@
-from django.shortcuts import render
+import asyncio
+import json
+
+from asgiref.sync import sync_to_async
+from django.http import JsonResponse, StreamingHttpResponse
+from django.shortcuts import get_object_or_404, render
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_POST
 
 # Create your views here.
-from rest_framework.decorators import api_view
+from rest_framework.decorators import api_view, renderer_classes
 from rest_framework.response import Response
 from rest_framework import status
+from rest_framework.settings import api_settings
+
+from administrador.models import Usuarios
+from Educacion.replicas import lecturas_en_replica
 
-from .utils import construir_contexto
-from .services import gemini_responder
+from . import cache, respaldo, trabajos
+from .local import recomendar_local
+from .models import Trabajos_Recomendaciones
+from .utils import datos_contexto, datos_contexto_async, formatear_contexto, construir_prompt
+from .streaming import EventStreamRenderer, pide_stream, stream_recomendacion
 
 @api_view(["POST"])
+@renderer_classes(api_settings.DEFAULT_RENDERER_CLASSES + [EventStreamRenderer])
 def recomendar_materia(request):
     usuario_id = request.data.get("usuario_id")
     pregunta = request.data.get("pregunta")
@@ -21,36 +36,160 @@ def recomendar_materia(request):
     except:
         return Response({"error": "usuario_id debe ser numérico"}, status=status.HTTP_400_BAD_REQUEST)
 
+    pregunta_normalizada = cache.normalizar_pregunta(pregunta)
+
     try:
-        contexto = construir_contexto(usuario_id)
+        # ✅ la versión de la cache se lee antes que el contexto y de la misma réplica
+        with lecturas_en_replica():
+            version = cache.version_recomendacion(usuario_id)
+            datos = datos_contexto(usuario_id, pregunta_normalizada)
     except Exception as e:
         return Response({"error": f"No se pudo construir contexto: {str(e)}"}, status=status.HTTP_400_BAD_REQUEST)
 
-    prompt = f"""
-Eres un orientador académico.
-Debes recomendar SOLO materias que estén en 'Materias disponibles en el sistema'.
-Usa historial (minutos), dificultad y preferencias del usuario.
+    prompt = construir_prompt(formatear_contexto(*datos), pregunta_normalizada)
+
+    # ✅ misma pregunta + mismo historial => misma respuesta, sin llamar a Gemini
+    clave = cache.clave_recomendacion(usuario_id, prompt, version)
+
+    # ✅ Accept: text/event-stream o stream=true => se envían los fragmentos según llegan
+    if pide_stream(request):
+        respuesta = StreamingHttpResponse(
+            stream_recomendacion(usuario_id, pregunta, prompt, clave),
+            content_type="text/event-stream"
+        )
+        respuesta["Cache-Control"] = "no-cache"
+        respuesta["X-Accel-Buffering"] = "no"
+        return respuesta
+
+    respuesta = cache.obtener_recomendacion(clave)
+    en_cache = respuesta is not None
+    fuente = "gemini"
+
+    if not en_cache:
+        # ✅ peticiones iguales y simultáneas comparten una sola llamada a Gemini;
+        # si no contesta dentro del presupuesto (o falla) se responde con el
+        # recomendador local y la llamada termina en segundo plano
+        futuro = respaldo.llamar_en_fondo(clave, prompt)
+        try:
+            respuesta = futuro.result(timeout=respaldo.presupuesto_segundos(request.data.get("presupuesto_ms")))
+        except Exception:  # presupuesto agotado o error de Gemini
+            respuesta = recomendar_local(*datos)
+            fuente = "local"
+
+    return Response({
+        "usuario_id": usuario_id,
+        "pregunta": pregunta,
+        "recomendacion": respuesta,
+        "cache": en_cache,
+        "fuente": fuente
+    })
+
 
-CONTEXTO:
-{contexto}
+# ✅ Misma lógica que recomendar_materia pero async: bajo ASGI (Educacion/asgi.py)
+# la espera a Gemini no ocupa un hilo. La vista sync sigue siendo la de WSGI.
+@csrf_exempt
+@require_POST
+async def recomendar_materia_async(request):
+    try:
+        data = json.loads(request.body or b"{}")
+    except ValueError:
+        return JsonResponse({"error": "JSON inválido"}, status=status.HTTP_400_BAD_REQUEST)
 
-PREGUNTA:
-{pregunta}
+    usuario_id = data.get("usuario_id")
+    pregunta = data.get("pregunta")
 
-Devuelve en este formato EXACTO:
-- Materia recomendada:
-- Por qué (3 razones):
-- 2 alternativas:
-- Plan de acción para hoy (pasos concretos):
-"""
+    if not usuario_id or not pregunta:
+        return JsonResponse({"error": "Debes enviar usuario_id y pregunta"}, status=status.HTTP_400_BAD_REQUEST)
 
     try:
-        respuesta = gemini_responder(prompt)
+        usuario_id = int(usuario_id)
+    except (TypeError, ValueError):
+        return JsonResponse({"error": "usuario_id debe ser numérico"}, status=status.HTTP_400_BAD_REQUEST)
+
+    pregunta_normalizada = cache.normalizar_pregunta(pregunta)
+
+    try:
+        with lecturas_en_replica():
+            version = await sync_to_async(cache.version_recomendacion)(usuario_id)
+            datos = await datos_contexto_async(usuario_id, pregunta_normalizada)
     except Exception as e:
-        return Response({"error": f"Error llamando a Gemini: {str(e)}"}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+        return JsonResponse({"error": f"No se pudo construir contexto: {str(e)}"}, status=status.HTTP_400_BAD_REQUEST)
 
-    return Response({
+    prompt = construir_prompt(formatear_contexto(*datos), pregunta_normalizada)
+
+    clave = cache.clave_recomendacion(usuario_id, prompt, version)
+    respuesta = await sync_to_async(cache.obtener_recomendacion)(clave)
+    en_cache = respuesta is not None
+    fuente = "gemini"
+
+    if not en_cache:
+        tarea = respaldo.llamar_en_fondo_async(clave, prompt)
+        try:
+            # shield: al agotarse el presupuesto la tarea no se cancela, sigue y calienta la cache
+            respuesta = await asyncio.wait_for(
+                asyncio.shield(tarea), respaldo.presupuesto_segundos(data.get("presupuesto_ms"))
+            )
+        except Exception:  # presupuesto agotado o error de Gemini
+            respuesta = recomendar_local(*datos)
+            fuente = "local"
+
+    return JsonResponse({
         "usuario_id": usuario_id,
         "pregunta": pregunta,
-        "recomendacion": respuesta
+        "recomendacion": respuesta,
+        "cache": en_cache,
+        "fuente": fuente
     })
+
+
+# ✅ Modo trabajo: el POST solo encola y responde 202 con el id; la llamada a
+# Gemini la hace `manage.py trabajador_ia` y el cliente consulta el GET.
+@api_view(["POST"])
+def crear_trabajo(request):
+    usuario_id = request.data.get("usuario_id")
+    pregunta = request.data.get("pregunta")
+
+    if not usuario_id or not pregunta:
+        return Response({"error": "Debes enviar usuario_id y pregunta"}, status=status.HTTP_400_BAD_REQUEST)
+
+    try:
+        usuario_id = int(usuario_id)
+    except (TypeError, ValueError):
+        return Response({"error": "usuario_id debe ser numérico"}, status=status.HTTP_400_BAD_REQUEST)
+
+    if not Usuarios.objects.filter(id=usuario_id).exists():
+        return Response({"error": "Usuario no encontrado"}, status=status.HTTP_400_BAD_REQUEST)
+
+    trabajo = trabajos.encolar(usuario_id, pregunta)
+    url = f"{request.path.rstrip('/')}/{trabajo.id}/"
+    respuesta = Response(_datos_trabajo(trabajo) | {"url": url}, status=status.HTTP_202_ACCEPTED)
+    respuesta["Location"] = url
+    return respuesta
+
+
+@api_view(["GET"])
+def estado_trabajo(request, trabajo_id):
+    trabajo = get_object_or_404(Trabajos_Recomendaciones, id=trabajo_id)
+    respuesta = Response(_datos_trabajo(trabajo))
+    if trabajo.estado not in trabajos.ESTADOS_FINALES:
+        respuesta["Retry-After"] = "1"
+    return respuesta
+
+
+def _datos_trabajo(trabajo):
+    return {
+        "id": trabajo.id,
+        "usuario_id": trabajo.Usuarios_id_id,
+        "pregunta": trabajo.pregunta,
+        "estado": trabajo.estado,
+        "intentos": trabajo.intentos,
+        "recomendacion": trabajo.recomendacion or None,
+        "error": trabajo.error or None,
+        "created_at": trabajo.created_at,
+        "terminado_at": trabajo.terminado_at,
+    }
+
+
+@api_view(["GET"])
+def estado_cache(request):
+    return Response(cache.estadisticas())